@@ -1,12 +1,212 @@
+import os
 import sqlite3
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 
-DB_PATH = Path("storage/logichain.db")
+DB_PATH = Path(os.environ.get("LOGICHAIN_DB_PATH", "storage/logichain.db"))
 
+STATEMENT_CACHE_SIZE = 256
+# Conexões ociosas mantidas para reuso; acima disso a conexão devolvida é fechada.
+POOL_SIZE = 8
 
-def get_connection() -> sqlite3.Connection:
-    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
+PRAGMA_PROFILE = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "foreign_keys": "ON",
+    "cache_size": -32000,
+    "mmap_size": 268435456,
+    "busy_timeout": 5000,
+    "temp_store": "MEMORY",
+}
+
+# Contador persistido de gerações de dados: toda transação que altera linhas o incrementa ao
+# confirmar, inclusive em outros processos, e caches de leitura o usam como marca d'água. Gravações
+# só de eventos de auditoria que não entram nos KPIs abrem a transação com bump_generation=False.
+DATA_GENERATION_BUMP_SQL = "UPDATE data_generation SET generation = generation + 1 WHERE id = 1"
+DATA_GENERATION_SQL = "SELECT generation FROM data_generation WHERE id = 1"
+
+
+def _open_connection(path: Path) -> sqlite3.Connection:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, cached_statements=STATEMENT_CACHE_SIZE, check_same_thread=False)
     conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA foreign_keys = ON")
+    for pragma, value in PRAGMA_PROFILE.items():
+        conn.execute(f"PRAGMA {pragma} = {value}")
     return conn
+
+
+def _bump_generation(conn: sqlite3.Connection) -> None:
+    try:
+        conn.execute(DATA_GENERATION_BUMP_SQL)
+    except sqlite3.OperationalError:
+        # Banco ainda sem a migração do contador.
+        pass
+
+
+# Pool de checkout/devolução independente de thread: o Streamlit roda cada rerun em uma thread nova,
+# então a conexão volta ao pool ao fim de connection() e o próximo rerun reaproveita a mesma conexão
+# (PRAGMAs e cache de statements já aplicados). Com pooled=False cada checkout abre e fecha a sua.
+class ConnectionManager:
+    def __init__(self, path: Path | None = None, pooled: bool = True, pool_size: int = POOL_SIZE):
+        self.path = Path(path) if path is not None else DB_PATH
+        self.pooled = pooled
+        self.pool_size = pool_size if pooled else 0
+        self.opened = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._idle: list[sqlite3.Connection] = []
+        self._in_use: set[sqlite3.Connection] = set()
+
+    def _checkout(self) -> sqlite3.Connection:
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                self.opened += 1
+        if conn is None:
+            conn = _open_connection(self.path)
+        with self._lock:
+            self._in_use.add(conn)
+        return conn
+
+    def _checkin(self, conn: sqlite3.Connection) -> None:
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            if conn in self._in_use:
+                self._in_use.discard(conn)
+                if len(self._idle) < self.pool_size:
+                    self._idle.append(conn)
+                    return
+        conn.close()
+
+    @contextmanager
+    def connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            # Reentrante: chamadas aninhadas na mesma thread usam a conexão já emprestada.
+            yield conn
+            return
+        conn = self._checkout()
+        self._local.conn = conn
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            self._checkin(conn)
+
+    # Para scripts e threads de vida longa: a conexão fica presa à thread até release() ou close_all().
+    def acquire(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._checkout()
+        return conn
+
+    def release(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and not self.in_transaction():
+            self._local.conn = None
+            self._checkin(conn)
+
+    @contextmanager
+    def transaction(self, bump_generation: bool = True):
+        state = self._local
+        if getattr(state, "tx_conn", None) is not None:
+            yield state.tx_conn
+            return
+
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            changes = conn.total_changes
+            state.tx_conn = conn
+            state.tx_callbacks = []
+            try:
+                yield conn
+                if bump_generation and conn.total_changes != changes:
+                    _bump_generation(conn)
+            except BaseException:
+                conn.rollback()
+                raise
+            else:
+                conn.commit()
+                callbacks = state.tx_callbacks
+            finally:
+                state.tx_conn = None
+                state.tx_callbacks = []
+        for callback in callbacks:
+            callback()
+
+    def data_generation(self) -> int:
+        try:
+            with self.connection() as conn:
+                row = conn.execute(DATA_GENERATION_SQL).fetchone()
+        except sqlite3.OperationalError:
+            return 0
+        return row[0] if row else 0
+
+    def in_transaction(self) -> bool:
+        return getattr(self._local, "tx_conn", None) is not None
+
+    def on_commit(self, callback) -> None:
+        if not self.in_transaction():
+            callback()
+        else:
+            self._local.tx_callbacks.append(callback)
+
+    def close_all(self) -> None:
+        with self._lock:
+            for conn in [*self._idle, *self._in_use]:
+                conn.close()
+            self._idle.clear()
+            self._in_use.clear()
+        self._local = threading.local()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "pooled": self.pooled,
+                "open": len(self._idle) + len(self._in_use),
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                "opened_total": self.opened,
+            }
+
+
+_manager = ConnectionManager()
+
+
+def configure(path: Path | str | None = None, pooled: bool = True) -> ConnectionManager:
+    global _manager, DB_PATH
+    _manager.close_all()
+    if path is not None:
+        DB_PATH = Path(path)
+    _manager = ConnectionManager(DB_PATH, pooled=pooled)
+    return _manager
+
+
+def get_manager() -> ConnectionManager:
+    return _manager
+
+
+def connection():
+    return _manager.connection()
+
+
+def get_connection() -> sqlite3.Connection:
+    return _manager.acquire()
+
+
+def transaction(bump_generation: bool = True):
+    return _manager.transaction(bump_generation)
+
+
+def data_generation() -> int:
+    return _manager.data_generation()
+
+
+def in_transaction() -> bool:
+    return _manager.in_transaction()
+
+
+def on_commit(callback) -> None:
+    _manager.on_commit(callback)
@@ -1,7 +1,36 @@
-from db.connection import get_connection
+import re
+import sqlite3
+import threading
+from dataclasses import dataclass
+from typing import Callable
 
+from db.connection import connection, get_manager
+from utils import codec
+from utils.helpers import now_iso
 
-DDL_STATEMENTS = [
+BACKFILL_BATCH_SIZE = 2000
+# UPSERT (3.24) e funções de janela (3.25) são os recursos mais recentes usados pelo schema e pelos serviços.
+MIN_SQLITE_VERSION = (3, 25, 0)
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    statements: tuple[str, ...] = ()
+    backfill: Callable[[sqlite3.Connection], None] | None = None
+
+
+SCHEMA_VERSION_DDL = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+      version INTEGER PRIMARY KEY,
+      name TEXT NOT NULL,
+      applied_at TEXT NOT NULL,
+      completed_at TEXT
+    )
+    """
+
+BASELINE_DDL = (
     """
     CREATE TABLE IF NOT EXISTS contracts (
       id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -120,12 +149,732 @@ DDL_STATEMENTS = [
     """
     CREATE INDEX IF NOT EXISTS idx_contracts_end_date ON contracts(end_date)
     """,
-]
+)
 
 
-def run_migrations() -> None:
-    conn = get_connection()
+def backfill_in_batches(
+    conn: sqlite3.Connection,
+    select_sql: str,
+    apply_batch: Callable[[sqlite3.Connection, list], None],
+    batch_size: int = BACKFILL_BATCH_SIZE,
+) -> int:
+    # select_sql must filter on "id > ?", order by id and end with "LIMIT ?".
+    last_id = 0
+    total = 0
+    while True:
+        rows = conn.execute(select_sql, (last_id, batch_size)).fetchall()
+        if not rows:
+            return total
+        with conn:
+            apply_batch(conn, rows)
+        last_id = rows[-1]["id"]
+        total += len(rows)
+
+
+def _backfill_parties(conn: sqlite3.Connection) -> None:
+    from services.party_service import backfill_contract_parties
+
+    backfill_in_batches(
+        conn,
+        "SELECT id, contractor_json, contracted_json FROM contracts WHERE id > ? ORDER BY id LIMIT ?",
+        backfill_contract_parties,
+    )
+
+
+def reencode_event_payloads(
+    conn: sqlite3.Connection, target: str | None = None, batch_size: int = BACKFILL_BATCH_SIZE
+) -> int:
+    target = target or codec.EVENT_PAYLOAD_CODEC
+    if target == "binary":
+        select_sql = (
+            "SELECT id, event_data_json AS raw FROM contract_events "
+            "WHERE id > ? AND event_data_json IS NOT NULL ORDER BY id LIMIT ?"
+        )
+
+        def apply_batch(conn, rows):
+            conn.executemany(
+                "UPDATE contract_events SET event_data_bin = ?, event_data_json = NULL WHERE id = ?",
+                [(codec.encode_binary(codec.decode_payload(r["raw"], None, {})), r["id"]) for r in rows],
+            )
+    else:
+        select_sql = (
+            "SELECT id, event_data_bin AS raw FROM contract_events "
+            "WHERE id > ? AND event_data_bin IS NOT NULL ORDER BY id LIMIT ?"
+        )
+
+        def apply_batch(conn, rows):
+            conn.executemany(
+                "UPDATE contract_events SET event_data_json = ?, event_data_bin = NULL WHERE id = ?",
+                [(codec.dumps_json(codec.decode_binary(r["raw"])), r["id"]) for r in rows],
+            )
+
+    total = backfill_in_batches(conn, select_sql, apply_batch, batch_size)
     with conn:
-        for ddl in DDL_STATEMENTS:
+        conn.execute(
+            """
+            INSERT INTO app_settings (key, value, updated_at) VALUES ('event_payload_codec', ?, ?)
+            ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+            """,
+            (target, now_iso()),
+        )
+    return total
+
+
+def stored_event_codec(conn: sqlite3.Connection) -> str:
+    row = conn.execute("SELECT value FROM app_settings WHERE key = 'event_payload_codec'").fetchone()
+    return row["value"] if row else "json"
+
+
+_reencode_threads: dict[str, threading.Thread] = {}
+
+
+def _reencode_with(manager, target: str) -> None:
+    with manager.connection() as conn:
+        reencode_event_payloads(conn, target)
+
+
+def start_payload_reencode() -> threading.Thread | None:
+    manager = get_manager()
+    path = str(manager.path)
+    target = codec.EVENT_PAYLOAD_CODEC
+    with manager.connection() as conn:
+        if stored_event_codec(conn) == target:
+            return None
+    with _lock:
+        thread = _reencode_threads.get(path)
+        if thread is not None and thread.is_alive():
+            return thread
+        thread = threading.Thread(
+            target=lambda: _reencode_with(manager, target),
+            name="reencode-event-payloads",
+            daemon=True,
+        )
+        _reencode_threads[path] = thread
+        thread.start()
+    return thread
+
+
+PARTIES_DDL = (
+    """
+    CREATE TABLE IF NOT EXISTS parties (
+      id INTEGER PRIMARY KEY AUTOINCREMENT,
+      doc TEXT UNIQUE NOT NULL,
+      name TEXT NOT NULL,
+      email TEXT,
+      created_at TEXT NOT NULL,
+      updated_at TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS contract_parties (
+      contract_id INTEGER NOT NULL,
+      role TEXT NOT NULL,
+      party_id INTEGER NOT NULL,
+      PRIMARY KEY (contract_id, role),
+      FOREIGN KEY (contract_id) REFERENCES contracts(id),
+      FOREIGN KEY (party_id) REFERENCES parties(id)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_parties_name ON parties(name COLLATE NOCASE)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_contract_parties_role_party ON contract_parties(role, party_id)
+    """,
+)
+
+
+CONTRACTS_FTS_DDL = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS contracts_fts USING fts5(
+      title, scope_text, clauses_text, legal_notes,
+      content='contracts', content_rowid='id',
+      tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS contracts_fts_ai AFTER INSERT ON contracts BEGIN
+      INSERT INTO contracts_fts (rowid, title, scope_text, clauses_text, legal_notes)
+      VALUES (new.id, new.title, new.scope_text, new.clauses_text, new.legal_notes);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS contracts_fts_ad AFTER DELETE ON contracts BEGIN
+      INSERT INTO contracts_fts (contracts_fts, rowid, title, scope_text, clauses_text, legal_notes)
+      VALUES ('delete', old.id, old.title, old.scope_text, old.clauses_text, old.legal_notes);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS contracts_fts_au
+    AFTER UPDATE OF title, scope_text, clauses_text, legal_notes ON contracts BEGIN
+      INSERT INTO contracts_fts (contracts_fts, rowid, title, scope_text, clauses_text, legal_notes)
+      VALUES ('delete', old.id, old.title, old.scope_text, old.clauses_text, old.legal_notes);
+      INSERT INTO contracts_fts (rowid, title, scope_text, clauses_text, legal_notes)
+      VALUES (new.id, new.title, new.scope_text, new.clauses_text, new.legal_notes);
+    END
+    """,
+    """
+    INSERT INTO contracts_fts (contracts_fts) VALUES ('rebuild')
+    """,
+)
+
+
+HOT_PATH_INDEXES_DDL = (
+    """
+    DROP INDEX IF EXISTS idx_contracts_status
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_contracts_status_created ON contracts(status, created_at)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_contracts_department ON contracts(department)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_contracts_created_at ON contracts(created_at)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_contracts_value ON contracts(contract_value)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_events_contract_created ON contract_events(contract_id, created_at)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_additives_contract ON contract_additives(contract_id)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_compliance_contract
+    ON compliance_checks(contract_id, risk_score, out_of_standard, nonconformities_count)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_supplier_perf_contract ON supplier_performance(contract_id)
+    """,
+)
+
+
+UNIQUE_CONTRACT_METRICS_DDL = (
+    """
+    DELETE FROM compliance_checks WHERE id NOT IN (
+      SELECT id FROM (
+        SELECT id, ROW_NUMBER() OVER (PARTITION BY contract_id ORDER BY updated_at DESC, id DESC) AS rn
+        FROM compliance_checks
+      ) WHERE rn = 1
+    )
+    """,
+    """
+    DELETE FROM supplier_performance WHERE id NOT IN (
+      SELECT id FROM (
+        SELECT id, ROW_NUMBER() OVER (PARTITION BY contract_id ORDER BY updated_at DESC, id DESC) AS rn
+        FROM supplier_performance
+      ) WHERE rn = 1
+    )
+    """,
+    """
+    DROP INDEX IF EXISTS idx_compliance_contract
+    """,
+    """
+    DROP INDEX IF EXISTS idx_supplier_perf_contract
+    """,
+    """
+    CREATE UNIQUE INDEX IF NOT EXISTS ux_compliance_contract ON compliance_checks(contract_id)
+    """,
+    """
+    CREATE UNIQUE INDEX IF NOT EXISTS ux_supplier_perf_contract ON supplier_performance(contract_id)
+    """,
+)
+
+
+CONTRACT_SEQUENCES_DDL = (
+    """
+    CREATE TABLE IF NOT EXISTS contract_sequences (
+      prefix TEXT NOT NULL,
+      year INTEGER NOT NULL,
+      last_value INTEGER NOT NULL,
+      PRIMARY KEY (prefix, year)
+    ) WITHOUT ROWID
+    """,
+    """
+    INSERT OR IGNORE INTO contract_sequences (prefix, year, last_value)
+    SELECT 'LC', CAST(substr(contract_number, 4, 4) AS INTEGER), MAX(CAST(substr(contract_number, 9) AS INTEGER))
+    FROM contracts
+    WHERE contract_number GLOB 'LC-[0-9][0-9][0-9][0-9]-[0-9]*'
+    GROUP BY substr(contract_number, 4, 4)
+    """,
+)
+
+
+IMPORT_CHECKPOINTS_DDL = (
+    """
+    CREATE TABLE IF NOT EXISTS import_checkpoints (
+      source TEXT PRIMARY KEY,
+      position INTEGER NOT NULL DEFAULT 0,
+      imported INTEGER NOT NULL DEFAULT 0,
+      failed INTEGER NOT NULL DEFAULT 0,
+      updated_at TEXT NOT NULL
+    )
+    """,
+)
+
+
+EVENT_PAYLOAD_BINARY_DDL = (
+    """
+    ALTER TABLE contract_events ADD COLUMN event_data_bin BLOB
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS app_settings (
+      key TEXT PRIMARY KEY,
+      value TEXT NOT NULL,
+      updated_at TEXT NOT NULL
+    )
+    """,
+    """
+    INSERT OR IGNORE INTO app_settings (key, value, updated_at)
+    VALUES ('event_payload_codec', 'json', datetime('now'))
+    """,
+)
+
+
+EVENT_ROLLUPS_ARCHIVE_DDL = (
+    """
+    CREATE TABLE IF NOT EXISTS contract_event_rollups (
+      contract_id INTEGER NOT NULL,
+      event_type TEXT NOT NULL,
+      event_count INTEGER NOT NULL,
+      first_at TEXT NOT NULL,
+      last_at TEXT NOT NULL,
+      PRIMARY KEY (contract_id, event_type)
+    ) WITHOUT ROWID
+    """,
+    """
+    INSERT OR REPLACE INTO contract_event_rollups (contract_id, event_type, event_count, first_at, last_at)
+    SELECT contract_id, event_type, COUNT(*), MIN(created_at), MAX(created_at)
+    FROM contract_events
+    GROUP BY contract_id, event_type
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_contract_events_rollup AFTER INSERT ON contract_events BEGIN
+      INSERT INTO contract_event_rollups (contract_id, event_type, event_count, first_at, last_at)
+      VALUES (new.contract_id, new.event_type, 1, new.created_at, new.created_at)
+      ON CONFLICT(contract_id, event_type) DO UPDATE SET
+        event_count = event_count + 1,
+        first_at = MIN(first_at, excluded.first_at),
+        last_at = MAX(last_at, excluded.last_at);
+    END
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS contract_events_archive (
+      id INTEGER PRIMARY KEY,
+      contract_id INTEGER NOT NULL,
+      event_type TEXT NOT NULL,
+      event_data_json TEXT,
+      created_at TEXT NOT NULL,
+      event_data_bin BLOB
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_events_archive_contract_created ON contract_events_archive(contract_id, created_at)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_events_created ON contract_events(created_at)
+    """,
+)
+
+
+# Segundos desde a época de uma data ISO (NULL se inválida); equivale a unixepoch(), que exige SQLite 3.38.
+def epoch_sql(value: str) -> str:
+    return f"CAST(strftime('%s', {value}) AS INTEGER)"
+
+
+# Dias inteiros entre duas datas ISO, arredondados para baixo como Timedelta.days.
+def days_between_sql(later: str, earlier: str) -> str:
+    diff = f"({epoch_sql(later)} - {epoch_sql(earlier)})"
+    return f"(({diff} - ({diff} % 86400 + 86400) % 86400) / 86400)"
+
+
+KPI_DIMENSIONS = ("department", "type", "status")
+
+KPI_SUM_COLUMNS = (
+    "contract_value",
+    "executed_value",
+    "savings_value",
+    "penalties_value",
+    "roi_value",
+    "critical_clauses",
+    "digitally_signed",
+    "strategic_alignment",
+    "revenue_contribution",
+    "operation_critical",
+    "supplier_key_dependency",
+    "supplier_diversification_score",
+    "maturity_score",
+    "governance_index",
+    "automation_pct",
+    "default_probability",
+    "aggregate_financial_risk",
+    "disruption_predictive_score",
+)
+
+KPI_MEASURES = {
+    "contracts": "1",
+    **{column: f"COALESCE(c.{column}, 0)" for column in KPI_SUM_COLUMNS},
+    "active_contracts": "c.status IN ('Assinado', 'Protocolado', 'Em vigor')",
+    "finalized_contracts": "c.status = 'Finalizado'",
+    "term_days": f"COALESCE({days_between_sql('c.end_date', 'c.start_date')}, 0)",
+    "term_count": f"{days_between_sql('c.end_date', 'c.start_date')} IS NOT NULL",
+    "lead_days": f"COALESCE({days_between_sql('c.signed_date', 'c.created_at')}, 0)",
+    "lead_count": f"{days_between_sql('c.signed_date', 'c.created_at')} IS NOT NULL",
+    "archive_days": f"COALESCE({days_between_sql('c.archived_date', 'c.created_at')}, 0)",
+    "archive_count": f"{days_between_sql('c.archived_date', 'c.created_at')} IS NOT NULL",
+    "additives": "(SELECT COUNT(*) FROM contract_additives a WHERE a.contract_id = c.id)",
+    "additive_value": "(SELECT TOTAL(a.additive_value) FROM contract_additives a WHERE a.contract_id = c.id)",
+    "additive_contracts": "EXISTS (SELECT 1 FROM contract_additives a WHERE a.contract_id = c.id)",
+    "compliance_checks": "cc.id IS NOT NULL",
+    "mandatory_clauses_score": "COALESCE(cc.mandatory_clauses_score, 0)",
+    "out_of_standard": "COALESCE(cc.out_of_standard, 0)",
+    "guarantee_missing": "cc.id IS NOT NULL AND COALESCE(cc.has_guarantee, 0) = 0",
+    "risk_score": "COALESCE(cc.risk_score, 0)",
+    "regulatory_compliance_pct": "COALESCE(cc.regulatory_compliance_pct, 0)",
+    "audited": "COALESCE(cc.audited, 0)",
+    "nonconformities_count": "COALESCE(cc.nonconformities_count, 0)",
+    "supplier_rows": "sp.id IS NOT NULL",
+    "sla_pct": "COALESCE(sp.sla_pct, 0)",
+    "delivery_fail_rate": "COALESCE(sp.delivery_fail_rate, 0)",
+    "on_time_pct": "COALESCE(sp.on_time_pct, 0)",
+    "quality_score": "COALESCE(sp.quality_score, 0)",
+    "supplier_switch_rate": "COALESCE(sp.supplier_switch_rate, 0)",
+    "satisfaction_score": "COALESCE(sp.satisfaction_score, 0)",
+    "edits": (
+        "COALESCE((SELECT r.event_count FROM contract_event_rollups r "
+        "WHERE r.contract_id = c.id AND r.event_type = 'edit'), 0)"
+    ),
+}
+
+KPI_MEASURES_SELECT = f"""
+    SELECT c.id AS contract_id, {', '.join(f'c.{d}' for d in KPI_DIMENSIONS)},
+           {', '.join(f'{expr} AS {name}' for name, expr in KPI_MEASURES.items())}
+    FROM contracts c
+    LEFT JOIN compliance_checks cc ON cc.contract_id = c.id
+    LEFT JOIN supplier_performance sp ON sp.contract_id = c.id
+"""
+
+KPI_GROUP_COLUMNS = ", ".join((*KPI_DIMENSIONS, *KPI_MEASURES))
+
+
+def _kpi_group_upsert(contract_id: str, sign: str) -> str:
+    measures = ", ".join(f"{sign}{name}" for name in KPI_MEASURES)
+    updates = ", ".join(f"{name} = {name} + excluded.{name}" for name in KPI_MEASURES)
+    return f"""
+      INSERT INTO kpi_contract_groups ({KPI_GROUP_COLUMNS})
+      SELECT {', '.join(KPI_DIMENSIONS)}, {measures} FROM kpi_contract_measures WHERE contract_id = {contract_id}
+      ON CONFLICT({', '.join(KPI_DIMENSIONS)}) DO UPDATE SET {updates};"""
+
+
+# Recalcula a contribuição de um contrato: retira a linha antiga do grupo, regrava a linha
+# em kpi_contract_measures a partir das tabelas de origem e soma a nova ao grupo (talvez outro).
+def _kpi_refresh(contract_id: str) -> str:
+    return (
+        _kpi_group_upsert(contract_id, "-")
+        + f"\n      DELETE FROM kpi_contract_measures WHERE contract_id = {contract_id};"
+        + f"\n      INSERT INTO kpi_contract_measures SELECT * FROM kpi_contract_measures_source WHERE contract_id = {contract_id};"
+        + _kpi_group_upsert(contract_id, "")
+    )
+
+
+def _kpi_trigger(name: str, event: str, table: str, contract_ids: tuple[str, ...], when: str = "") -> str:
+    body = "".join(_kpi_refresh(contract_id) for contract_id in contract_ids)
+    return f"""
+    CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON {table}{when} BEGIN{body}
+    END
+    """
+
+
+KPI_MEASURES_BUILD_SQL = "INSERT INTO kpi_contract_measures SELECT * FROM kpi_contract_measures_source"
+
+KPI_GROUPS_BUILD_SQL = f"""
+    INSERT INTO kpi_contract_groups ({KPI_GROUP_COLUMNS})
+    SELECT {', '.join(KPI_DIMENSIONS)}, {', '.join(f'TOTAL({name})' for name in KPI_MEASURES)}
+    FROM kpi_contract_measures
+    GROUP BY {', '.join(KPI_DIMENSIONS)}
+"""
+
+KPI_CONTRACT_UPDATE_COLUMNS = (
+    *KPI_DIMENSIONS, *KPI_SUM_COLUMNS, "start_date", "end_date", "signed_date", "archived_date", "created_at",
+)
+
+KPI_MEASURES_VIEW_DDL = f"""
+    CREATE VIEW IF NOT EXISTS kpi_contract_measures_source AS {KPI_MEASURES_SELECT}
+    """
+
+KPI_TRIGGERS_DDL = (
+    _kpi_trigger("trg_kpi_contracts_insert", "INSERT", "contracts", ("NEW.id",)),
+    _kpi_trigger(
+        "trg_kpi_contracts_update",
+        f"UPDATE OF {', '.join(KPI_CONTRACT_UPDATE_COLUMNS)}",
+        "contracts",
+        ("NEW.id",),
+    ),
+    _kpi_trigger("trg_kpi_contracts_delete", "DELETE", "contracts", ("OLD.id",)),
+    *(
+        _kpi_trigger(f"trg_kpi_{table}_{event.lower()}", event, table, (f"{row}.contract_id",))
+        for table in ("contract_additives", "compliance_checks", "supplier_performance")
+        for event, row in (("INSERT", "NEW"), ("DELETE", "OLD"))
+    ),
+    *(
+        _kpi_trigger(
+            f"trg_kpi_{table}_update",
+            "UPDATE",
+            table,
+            ("NEW.contract_id",),
+            when=" WHEN OLD.contract_id = NEW.contract_id",
+        )
+        for table in ("contract_additives", "compliance_checks", "supplier_performance")
+    ),
+    *(
+        _kpi_trigger(
+            f"trg_kpi_{table}_move",
+            "UPDATE",
+            table,
+            ("OLD.contract_id", "NEW.contract_id"),
+            when=" WHEN OLD.contract_id <> NEW.contract_id",
+        )
+        for table in ("contract_additives", "compliance_checks", "supplier_performance")
+    ),
+    *(
+        _kpi_trigger(
+            f"trg_kpi_event_rollups_{event.lower()}",
+            event,
+            "contract_event_rollups",
+            ("NEW.contract_id",),
+            when=" WHEN NEW.event_type = 'edit'",
+        )
+        for event in ("INSERT", "UPDATE")
+    ),
+)
+KPI_TRIGGER_NAMES = tuple(re.search(r"CREATE TRIGGER IF NOT EXISTS (\w+)", ddl).group(1) for ddl in KPI_TRIGGERS_DDL)
+
+KPI_AGGREGATES_DDL = (
+    KPI_MEASURES_VIEW_DDL,
+    """
+    CREATE TABLE IF NOT EXISTS kpi_contract_measures AS SELECT * FROM kpi_contract_measures_source WHERE 0
+    """,
+    """
+    CREATE UNIQUE INDEX IF NOT EXISTS ux_kpi_contract_measures ON kpi_contract_measures(contract_id)
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS kpi_contract_groups (
+      {', '.join(f'{d} TEXT NOT NULL' for d in KPI_DIMENSIONS)},
+      {', '.join(f'{name} REAL NOT NULL DEFAULT 0' for name in KPI_MEASURES)},
+      PRIMARY KEY ({', '.join(KPI_DIMENSIONS)})
+    ) WITHOUT ROWID
+    """,
+    KPI_MEASURES_BUILD_SQL,
+    KPI_GROUPS_BUILD_SQL,
+    *KPI_TRIGGERS_DDL,
+)
+
+
+DATA_GENERATION_DDL = (
+    """
+    CREATE TABLE IF NOT EXISTS data_generation (
+      id INTEGER PRIMARY KEY CHECK (id = 1),
+      generation INTEGER NOT NULL
+    )
+    """,
+    "INSERT OR IGNORE INTO data_generation (id, generation) VALUES (1, 0)",
+)
+
+
+# Índices usados pela exportação incremental do snapshot analítico (services/analytics_snapshot.py).
+ANALYTICS_WATERMARK_INDEXES_DDL = (
+    """
+    CREATE INDEX IF NOT EXISTS idx_contracts_updated_at ON contracts(updated_at)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_compliance_updated_at ON compliance_checks(updated_at)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_supplier_perf_updated_at ON supplier_performance(updated_at)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_event_rollups_last_at ON contract_event_rollups(last_at)
+    """,
+)
+
+
+# Histórico diário dos KPIs: uma linha por escopo (carteira inteira = '' ou departamento), indicador e dia,
+# em ordem de leitura das séries; kpi_history_days registra como cada dia foi gravado.
+KPI_HISTORY_DDL = (
+    """
+    CREATE TABLE IF NOT EXISTS kpi_history (
+      department TEXT NOT NULL,
+      section TEXT NOT NULL,
+      metric TEXT NOT NULL,
+      snapshot_date TEXT NOT NULL,
+      value REAL NOT NULL,
+      PRIMARY KEY (department, section, metric, snapshot_date)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_kpi_history_date ON kpi_history(snapshot_date)
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS kpi_history_days (
+      snapshot_date TEXT PRIMARY KEY,
+      mode TEXT NOT NULL,
+      recorded_at TEXT NOT NULL
+    ) WITHOUT ROWID
+    """,
+)
+
+
+# Contador por contrato incrementado em toda escrita na linha; valida o cache de contratos
+# (version é a versão do documento e updated_at tem resolução de segundos).
+CONTRACT_REVISION_DDL = (
+    """
+    ALTER TABLE contracts ADD COLUMN revision INTEGER NOT NULL DEFAULT 0
+    """,
+)
+
+
+# Partes passam a ser únicas por (doc, nome): a chave só pelo documento juntava fornecedores
+# distintos que compartilham o CNPJ. Os vínculos são refeitos a partir do JSON dos contratos.
+PARTIES_BY_DOC_NAME_DDL = (
+    """
+    DROP TABLE IF EXISTS contract_parties
+    """,
+    """
+    DROP TABLE IF EXISTS parties
+    """,
+    """
+    CREATE TABLE parties (
+      id INTEGER PRIMARY KEY AUTOINCREMENT,
+      doc TEXT NOT NULL,
+      name TEXT NOT NULL,
+      email TEXT,
+      created_at TEXT NOT NULL,
+      updated_at TEXT NOT NULL,
+      UNIQUE (doc, name)
+    )
+    """,
+    PARTIES_DDL[1],
+    PARTIES_DDL[2],
+    PARTIES_DDL[3],
+)
+
+
+# Recria a view e os gatilhos dos agregados de KPI sem unixepoch() (SQLite 3.38+).
+KPI_PORTABLE_DATES_DDL = (
+    "DROP VIEW IF EXISTS kpi_contract_measures_source",
+    *(f"DROP TRIGGER IF EXISTS {name}" for name in KPI_TRIGGER_NAMES),
+    KPI_MEASURES_VIEW_DDL,
+    *KPI_TRIGGERS_DDL,
+)
+
+
+MIGRATIONS = [
+    Migration(1, "baseline", BASELINE_DDL),
+    Migration(2, "parties", PARTIES_DDL, backfill=_backfill_parties),
+    Migration(3, "contracts_fts", CONTRACTS_FTS_DDL),
+    Migration(4, "hot_path_indexes", HOT_PATH_INDEXES_DDL),
+    Migration(5, "unique_contract_metrics", UNIQUE_CONTRACT_METRICS_DDL),
+    Migration(6, "contract_sequences", CONTRACT_SEQUENCES_DDL),
+    Migration(7, "import_checkpoints", IMPORT_CHECKPOINTS_DDL),
+    Migration(8, "event_payload_binary", EVENT_PAYLOAD_BINARY_DDL),
+    Migration(9, "event_rollups_archive", EVENT_ROLLUPS_ARCHIVE_DDL),
+    Migration(10, "kpi_aggregates", KPI_AGGREGATES_DDL),
+    Migration(11, "data_generation", DATA_GENERATION_DDL),
+    Migration(12, "analytics_watermarks", ANALYTICS_WATERMARK_INDEXES_DDL),
+    Migration(13, "kpi_history", KPI_HISTORY_DDL),
+    Migration(14, "contract_revision", CONTRACT_REVISION_DDL),
+    Migration(15, "parties_by_doc_name", PARTIES_BY_DOC_NAME_DDL, backfill=_backfill_parties),
+    Migration(16, "kpi_portable_dates", KPI_PORTABLE_DATES_DDL),
+]
+
+_lock = threading.Lock()
+_migrated_paths: set[str] = set()
+
+
+def latest_version() -> int:
+    return MIGRATIONS[-1].version
+
+
+def schema_state(conn: sqlite3.Connection) -> tuple[int, int]:
+    try:
+        row = conn.execute(
+            "SELECT MAX(version) AS version, SUM(completed_at IS NULL) AS pending FROM schema_version"
+        ).fetchone()
+    except sqlite3.OperationalError:
+        return 0, 0
+    return row["version"] or 0, row["pending"] or 0
+
+
+def _apply_statements(conn: sqlite3.Connection, migration: Migration) -> bool:
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute(SCHEMA_VERSION_DDL)
+        exists = conn.execute(
+            "SELECT 1 FROM schema_version WHERE version = ?", (migration.version,)
+        ).fetchone()
+        if exists:
+            conn.rollback()
+            return False
+        for ddl in migration.statements:
             conn.execute(ddl)
-    conn.close()
+        now = now_iso()
+        conn.execute(
+            "INSERT INTO schema_version (version, name, applied_at, completed_at) VALUES (?, ?, ?, ?)",
+            (migration.version, migration.name, now, None if migration.backfill else now),
+        )
+    except Exception:
+        conn.rollback()
+        raise
+    conn.commit()
+    return True
+
+
+def _pending_backfills(conn: sqlite3.Connection) -> set[int]:
+    rows = conn.execute("SELECT version FROM schema_version WHERE completed_at IS NULL").fetchall()
+    return {r["version"] for r in rows}
+
+
+def migrate(conn: sqlite3.Connection | None = None) -> list[int]:
+    if conn is None:
+        with connection() as conn:
+            return migrate(conn)
+    current, _pending = schema_state(conn)
+    applied = []
+    for migration in MIGRATIONS:
+        if migration.version > current and _apply_statements(conn, migration):
+            applied.append(migration.version)
+
+    for version in sorted(_pending_backfills(conn)):
+        migration = next(m for m in MIGRATIONS if m.version == version)
+        if migration.backfill:
+            migration.backfill(conn)
+        with conn:
+            conn.execute(
+                "UPDATE schema_version SET completed_at = ? WHERE version = ?",
+                (now_iso(), version),
+            )
+    return applied
+
+
+def check_sqlite_version() -> None:
+    if sqlite3.sqlite_version_info < MIN_SQLITE_VERSION:
+        required = ".".join(str(part) for part in MIN_SQLITE_VERSION)
+        raise RuntimeError(f"SQLite {sqlite3.sqlite_version} não suportado: é necessária a versão {required} ou superior")
+
+
+def run_migrations() -> None:
+    check_sqlite_version()
+    db_path = str(get_manager().path)
+    if db_path in _migrated_paths:
+        return
+    with _lock:
+        if db_path in _migrated_paths:
+            return
+        with connection() as conn:
+            current, pending = schema_state(conn)
+            if current < latest_version() or pending:
+                migrate(conn)
+        _migrated_paths.add(db_path)
+    start_payload_reencode()
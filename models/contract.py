@@ -1,15 +1,70 @@
+from collections.abc import Mapping
 from dataclasses import dataclass
+from functools import lru_cache
 
+from utils.helpers import loads
 
-@dataclass
+
+@dataclass(slots=True)
 class ContractSummary:
     id: int
-    contract_number: str
-    type: str
-    title: str
-    department: str
-    status: str
-    contract_value: float
-    start_date: str
-    end_date: str
-    contracted_name: str
+    contract_number: str = ""
+    type: str = ""
+    title: str = ""
+    department: str = ""
+    status: str = ""
+    contract_value: float = 0.0
+    start_date: str = ""
+    end_date: str = ""
+    contracted_name: str = "N/A"
+    version: int = 1
+    created_at: str = ""
+
+
+JSON_FIELDS = {
+    "contractor": ("contractor_json", dict),
+    "contracted": ("contracted_json", dict),
+    "sla_targets": ("sla_targets_json", dict),
+    "mandatory_clauses": ("mandatory_clauses_json", list),
+    "milestones": ("milestones_json", list),
+    "signatures": ("signatures_json", dict),
+    "tags": ("tags", list),
+}
+RAW_JSON_COLUMNS = {column: name for name, (column, _default) in JSON_FIELDS.items()}
+
+
+@lru_cache(maxsize=32)
+def contract_index(columns: tuple[str, ...]) -> dict[str, int]:
+    return {RAW_JSON_COLUMNS.get(column, column): i for i, column in enumerate(columns)}
+
+
+class Contract(Mapping):
+    __slots__ = ("_values", "_index", "_decoded")
+
+    def __init__(self, values: tuple, index: dict[str, int]):
+        self._values = values
+        self._index = index
+        self._decoded = None
+
+    def __getitem__(self, key):
+        if key in JSON_FIELDS:
+            decoded = self._decoded
+            if decoded is None:
+                decoded = self._decoded = {}
+            elif key in decoded:
+                return decoded[key]
+            value = decoded[key] = loads(self._values[self._index[key]], JSON_FIELDS[key][1]())
+            return value
+        return self._values[self._index[key]]
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def __repr__(self):
+        return f"Contract({dict(self)!r})"
@@ -0,0 +1,26 @@
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from db.migrations import run_migrations
+from services.contract_service import ARCHIVE_BATCH_SIZE, EVENT_RETENTION_DAYS, archive_events
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Move eventos de auditoria antigos para contract_events_archive.")
+    parser.add_argument("--days", type=int, default=EVENT_RETENTION_DAYS, help="Mantém na tabela principal os eventos mais novos que N dias")
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE, help="Eventos movidos por transação")
+    args = parser.parse_args()
+
+    run_migrations()
+    moved = archive_events(retention_days=args.days, batch_size=args.batch_size)
+    print(f"Eventos arquivados: {moved}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
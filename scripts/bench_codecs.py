@@ -0,0 +1,83 @@
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from utils import codec
+
+import bench_data
+
+CONTRACT_FIELDS = ("contractor", "contracted", "sla_targets", "mandatory_clauses", "milestones", "signatures", "tags")
+
+
+def _event_payloads(rng: random.Random, total: int) -> list:
+    samples = [
+        lambda: {"status": "Gerado"},
+        lambda: {"from": "Assinado", "to": "Protocolado", "user": "ui", "admin_override": False},
+        lambda: {"changes": {"title": "Contrato revisado", "contract_value": rng.uniform(1e4, 1e6)}, "new_version": rng.randint(2, 9)},
+        lambda: {"changes": {"executed_value": rng.uniform(1e4, 1e6), "savings_value": rng.uniform(0, 1e5), "roi_value": 12.5}},
+        lambda: {"date": "2026-03-01", "value": rng.uniform(1e3, 1e5), "reason": "Reajuste contratual"},
+        lambda: {"text": "Atraso na entrega do lote 3; fornecedor notificado."},
+    ]
+    return [rng.choice(samples)() for _ in range(total)]
+
+
+def _contract_payloads(rng: random.Random, total: int) -> list:
+    values = []
+    for i in range(total):
+        payload = bench_data._payload(rng, i)
+        values.extend(payload[field] for field in CONTRACT_FIELDS)
+    return values
+
+
+def _time(fn, items) -> float:
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    return (time.perf_counter() - start) / len(items) * 1e6
+
+
+def run(name: str, items: list) -> None:
+    print(f"\n{name} ({len(items)} valores)")
+    print(f"{'codec':<18}{'encode (µs)':>13}{'decode (µs)':>13}{'bytes médios':>14}")
+
+    stdlib_text = [json.dumps(item, ensure_ascii=False) for item in items]
+    print(
+        f"{'json (stdlib)':<18}{_time(lambda x: json.dumps(x, ensure_ascii=False), items):>13.2f}"
+        f"{_time(json.loads, stdlib_text):>13.2f}{sum(len(t.encode()) for t in stdlib_text) / len(items):>14.1f}"
+    )
+
+    if codec.orjson is not None:
+        orjson_text = [codec.orjson.dumps(item) for item in items]
+        print(
+            f"{'orjson':<18}{_time(codec.orjson.dumps, items):>13.2f}"
+            f"{_time(codec.orjson.loads, orjson_text):>13.2f}{sum(map(len, orjson_text)) / len(items):>14.1f}"
+        )
+
+    blobs = [codec.encode_binary(item) for item in items]
+    print(
+        f"{'binário (zjson)':<18}{_time(codec.encode_binary, items):>13.2f}"
+        f"{_time(codec.decode_binary, blobs):>13.2f}{sum(map(len, blobs)) / len(items):>14.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara os codecs de serialização nos payloads de contratos e eventos.")
+    parser.add_argument("--contracts", type=int, default=2000)
+    parser.add_argument("--events", type=int, default=20000)
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    print(f"Backend JSON ativo: {codec.JSON_BACKEND}")
+    run("Colunas *_json de contratos", _contract_payloads(rng, args.contracts))
+    run("Payloads de eventos (event_data)", _event_payloads(rng, args.events))
+
+
+if __name__ == "__main__":
+    main()
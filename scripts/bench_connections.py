@@ -0,0 +1,96 @@
+import argparse
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from db import connection
+from db.migrations import run_migrations
+from services import (
+    add_event,
+    create_contract,
+    get_contract_by_id,
+    get_contract_events,
+    list_contracts,
+    next_contract_number,
+    update_status,
+    upsert_compliance,
+)
+from services.ai_agent import answer_question
+from services.kpi_service import calculate_kpis
+
+
+def _payload(i: int) -> dict:
+    return {
+        "contract_number": f"BENCH-{i:06d}",
+        "type": "Prestação de Serviço",
+        "title": f"Contrato de benchmark {i}",
+        "department": ["Operações", "TI", "Logística"][i % 3],
+        "contractor": {"name": "LogiChain Holding", "doc": "00.000.000/0001-10", "email": "a@b.com"},
+        "contracted": {"name": f"Fornecedor {i % 7}", "doc": f"11.111.111/0001-{i % 90 + 10}", "email": "c@d.com"},
+        "clauses_text": "Cláusulas de vigência, pagamento e penalidades.",
+        "start_date": date.today(),
+        "end_date": date.today() + timedelta(days=30 + i % 300),
+        "contract_value": 1000.0 * (i + 1),
+    }
+
+
+def _workload(contracts: int) -> dict:
+    timings = {}
+
+    def timed(name, fn):
+        start = time.perf_counter()
+        fn()
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+
+    ids = []
+    for i in range(contracts):
+        timed("next_contract_number", next_contract_number)
+        timed("create_contract", lambda i=i: ids.append(create_contract(_payload(i))))
+    for cid in ids:
+        timed("get_contract_by_id", lambda cid=cid: get_contract_by_id(cid))
+        timed("update_status", lambda cid=cid: update_status(cid, "Assinado", user="bench"))
+        timed("add_event", lambda cid=cid: add_event(cid, "ocorrencia", {"text": "bench"}))
+        timed("get_contract_events", lambda cid=cid: get_contract_events(cid))
+        timed("upsert_compliance", lambda cid=cid: upsert_compliance(cid, {"risk_score": cid % 100}))
+    timed("list_contracts", lambda: list_contracts({"department": "TI"}))
+    timed("calculate_kpis", calculate_kpis)
+    timed("answer_question", lambda: answer_question("Liste contratos em vigor com risco alto."))
+    return timings
+
+
+def run(mode: str, contracts: int) -> tuple[float, dict, dict]:
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = connection.configure(Path(tmp) / "bench.db", pooled=(mode == "pooled"))
+        run_migrations()
+        start = time.perf_counter()
+        timings = _workload(contracts)
+        total = time.perf_counter() - start
+        stats = manager.stats()
+        manager.close_all()
+    return total, timings, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara conexão por chamada com o pool de conexões.")
+    parser.add_argument("--contracts", type=int, default=300)
+    args = parser.parse_args()
+
+    results = {mode: run(mode, args.contracts) for mode in ("per-call", "pooled")}
+
+    print(f"{'operação':<24}{'por chamada (ms)':>18}{'pool (ms)':>14}")
+    for name in results["per-call"][1]:
+        legacy = results["per-call"][1][name] * 1000
+        pooled = results["pooled"][1][name] * 1000
+        print(f"{name:<24}{legacy:>18.1f}{pooled:>14.1f}")
+    for mode, (total, _timings, stats) in results.items():
+        print(f"{mode:<10} total={total:.2f}s conexões abertas={stats['opened_total']}")
+
+
+if __name__ == "__main__":
+    main()
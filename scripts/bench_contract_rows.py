@@ -0,0 +1,83 @@
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from db import connection
+from db.connection import get_connection
+from db.migrations import run_migrations
+from services.contract_service import _fetch_contracts
+from utils.helpers import loads
+
+import bench_data
+
+
+# Decodificação anterior: todos os campos JSON em todas as linhas.
+def eager_row_to_contract(row):
+    data = dict(row)
+    data["contractor"] = loads(data.pop("contractor_json"), {})
+    data["contracted"] = loads(data.pop("contracted_json"), {})
+    data["sla_targets"] = loads(data.pop("sla_targets_json"), {})
+    data["mandatory_clauses"] = loads(data.pop("mandatory_clauses_json"), [])
+    data["milestones"] = loads(data.pop("milestones_json"), [])
+    data["signatures"] = loads(data.pop("signatures_json"), {})
+    data["tags"] = loads(data.get("tags"), [])
+    return data
+
+
+ACCESS_PATTERNS = {
+    "sem campo JSON": lambda contracts: [(c["contract_number"], c["status"], c["end_date"]) for c in contracts],
+    "um campo JSON": lambda contracts: [c.get("contracted", {}).get("name", "N/A") for c in contracts],
+    "DataFrame": lambda contracts: pd.DataFrame(contracts),
+}
+
+
+def load_eager():
+    rows = get_connection().execute("SELECT * FROM contracts").fetchall()
+    return [eager_row_to_contract(r) for r in rows]
+
+
+def load_lazy():
+    return _fetch_contracts("SELECT * FROM contracts")
+
+
+def measure(load, access) -> tuple[float, float]:
+    start = time.perf_counter()
+    access(load())
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    access(load())
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed * 1000, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Decodificação JSON antecipada x sob demanda (Contract).")
+    parser.add_argument("--rows", type=int, default=10_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = connection.configure(Path(tmp) / "rows.db")
+        run_migrations()
+        bench_data.populate(args.rows)
+        print(f"{args.rows} linhas")
+        print(f"{'acesso':<18}{'antes (ms)':>12}{'agora (ms)':>12}{'antes (MiB)':>13}{'agora (MiB)':>13}")
+        for name, access in ACCESS_PATTERNS.items():
+            eager_ms, eager_mib = measure(load_eager, access)
+            lazy_ms, lazy_mib = measure(load_lazy, access)
+            print(f"{name:<18}{eager_ms:>12.1f}{lazy_ms:>12.1f}{eager_mib:>13.1f}{lazy_mib:>13.1f}")
+        manager.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from db import connection
+from db.connection import get_connection, transaction
+from db.migrations import run_migrations
+from services import list_contracts, upsert_compliance_bulk, upsert_supplier_performance_bulk
+from services import analytics_snapshot
+from services.kpi_service import calculate_kpis, clear_kpi_cache, load_chart_data, load_portfolio_snapshot
+
+import bench_data
+from check_kpi_golden import load_base_frames, reference_kpis
+
+READ_PREFIXES = ("SELECT", "WITH")
+
+
+def _derive(df: pd.DataFrame) -> None:
+    for column in ("created_at", "start_date", "end_date", "signed_date", "archived_date"):
+        df[column] = pd.to_datetime(df.get(column), errors="coerce")
+    df["vigencia_dias"] = (df["end_date"] - df["start_date"]).dt.days
+    df["lead_time_dias"] = (df["signed_date"] - df["created_at"]).dt.days
+    df["archive_time_dias"] = (df["archived_date"] - df["created_at"]).dt.days
+    df["dias_para_vencer"] = (df["end_date"] - pd.Timestamp.today().normalize()).dt.days
+
+
+# Primeira versão do Dashboard: contratos completos, depois load_base_data() descartando os contratos
+# e calculate_kpis() recarregando as cinco tabelas em pandas.
+def original_render(filters: dict) -> None:
+    df = pd.DataFrame(list_contracts(filters=filters, include_finalized=True))
+    _derive(df)
+    _contracts, _additives, _compliance, _supplier, _events = load_base_frames()
+    reference_kpis(contract_ids=df["id"].tolist())
+
+
+# Versão anterior ao snapshot: contratos completos (SELECT * + JSON) e KPIs em SQL.
+def previous_render(filters: dict) -> None:
+    df = pd.DataFrame(list_contracts(filters=filters, include_finalized=True))
+    _derive(df)
+    load_chart_data(df["id"].tolist())
+    if filters.get("contracted") or filters.get("date_from") or filters.get("date_to"):
+        calculate_kpis(contract_ids=df["id"].tolist())
+    else:
+        calculate_kpis(group={k: filters[k] for k in ("type", "department") if filters.get(k)})
+
+
+def snapshot_render(filters: dict) -> None:
+    snapshot = load_portfolio_snapshot(filters, source="sqlite")
+    calculate_kpis(snapshot=snapshot)
+
+
+def columnar_render(filters: dict) -> None:
+    snapshot = load_portfolio_snapshot(filters, source="columnar")
+    calculate_kpis(snapshot=snapshot)
+
+
+STRATEGIES = {
+    "original": original_render,
+    "anterior": previous_render,
+    "snapshot": snapshot_render,
+    "colunar": columnar_render,
+}
+
+
+def _value_size(value) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    if isinstance(value, bytes):
+        return len(value)
+    return 8
+
+
+def bytes_read(statements: list[str]) -> int:
+    conn = get_connection()
+    total = 0
+    for sql in statements:
+        if sql.lstrip().upper().startswith(READ_PREFIXES):
+            for row in conn.execute(sql):
+                total += sum(_value_size(v) for v in row)
+    return total
+
+
+def measure(render, filters: dict, repeat: int) -> tuple[float, int]:
+    timings = []
+    for _ in range(repeat):
+        clear_kpi_cache()
+        start = time.perf_counter()
+        render(filters)
+        timings.append(time.perf_counter() - start)
+
+    clear_kpi_cache()
+    statements = []
+    conn = get_connection()
+    conn.set_trace_callback(statements.append)
+    try:
+        render(filters)
+    finally:
+        conn.set_trace_callback(None)
+    return statistics.median(timings) * 1000, bytes_read(statements)
+
+
+def _activity(total: int) -> None:
+    rng = random.Random(11)
+    ids = [r[0] for r in get_connection().execute("SELECT id FROM contracts").fetchall()]
+    sample = rng.sample(ids, k=min(len(ids), total // 2))
+    upsert_compliance_bulk((cid, {"risk_score": rng.uniform(0, 100), "audited": rng.random() < 0.5}) for cid in sample)
+    upsert_supplier_performance_bulk(
+        (cid, {"sla_pct": rng.uniform(70, 100), "on_time_pct": rng.uniform(60, 100)}) for cid in sample
+    )
+
+
+def _timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+# Envelhece a carteira recém-gerada para que a janela de sobreposição das marcas d'água não releia tudo.
+def _age_portfolio(days: int) -> None:
+    with transaction() as conn:
+        for table, column in (
+            ("contracts", "updated_at"),
+            ("compliance_checks", "updated_at"),
+            ("supplier_performance", "updated_at"),
+            ("contract_event_rollups", "last_at"),
+        ):
+            conn.execute(f"UPDATE {table} SET {column} = datetime({column}, '-{days} days')")
+
+
+def _touch_contracts(total: int) -> None:
+    ids = [r[0] for r in get_connection().execute("SELECT id FROM contracts ORDER BY id LIMIT ?", (total,)).fetchall()]
+    upsert_compliance_bulk((cid, {"risk_score": 50}) for cid in ids)
+
+
+# Uma escrita invalida o snapshot Parquet; a renderização seguinte lê os arquivos mais o delta do SQLite e
+# a exportação roda em segundo plano (aguardada fora da medição).
+def first_render_after_write(render, filters: dict, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        _touch_contracts(1)
+        clear_kpi_cache()
+        timings.append(_timed(lambda: render(filters)))
+        analytics_snapshot.start_snapshot_refresh(delay=0).join()
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Leituras e tempo por renderização de dados do Dashboard.")
+    parser.add_argument("--contracts", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    today = date.today()
+    scenarios = {
+        "sem filtros": {},
+        "departamento": {"department": "TI"},
+        "período 90 dias": {"date_from": str(today - timedelta(days=90)), "date_to": str(today)},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = connection.configure(Path(tmp) / "dashboard.db")
+        run_migrations()
+        bench_data.populate(args.contracts)
+        _activity(args.contracts)
+        _age_portfolio(1)
+        analytics_snapshot.ANALYTICS_DIR = Path(tmp) / "analytics"
+        full_ms = _timed(lambda: analytics_snapshot.export_analytics_snapshot(full=True))
+        _touch_contracts(100)
+        incremental_ms = _timed(analytics_snapshot.export_analytics_snapshot)
+        print(f"exportação Parquet: completa {full_ms:.0f} ms, incremental após 100 alterações {incremental_ms:.0f} ms")
+        print(f"{args.contracts} contratos; mediana de {args.repeat} renderizações, sem cache de KPIs")
+        print("KiB lidos conta só o SQLite; a estratégia colunar lê os arquivos Parquet")
+        print(f"{'recorte':<18}{'estratégia':<12}{'ms':>10}{'KiB lidos':>12}")
+        for name, filters in scenarios.items():
+            for strategy, render in STRATEGIES.items():
+                ms, size = measure(render, filters, args.repeat)
+                print(f"{name:<18}{strategy:<12}{ms:>10.1f}{size / 1024:>12.0f}")
+        print("primeira renderização após uma escrita (ms)")
+        for name, filters in scenarios.items():
+            for strategy in ("snapshot", "colunar"):
+                ms = first_render_after_write(STRATEGIES[strategy], filters, args.repeat)
+                print(f"{name:<18}{strategy:<12}{ms:>10.1f}")
+        manager.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import random
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from db.connection import transaction
+from services.contract_service import CONTRACT_INSERT_SQL, EVENT_INSERT_SQL, _contract_params, _event_params
+from services.party_service import link_contract_parties
+
+TYPES = ["Prestação de Serviço", "Fornecimento de Materiais", "Alocação"]
+DEPARTMENTS = ["Operações", "Suprimentos", "TI", "Jurídico", "Financeiro", "Logística"]
+STATUSES = ["Gerado", "Assinado", "Protocolado", "Em vigor", "Finalizado"]
+SUPPLIERS = [f"Fornecedor {i:03d}" for i in range(200)]
+
+
+def _payload(rng: random.Random, i: int) -> dict:
+    start = date.today() - timedelta(days=rng.randint(0, 900))
+    value = round(rng.uniform(30000, 1500000), 2)
+    supplier = rng.randrange(len(SUPPLIERS))
+    return {
+        "contract_number": f"BENCH-{i:07d}",
+        "type": rng.choice(TYPES),
+        "title": f"Contrato de benchmark {i}",
+        "department": rng.choice(DEPARTMENTS),
+        "status": rng.choices(STATUSES, weights=[10, 15, 18, 37, 20], k=1)[0],
+        "tags": ["benchmark", rng.choice(DEPARTMENTS).lower()],
+        "contractor": {"name": "LogiChain Holding", "doc": "00.000.000/0001-10", "email": "juridico@logichain.com"},
+        "contracted": {
+            "name": SUPPLIERS[supplier],
+            "doc": f"{supplier:08d}/0001-00",
+            "email": f"contato{supplier}@fornecedor.com",
+            "address": "Av. Paulista, 1000 - São Paulo/SP",
+        },
+        "scope_text": "Prestação de serviços logísticos com SLA mensal e relatórios de desempenho.",
+        "clauses_text": "Cláusulas de vigência, pagamento, reajuste, confidencialidade e penalidades.",
+        "sla_targets": {"sla_pct": 95, "on_time_target": 92},
+        "mandatory_clauses": ["LGPD", "Anticorrupção", "Confidencialidade"],
+        "milestones": [{"date": str(start + timedelta(days=30 * k)), "description": f"Marco {k}"} for k in range(3)],
+        "signatures": {"contractor_sign": "Diretoria", "contracted_sign": "Representante", "witnesses": ""},
+        "legal_notes": rng.choice(["Sem litígio", "Litígio em andamento", "Notificação extrajudicial"]),
+        "start_date": start,
+        "end_date": start + timedelta(days=rng.randint(45, 720)),
+        "contract_value": value,
+        "executed_value": round(value * rng.uniform(0.2, 1.1), 2),
+        "savings_value": round(value * rng.uniform(0, 0.15), 2),
+        "roi_value": round(rng.uniform(2, 48), 2),
+    }
+
+
+def populate(total: int, seed: int = 7, chunk_size: int = 5000) -> None:
+    rng = random.Random(seed)
+    for offset in range(0, total, chunk_size):
+        payloads = [_payload(rng, i) for i in range(offset, min(offset + chunk_size, total))]
+        with transaction() as conn:
+            now = str(date.today())
+            conn.executemany(CONTRACT_INSERT_SQL, [_contract_params(p, p["start_date"].isoformat()) for p in payloads])
+            first_id = conn.execute("SELECT MAX(id) FROM contracts").fetchone()[0] - len(payloads) + 1
+            conn.executemany(
+                EVENT_INSERT_SQL,
+                [_event_params(first_id + k, "created", {"status": p["status"]}, now) for k, p in enumerate(payloads)],
+            )
+            for k, p in enumerate(payloads):
+                link_contract_parties(conn, first_id + k, p["contractor"], p["contracted"])
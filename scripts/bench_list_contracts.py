@@ -0,0 +1,59 @@
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from db import connection
+from db.migrations import run_migrations
+from services import list_contracts, list_contracts_summary
+
+import bench_data
+
+SCENARIOS = {
+    "kanban": ({"order_by": "created_at DESC"}, False, None),
+    "tabela": ({"order_by": "contract_value DESC"}, True, None),
+    "seletor atividades": ({"order_by": "created_at DESC"}, True, ("contract_number", "title", "status")),
+}
+
+
+def measure(fn) -> tuple[float, float, int]:
+    start = time.perf_counter()
+    rows = fn()
+    elapsed = time.perf_counter() - start
+    del rows
+
+    tracemalloc.start()
+    rows = fn()
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed * 1000, peak / 1024 / 1024, len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="list_contracts (SELECT *) x list_contracts_summary (projeção).")
+    parser.add_argument("--contracts", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = connection.configure(Path(tmp) / "list.db")
+        run_migrations()
+        bench_data.populate(args.contracts)
+
+        print(f"{'cenário':<20}{'linhas':>8}{'completo (ms)':>15}{'resumo (ms)':>13}{'completo (MiB)':>16}{'resumo (MiB)':>14}")
+        for name, (filters, include_finalized, columns) in SCENARIOS.items():
+            full_ms, full_mib, total = measure(lambda: list_contracts(filters, include_finalized=include_finalized))
+            summary_ms, summary_mib, _ = measure(
+                lambda: list_contracts_summary(filters, include_finalized=include_finalized, columns=columns)
+            )
+            print(f"{name:<20}{total:>8}{full_ms:>15.0f}{summary_ms:>13.0f}{full_mib:>16.1f}{summary_mib:>14.1f}")
+        manager.close_all()
+
+
+if __name__ == "__main__":
+    main()
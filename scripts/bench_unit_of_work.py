@@ -0,0 +1,144 @@
+import argparse
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from db import connection
+from db.connection import get_connection, transaction
+from db.migrations import run_migrations
+from services import (
+    add_additive,
+    add_event,
+    create_contract,
+    edit_contract,
+    get_contract_by_id,
+    update_contract_activity,
+    update_status,
+)
+
+import seed_demo_data
+
+
+# Reproduz o padrão anterior: leitura, escrita e evento de auditoria em commits separados.
+def legacy_create_contract(i: int) -> None:
+    now = str(date.today())
+    with transaction() as conn:
+        cur = conn.execute(
+            "INSERT INTO contracts (contract_number, type, title, department, status, contractor_json, "
+            "contracted_json, start_date, end_date, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (f"LEGACY-{i:06d}", "Alocação", f"Legacy {i}", "TI", "Gerado", "{}", "{}", now, now, now, now),
+        )
+    add_event(cur.lastrowid, "created", {"status": "Gerado"}, sync=True)
+
+
+def legacy_update_status(contract_id: int, new_status: str) -> None:
+    contract = get_contract_by_id(contract_id)
+    with transaction() as conn:
+        conn.execute("UPDATE contracts SET status = ? WHERE id = ?", (new_status, contract_id))
+    add_event(contract_id, "status_change", {"from": contract["status"], "to": new_status}, sync=True)
+
+
+def legacy_edit_contract(contract_id: int, updates: dict) -> None:
+    contract = get_contract_by_id(contract_id)
+    with transaction() as conn:
+        conn.execute(
+            "UPDATE contracts SET title = ?, version = ? WHERE id = ?",
+            (updates["title"], contract["version"] + 1, contract_id),
+        )
+    add_event(contract_id, "edit", {"changes": updates}, sync=True)
+
+
+def legacy_update_contract_activity(contract_id: int, updates: dict) -> None:
+    get_contract_by_id(contract_id)
+    with transaction() as conn:
+        conn.execute("UPDATE contracts SET executed_value = ? WHERE id = ?", (updates["executed_value"], contract_id))
+    add_event(contract_id, "activity_update", {"changes": updates}, sync=True)
+
+
+def legacy_add_additive(contract_id: int, value: float) -> None:
+    with transaction() as conn:
+        conn.execute(
+            "INSERT INTO contract_additives (contract_id, additive_date, additive_value, reason, created_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (contract_id, str(date.today()), value, "bench", str(date.today())),
+        )
+    add_event(contract_id, "aditivo", {"value": value}, sync=True)
+
+
+def _new_payload(i: int) -> dict:
+    return {
+        "type": "Alocação",
+        "title": f"Benchmark UoW {i}",
+        "department": "TI",
+        "contractor": {"name": "LogiChain Holding", "doc": "00.000.000/0001-10"},
+        "contracted": {"name": "Fornecedor Bench", "doc": "11.111.111/0001-10"},
+        "start_date": date.today(),
+        "end_date": date.today(),
+        "contract_value": 1000.0,
+    }
+
+
+OPERATIONS = {
+    "create_contract": (
+        legacy_create_contract,
+        lambda i: create_contract(_new_payload(i)),
+    ),
+    "update_status": (
+        lambda i: legacy_update_status(i + 1, "Gerado"),
+        lambda i: update_status(i + 1, "Gerado", user="bench", admin_override=True),
+    ),
+    "edit_contract": (
+        lambda i: legacy_edit_contract(i + 1, {"title": f"Edit {i}"}),
+        lambda i: edit_contract(i + 1, {"title": f"Edit {i}"}),
+    ),
+    "update_contract_activity": (
+        lambda i: legacy_update_contract_activity(i + 1, {"executed_value": float(i)}),
+        lambda i: update_contract_activity(i + 1, {"executed_value": float(i)}),
+    ),
+    "add_additive": (
+        lambda i: legacy_add_additive(i + 1, float(i)),
+        lambda i: add_additive(i + 1, str(date.today()), float(i), "bench"),
+    ),
+}
+
+
+def measure(fn, iterations: int) -> tuple[float, float]:
+    commits = []
+    conn = get_connection()
+    conn.set_trace_callback(lambda sql: commits.append(sql) if sql == "COMMIT" else None)
+    start = time.perf_counter()
+    for i in range(iterations):
+        fn(i)
+    elapsed = time.perf_counter() - start
+    conn.set_trace_callback(None)
+    return len(commits) / iterations, elapsed / iterations * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Commits por operação: padrão anterior x unidade de trabalho.")
+    parser.add_argument("--iterations", type=int, default=60)
+    parser.add_argument("--synchronous", default="FULL", help="PRAGMA synchronous usado na medição")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = connection.configure(Path(tmp) / "uow.db")
+        run_migrations()
+        seed_demo_data.main()
+        get_connection().execute(f"PRAGMA synchronous = {args.synchronous}")
+
+        print(f"{'operação':<26}{'commits antes':>14}{'commits agora':>15}{'ms antes':>10}{'ms agora':>10}")
+        for name, (legacy, current) in OPERATIONS.items():
+            legacy_commits, legacy_ms = measure(legacy, args.iterations)
+            commits, ms = measure(current, args.iterations)
+            print(f"{name:<26}{legacy_commits:>14.1f}{commits:>15.1f}{legacy_ms:>10.2f}{ms:>10.2f}")
+        manager.close_all()
+
+
+if __name__ == "__main__":
+    main()
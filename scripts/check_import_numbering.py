@@ -0,0 +1,65 @@
+import json
+import random
+import sqlite3
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from db import connection
+from db.migrations import run_migrations
+from services import create_contract, next_contract_number
+from services.import_service import import_contracts
+
+import bench_data
+
+
+# Números explícitos importados precisam avançar a sequência do ano, senão o próximo cadastro colide com eles.
+def check_import_numbering(tmp: Path) -> list[str]:
+    rng = random.Random(3)
+    year = datetime.now().year
+    records = [bench_data._payload(rng, i) for i in range(3)]
+    for record, number in zip(records, (f"LC-{year}-001", f"LC-{year}-007", None)):
+        record["contract_number"] = number
+    path = tmp / "importacao.jsonl"
+    path.write_text("\n".join(json.dumps(r, default=str) for r in records), encoding="utf-8")
+
+    result = import_contracts(path)
+    failures = []
+    if result["imported"] != len(records):
+        failures.append(f"{result['imported']} de {len(records)} registros importados")
+    expected = f"LC-{year}-009"
+    if next_contract_number() != expected:
+        failures.append(f"próximo número {next_contract_number()!r} != {expected!r}")
+    payload = bench_data._payload(rng, 3)
+    payload.pop("contract_number")
+    try:
+        create_contract(payload)
+    except sqlite3.IntegrityError as exc:
+        failures.append(f"cadastro após importação falhou: {exc}")
+    else:
+        if payload["contract_number"] != expected:
+            failures.append(f"número gerado {payload['contract_number']!r} != {expected!r}")
+    return failures
+
+
+def main() -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = connection.configure(Path(tmp) / "import.db")
+        run_migrations()
+        failures = check_import_numbering(Path(tmp))
+        manager.close_all()
+
+    for failure in failures:
+        print(f"FALHA importação | {failure}")
+    if not failures:
+        print("importação: numeração explícita e sequência do ano consistentes")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,348 @@
+import math
+import random
+import shutil
+import sys
+import tempfile
+from datetime import date
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from db import connection
+from db.connection import get_connection
+from db.migrations import run_migrations
+from services import (
+    add_additive,
+    edit_contract,
+    upsert_compliance_bulk,
+    upsert_supplier_performance_bulk,
+)
+from services import kpi_service
+
+import bench_data
+import seed_demo_data
+
+REL_TOL = 1e-9
+
+
+# Implementação anterior em pandas, mantida como referência para a saída SQL de calculate_kpis.
+def load_base_frames():
+    conn = get_connection()
+    contracts = pd.read_sql_query("SELECT * FROM contracts", conn)
+    additives = pd.read_sql_query("SELECT * FROM contract_additives", conn)
+    compliance = pd.read_sql_query("SELECT * FROM compliance_checks", conn)
+    supplier = pd.read_sql_query("SELECT * FROM supplier_performance", conn)
+    events = pd.read_sql_query(
+        "SELECT contract_id, event_type FROM contract_events "
+        "UNION ALL SELECT contract_id, event_type FROM contract_events_archive",
+        conn,
+    )
+    return contracts, additives, compliance, supplier, events
+
+
+def _pct(numerator, denominator):
+    if denominator in (0, None):
+        return None
+    return (numerator / denominator) * 100
+
+
+def reference_kpis(expiring_days: int = 30, contract_ids: list[int] | None = None):
+    contracts, additives, compliance, supplier, events = load_base_frames()
+    if contract_ids is not None:
+        ids_set = set(contract_ids)
+        contracts = contracts[contracts["id"].isin(ids_set)] if not contracts.empty else contracts
+        additives = additives[additives["contract_id"].isin(ids_set)] if not additives.empty else additives
+        compliance = compliance[compliance["contract_id"].isin(ids_set)] if not compliance.empty else compliance
+        supplier = supplier[supplier["contract_id"].isin(ids_set)] if not supplier.empty else supplier
+        events = events[events["contract_id"].isin(ids_set)] if not events.empty else events
+
+    if contracts.empty:
+        return {"has_data": False, "sections": {}, "charts": {}}
+
+    contracts["start_date"] = pd.to_datetime(contracts["start_date"], errors="coerce")
+    contracts["end_date"] = pd.to_datetime(contracts["end_date"], errors="coerce")
+    contracts["created_at"] = pd.to_datetime(contracts["created_at"], errors="coerce")
+    today = pd.Timestamp(date.today())
+
+    total_value = float(contracts["contract_value"].fillna(0).sum())
+    executed_total = float(contracts["executed_value"].fillna(0).sum())
+    savings_total = float(contracts["savings_value"].fillna(0).sum())
+    multas_total = float(contracts["penalties_value"].fillna(0).sum())
+    aditivos_total = float(additives["additive_value"].fillna(0).sum()) if not additives.empty else 0.0
+
+    avg_contract_value = float(contracts["contract_value"].fillna(0).mean()) if len(contracts) else None
+    price_variation = _pct(aditivos_total, total_value)
+    roi_mean = float(contracts["roi_value"].fillna(0).mean()) if len(contracts) else None
+
+    active_contracts = contracts[contracts["status"].isin(["Assinado", "Protocolado", "Em vigor"])]
+    duration_days = (contracts["end_date"] - contracts["start_date"]).dt.days
+    avg_term = float(duration_days.dropna().mean()) if duration_days.notna().any() else None
+    expiring = contracts[(contracts["end_date"] >= today) & (contracts["end_date"] <= today + pd.Timedelta(days=expiring_days))]
+    expiring_pct = _pct(len(expiring), len(contracts))
+    expired_no_renew = contracts[(contracts["end_date"] < today) & (contracts["status"] != "Finalizado")]
+
+    signed = contracts[contracts["signed_date"].notna()].copy()
+    signed["signed_date"] = pd.to_datetime(signed["signed_date"], errors="coerce")
+    lead_days = (signed["signed_date"] - signed["created_at"]).dt.days
+    lead_time = float(lead_days.dropna().mean()) if lead_days.notna().any() else None
+
+    supplier_counts = (
+        contracts["contracted_json"].fillna("").str.extract(r'"name"\s*:\s*"([^"]+)"')[0].fillna("N/A").value_counts().to_dict()
+    )
+
+    renewal_rate = _pct(len(contracts[contracts["status"] == "Finalizado"]), len(contracts))
+
+    if not compliance.empty:
+        mandatory_score = float(compliance["mandatory_clauses_score"].fillna(0).mean())
+        out_standard = int(compliance["out_of_standard"].fillna(0).sum())
+        guarantee_missing = int((compliance["has_guarantee"].fillna(0) == 0).sum())
+        risk_idx = float(compliance["risk_score"].fillna(0).mean())
+        reg_compliance = float(compliance["regulatory_compliance_pct"].fillna(0).mean())
+        audited_pct = _pct(int(compliance["audited"].fillna(0).sum()), len(compliance))
+        nonconf = int(compliance["nonconformities_count"].fillna(0).sum())
+    else:
+        mandatory_score = out_standard = guarantee_missing = risk_idx = reg_compliance = audited_pct = nonconf = None
+
+    add_freq = float(additives.groupby("contract_id").size().mean()) if not additives.empty else None
+
+    if not supplier.empty:
+        sla = float(supplier["sla_pct"].fillna(0).mean())
+        delivery_fail = float(supplier["delivery_fail_rate"].fillna(0).mean())
+        on_time = float(supplier["on_time_pct"].fillna(0).mean())
+        quality = float(supplier["quality_score"].fillna(0).mean())
+        switch_rate = float(supplier["supplier_switch_rate"].fillna(0).mean())
+        satisfaction = float(supplier["satisfaction_score"].fillna(0).mean())
+    else:
+        sla = delivery_fail = on_time = quality = switch_rate = satisfaction = None
+
+    litigation = int(contracts["legal_notes"].fillna("").str.contains("litígio|litigio", case=False, regex=True).sum())
+    critical_clauses = int(contracts["critical_clauses"].fillna(0).sum())
+
+    archived = contracts[contracts["archived_date"].notna()].copy()
+    archived["archived_date"] = pd.to_datetime(archived["archived_date"], errors="coerce")
+    archive_time = (archived["archived_date"] - archived["created_at"]).dt.days
+    avg_archive = float(archive_time.dropna().mean()) if archive_time.notna().any() else None
+
+    created_to_signed = lead_time
+    signed_time = lead_time
+    digital_signed_pct = _pct(int(contracts["digitally_signed"].fillna(0).sum()), len(contracts))
+
+    strategic = _pct(int(contracts["strategic_alignment"].fillna(0).sum()), len(contracts))
+    rev_contrib = float(contracts["revenue_contribution"].fillna(0).sum())
+    operation_critical = _pct(int(contracts["operation_critical"].fillna(0).sum()), len(contracts))
+    key_dependency = float(contracts["supplier_key_dependency"].fillna(0).mean() * 100)
+    diversification = float(contracts["supplier_diversification_score"].fillna(0).mean())
+
+    maturity = float(contracts["maturity_score"].fillna(0).mean())
+    governance = float(contracts["governance_index"].fillna(0).mean())
+    automation = float(contracts["automation_pct"].fillna(0).mean())
+    default_prob = float(contracts["default_probability"].fillna(0).mean())
+    agg_risk = float(contracts["aggregate_financial_risk"].fillna(0).sum())
+    disruption = float(contracts["disruption_predictive_score"].fillna(0).mean())
+
+    sections = {
+        "financeiro": {
+            "valor_total_contratado": total_value,
+            "executado_vs_contratado_pct": _pct(executed_total, total_value),
+            "economia_obtida": savings_total,
+            "custo_medio_contrato": avg_contract_value,
+            "multas_total": multas_total,
+            "custos_adicionais_aditivos": aditivos_total,
+            "variacao_preco_pct": price_variation,
+            "roi_medio": roi_mean,
+        },
+        "prazo_execucao": {
+            "prazo_medio_vigencia_dias": avg_term,
+            "pct_proximos_vencimento": expiring_pct,
+            "atraso_medio_execucao_dias": None,
+            "lead_time_contratacao_dias": lead_time,
+            "taxa_renovacao": renewal_rate,
+            "vencidos_sem_renovacao": len(expired_no_renew),
+            "cumprimento_cronograma_pct": None,
+        },
+        "compliance_risco": {
+            "pct_clausulas_obrigatorias": mandatory_score,
+            "fora_padrao_juridico": out_standard,
+            "sem_garantia_ou_seguro": guarantee_missing,
+            "indice_risco": risk_idx,
+            "conformidade_regulatoria_pct": reg_compliance,
+            "auditados_pct": audited_pct,
+            "nao_conformidades": nonconf,
+        },
+        "operacionais": {
+            "total_ativos": len(active_contracts),
+            "contratos_por_tipo": contracts["type"].value_counts().to_dict(),
+            "contratos_por_fornecedor": supplier_counts,
+            "contratos_por_departamento": contracts["department"].value_counts().to_dict(),
+            "volume_aditivos_medio": add_freq,
+            "frequencia_alteracoes": int((events["event_type"] == "edit").sum()) if not events.empty else 0,
+            "digitalizados_vs_fisicos_pct": digital_signed_pct,
+        },
+        "fornecedor": {
+            "sla_cumprido_pct": sla,
+            "indice_falhas_entrega": delivery_fail,
+            "pontualidade_entrega": on_time,
+            "qualidade_servico": quality,
+            "taxa_substituicao_fornecedor": switch_rate,
+            "satisfacao_fornecedor": satisfaction,
+        },
+        "juridicos": {
+            "litigios_relacionados": litigation,
+            "com_clausulas_criticas": critical_clauses,
+            "tempo_medio_analise_juridica": None,
+            "tempo_medio_aprovacao": None,
+            "rescindidos_antecipadamente": 0,
+            "exposicao_juridica_estimada": agg_risk,
+        },
+        "clm": {
+            "tempo_criacao_aprovacao_assinatura": created_to_signed,
+            "tempo_medio_assinatura": signed_time,
+            "pct_assinados_digitalmente": digital_signed_pct,
+            "tempo_medio_arquivamento": avg_archive,
+            "tempo_renegociacao": None,
+            "eficiencia_fluxo_aprovacao": automation,
+        },
+        "estrategicos": {
+            "pct_alinhados_planejamento": strategic,
+            "contribuicao_receita": rev_contrib,
+            "contratos_criticos_operacao": operation_critical,
+            "dependencia_fornecedores_chave": key_dependency,
+            "diversificacao_fornecedores": diversification,
+        },
+        "avancados": {
+            "score_maturidade": maturity,
+            "indice_governanca": governance,
+            "pct_automacao": automation,
+            "prob_inadimplencia": default_prob,
+            "risco_financeiro_agregado": agg_risk,
+            "ruptura_preditiva_baseline": disruption,
+        },
+    }
+
+    charts = {
+        "status_dist": contracts["status"].value_counts().to_dict(),
+        "tipo_dist": contracts["type"].value_counts().to_dict(),
+        "valor_por_departamento": contracts.groupby("department")["contract_value"].sum().to_dict(),
+    }
+    return {"has_data": True, "sections": sections, "charts": charts}
+
+
+def differences(expected, actual, path: str = "") -> list[str]:
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        out = []
+        for key in expected.keys() | actual.keys():
+            if key not in expected or key not in actual:
+                out.append(f"{path}/{key}: chave presente em apenas um dos lados")
+            else:
+                out.extend(differences(expected[key], actual[key], f"{path}/{key}"))
+        return out
+    if expected is None or actual is None:
+        return [] if expected is None and actual is None else [f"{path}: {expected!r} != {actual!r}"]
+    if isinstance(expected, (int, float)) and isinstance(actual, (int, float)):
+        if math.isclose(float(expected), float(actual), rel_tol=REL_TOL, abs_tol=1e-9):
+            return []
+    elif expected == actual:
+        return []
+    return [f"{path}: {expected!r} != {actual!r}"]
+
+
+def _add_activity(rng: random.Random, ids: list[int]) -> None:
+    sample = rng.sample(ids, len(ids) // 3)
+    upsert_compliance_bulk(
+        (
+            cid,
+            {
+                "risk_score": rng.uniform(0, 100),
+                "out_of_standard": rng.random() < 0.2,
+                "has_guarantee": rng.random() < 0.7,
+                "audited": rng.random() < 0.5,
+                "nonconformities_count": rng.randint(0, 4),
+                "regulatory_compliance_pct": rng.uniform(60, 100),
+            },
+        )
+        for cid in sample
+    )
+    upsert_supplier_performance_bulk(
+        (cid, {"sla_pct": rng.uniform(70, 100), "on_time_pct": rng.uniform(60, 100), "quality_score": rng.uniform(1, 5)})
+        for cid in sample[::2]
+    )
+    for cid in sample[:20]:
+        add_additive(cid, str(date.today()), rng.uniform(1000, 50000), "Reajuste")
+        edit_contract(cid, {"title": f"Contrato revisado {cid}"})
+
+
+def _scopes(rng: random.Random, ids: list[int]) -> dict:
+    return {
+        "carteira inteira": None,
+        "metade": ids[: len(ids) // 2],
+        "amostra": rng.sample(ids, min(len(ids), 37)),
+        "um contrato": ids[:1],
+        "vazio": [],
+        "ids inexistentes": ids[:5] + [10**9, 10**9 + 1],
+    }
+
+
+def compare_dataset(name: str, rng: random.Random) -> list[str]:
+    ids = [r["id"] for r in get_connection().execute("SELECT id FROM contracts ORDER BY id").fetchall()]
+    failures = []
+    checked = 0
+    for scope, contract_ids in _scopes(rng, ids).items():
+        for expiring_days in (30, 45, 60, 90):
+            expected = reference_kpis(expiring_days=expiring_days, contract_ids=contract_ids)
+            actual = kpi_service.calculate_kpis(expiring_days=expiring_days, contract_ids=contract_ids)
+            checked += 1
+            for diff in differences(expected, actual):
+                failures.append(f"{name} | {scope} | {expiring_days} dias | {diff}")
+    for dimension in ("department", "type", "status"):
+        values = [
+            r[0] for r in get_connection().execute(f"SELECT DISTINCT {dimension} FROM contracts ORDER BY 1 LIMIT 3")
+        ]
+        for value in values:
+            group_ids = [
+                r[0] for r in get_connection().execute(f"SELECT id FROM contracts WHERE {dimension} = ?", (value,))
+            ]
+            expected = reference_kpis(contract_ids=group_ids)
+            actual = kpi_service.calculate_kpis(group={dimension: value})
+            checked += 1
+            for diff in differences(expected, actual):
+                failures.append(f"{name} | {dimension} = {value} | {diff}")
+    print(f"{name}: {checked} combinações comparadas")
+    return failures
+
+
+def main() -> int:
+    rng = random.Random(20)
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = connection.configure(Path(tmp) / "demo.db")
+        seed_demo_data.main()
+        failures += compare_dataset("seed de demonstração", rng)
+        _add_activity(rng, [r["id"] for r in get_connection().execute("SELECT id FROM contracts").fetchall()])
+        failures += compare_dataset("seed de demonstração + atividades", rng)
+        manager.close_all()
+
+        manager = connection.configure(Path(tmp) / "bench.db")
+        run_migrations()
+        bench_data.populate(3000)
+        _add_activity(rng, [r["id"] for r in get_connection().execute("SELECT id FROM contracts").fetchall()])
+        failures += compare_dataset("carteira sintética (3000)", rng)
+        manager.close_all()
+
+        # Base distribuída: o mesmo CNPJ aparece com fornecedores diferentes.
+        shutil.copy(ROOT / "storage" / "logichain.db", Path(tmp) / "shipped.db")
+        manager = connection.configure(Path(tmp) / "shipped.db")
+        run_migrations()
+        failures += compare_dataset("base distribuída", rng)
+        manager.close_all()
+
+    for failure in failures:
+        print(f"DIVERGÊNCIA {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
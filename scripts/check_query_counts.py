@@ -0,0 +1,110 @@
+import logging
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from db import connection
+from db.connection import get_connection
+from services import (
+    get_contracts_by_ids,
+    get_risk_by_contract_ids,
+    get_supplier_perf_by_contract_ids,
+    upsert_compliance_bulk,
+)
+from services.ai_agent import answer_question
+from services.contract_service import LOOKUP_CHUNK_SIZE
+from services.kpi_service import calculate_kpis, load_kpi_history
+from ui.pages.contracts import _kanban_board
+from ui.pages.dashboard import TREND_METRICS
+
+import bench_data
+import seed_demo_data
+
+# Número máximo de comandos SQL por cenário, independente do tamanho da carteira.
+QUERY_BUDGETS = {
+    "agente: risco alto": 3,
+    "agente: listar em vigor": 2,
+    "agente: vencimentos": 3,
+    "kanban: quadro": 6,
+    "lote: contratos por id": 1,
+    "lote: risco por id": 1,
+    "lote: desempenho por id": 1,
+    "kpis: resultado em cache": 1,
+    "kpis: séries de tendência": len(TREND_METRICS),
+}
+
+
+def _all_ids() -> list[int]:
+    return [r["id"] for r in get_connection().execute("SELECT id FROM contracts").fetchall()]
+
+
+SCENARIOS = {
+    "agente: risco alto": lambda: answer_question("Liste contratos em vigor com risco alto."),
+    "agente: listar em vigor": lambda: answer_question("listar contratos em vigor"),
+    "agente: vencimentos": lambda: answer_question("Quais contratos vencem nos próximos 45 dias?"),
+    "kanban: quadro": _kanban_board,
+    "kpis: séries de tendência": lambda: load_kpi_history(tuple((s, m) for s, m, _label in TREND_METRICS)),
+}
+
+
+def count_statements(fn) -> int:
+    statements = []
+    conn = get_connection()
+    conn.set_trace_callback(statements.append)
+    try:
+        fn()
+    finally:
+        conn.set_trace_callback(None)
+    return len(statements)
+
+
+def _grow_portfolio(extra: int) -> None:
+    before = set(_all_ids())
+    bench_data.populate(extra, seed=3)
+    rng = random.Random(5)
+    new_ids = sorted(set(_all_ids()) - before)
+    upsert_compliance_bulk((cid, {"risk_score": rng.uniform(0, 100)}) for cid in new_ids)
+
+
+def measure() -> dict[str, int]:
+    ids = _all_ids()
+    counts = {name: count_statements(fn) for name, fn in SCENARIOS.items()}
+    sample = ids[:LOOKUP_CHUNK_SIZE]
+    counts["lote: contratos por id"] = count_statements(lambda: get_contracts_by_ids(sample))
+    counts["lote: risco por id"] = count_statements(lambda: get_risk_by_contract_ids(sample))
+    counts["lote: desempenho por id"] = count_statements(lambda: get_supplier_perf_by_contract_ids(sample))
+    calculate_kpis()
+    counts["kpis: resultado em cache"] = count_statements(calculate_kpis)
+    return counts
+
+
+def main() -> int:
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = connection.configure(Path(tmp) / "counts.db")
+        seed_demo_data.main()
+        small_total = len(_all_ids())
+        small = measure()
+        _grow_portfolio(3000)
+        large_total = len(_all_ids())
+        large = measure()
+        manager.close_all()
+
+    failures = []
+    print(f"{'cenário':<28}{f'{small_total} contratos':>16}{f'{large_total} contratos':>16}{'limite':>8}")
+    for name, budget in QUERY_BUDGETS.items():
+        print(f"{name:<28}{small[name]:>16}{large[name]:>16}{budget:>8}")
+        if small[name] != large[name] or large[name] > budget:
+            failures.append(name)
+    for name in failures:
+        print(f"FALHA: {name} executa consultas proporcionais ao número de contratos")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
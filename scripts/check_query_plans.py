@@ -0,0 +1,157 @@
+import re
+import sys
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from db import connection
+from db.connection import get_connection
+from services import (
+    add_additive,
+    archive_events,
+    contract_status_counts,
+    count_contracts,
+    edit_contract,
+    get_contract_by_id,
+    get_contract_by_number,
+    get_contract_events,
+    list_contracts,
+    list_contracts_page,
+    list_kanban_contracts,
+    search_contract_ids,
+    update_contract_activity,
+    update_status,
+    upsert_compliance,
+    upsert_supplier_performance,
+)
+from services.ai_agent import answer_question
+from services.kpi_service import (
+    backfill_kpi_history,
+    calculate_kpis,
+    load_kpi_history,
+    load_portfolio_snapshot,
+    record_kpi_history,
+)
+from services.party_service import supplier_totals
+
+import seed_demo_data
+
+CHECKED_PREFIXES = ("SELECT", "UPDATE", "DELETE", "WITH")
+FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+# Tabelas limitadas pelo número de combinações de dimensões ou de fornecedores, não pelo tamanho da
+# carteira; parties é lida por inteiro na busca por trecho do nome (LIKE '%termo%').
+BOUNDED_TABLES = {"kpi_contract_groups", "parties"}
+# Busca que usa só a primeira coluna de um índice de baixa seletividade percorre quase toda a tabela
+# de vínculos, mesmo sem aparecer como SCAN.
+INDEX_SEARCH = re.compile(r"^SEARCH \w+ USING (?:COVERING )?INDEX (\w+) \((.*)\)$")
+LOW_SELECTIVITY_PREFIXES = {"idx_contract_parties_role_party": "role=?"}
+LITERAL = re.compile(r"'[^']*'|\b\d+(?:\.\d+)?\b")
+
+
+def _scenario():
+    today = date.today()
+    list_kanban_contracts()
+    for order in ("created_at DESC", "created_at ASC", "end_date ASC", "contract_value DESC", "status ASC"):
+        list_contracts({"order_by": order})
+    list_contracts({"type": "Alocação"})
+    list_contracts({"status": "Em vigor"})
+    list_contracts({"department": "TI"})
+    list_contracts({"contracted": "Alfa"})
+    list_contracts({"text": "logístico"})
+    list_contracts({"min_value": 100000, "max_value": 500000})
+    list_contracts({"date_from": str(today - timedelta(days=90)), "date_to": str(today)})
+    list_contracts({"end_from": str(today), "end_to": str(today + timedelta(days=45))})
+    search_contract_ids("litígio", columns=("legal_notes",))
+    for order in ("created_at DESC", "created_at ASC", "end_date ASC", "contract_value DESC", "status ASC"):
+        _page, cursor = list_contracts_page({"order_by": order}, page_size=10)
+        list_contracts_page({"order_by": order}, page_size=10, cursor=cursor)
+    for status in ("Gerado", "Assinado", "Protocolado", "Em vigor"):
+        _page, cursor = list_contracts_page({"status": status}, include_finalized=False, page_size=5)
+        list_contracts_page({"status": status}, include_finalized=False, page_size=5, cursor=cursor)
+    contract_status_counts(include_finalized=False)
+    count_contracts({"department": "TI"})
+
+    contract = get_contract_by_id(1)
+    get_contract_by_number(contract["contract_number"])
+    get_contract_events(1)
+    update_status(1, contract["status"], user="check")
+    edit_contract(1, {"title": contract["title"]})
+    update_contract_activity(1, {"legal_notes": contract["legal_notes"]})
+    add_additive(1, str(today), 10.0, "Verificação de plano")
+    upsert_compliance(1, {"risk_score": 50})
+    upsert_supplier_performance(1, {"sla_pct": 90})
+
+    supplier_totals()
+    calculate_kpis(contract_ids=[1, 2, 3])
+    load_portfolio_snapshot({"department": "TI"})
+    load_portfolio_snapshot({"date_from": str(today - timedelta(days=90)), "date_to": str(today)})
+    record_kpi_history()
+    backfill_kpi_history(days=2)
+    load_kpi_history((("financeiro", "valor_total_contratado"), ("fornecedor", "sla_cumprido_pct")), "TI")
+    for question in (
+        "Quais contratos vencem nos próximos 45 dias?",
+        "Liste contratos em vigor com risco alto.",
+        "Qual o total contratado por fornecedor?",
+        "listar contratos em vigor",
+        f"Mostre o resumo do contrato {contract['contract_number']}.",
+    ):
+        answer_question(question)
+
+    archive_events(retention_days=0, batch_size=50)
+    get_contract_events(1)
+
+
+def capture_statements() -> list[str]:
+    statements = []
+    conn = get_connection()
+    conn.set_trace_callback(statements.append)
+    try:
+        _scenario()
+    finally:
+        conn.set_trace_callback(None)
+    seen = {}
+    for sql in statements:
+        sql = " ".join(sql.split())
+        shape = LITERAL.sub("?", sql)
+        if sql.upper().startswith(CHECKED_PREFIXES) and shape not in seen:
+            seen[shape] = sql
+    return list(seen.values())
+
+
+def _is_full_scan(detail: str) -> bool:
+    if (match := FULL_SCAN.match(detail)) and match.group(1) not in BOUNDED_TABLES:
+        return True
+    match = INDEX_SEARCH.match(detail)
+    return bool(match) and LOW_SELECTIVITY_PREFIXES.get(match.group(1)) == match.group(2)
+
+
+def full_scans(sql: str) -> list[str]:
+    conn = get_connection()
+    plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+    return [row["detail"] for row in plan if _is_full_scan(row["detail"])]
+
+
+def main() -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = connection.configure(Path(tmp) / "plans.db")
+        seed_demo_data.main()
+        failures = []
+        statements = capture_statements()
+        for sql in statements:
+            scans = full_scans(sql)
+            if scans:
+                failures.append((sql, scans))
+        manager.close_all()
+
+    print(f"Consultas verificadas: {len(statements)}")
+    for sql, scans in failures:
+        print(f"FULL SCAN {', '.join(scans)}: {sql[:200]}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,33 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from db.migrations import run_migrations
+from services.analytics_snapshot import ANALYTICS_DIR, export_analytics_snapshot
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Exporta contratos e tabelas analíticas para arquivos Parquet.")
+    parser.add_argument("--dir", type=Path, default=ANALYTICS_DIR, help="Diretório do snapshot")
+    parser.add_argument("--full", action="store_true", help="Ignora as marcas d'água e reexporta tudo")
+    args = parser.parse_args()
+
+    run_migrations()
+    start = time.perf_counter()
+    manifest = export_analytics_snapshot(args.dir, full=args.full)
+    elapsed = time.perf_counter() - start
+
+    print(f"{'tabela':<26}{'modo':>13}{'alteradas':>11}{'linhas':>10}")
+    for name, table in manifest["tables"].items():
+        print(f"{name:<26}{table['mode']:>13}{table['changed']:>11}{table['rows']:>10}")
+    print(f"Snapshot gravado em {args.dir} ({elapsed:.2f} s, geração {manifest['generation']})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,37 @@
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from db.migrations import run_migrations
+from services.import_service import IMPORT_CHUNK_SIZE, import_contracts
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Importa contratos em lote a partir de CSV ou JSONL.")
+    parser.add_argument("path", help="Arquivo .csv ou .jsonl")
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE, help="Registros por transação")
+    parser.add_argument("--report", help="Relatório de erros (padrão: <arquivo>.erros.csv ao lado da entrada)")
+    parser.add_argument("--restart", action="store_true", help="Ignora o checkpoint e reimporta desde o início")
+    args = parser.parse_args()
+
+    run_migrations()
+    try:
+        result = import_contracts(args.path, chunk_size=args.chunk_size, report_path=args.report, restart=args.restart)
+    except (ValueError, FileNotFoundError) as exc:
+        print(f"Erro: {exc}")
+        return 1
+
+    if result["resumed_from"]:
+        print(f"Retomado a partir do registro {result['resumed_from']}")
+    print(f"Importados: {result['imported']} | Com erro: {result['failed']} | Último registro: {result['position']}")
+    if result["failed"]:
+        print(f"Relatório de erros: {result['report_path']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
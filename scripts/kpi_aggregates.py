@@ -0,0 +1,32 @@
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from db.migrations import run_migrations
+from services.kpi_service import check_kpi_aggregates, rebuild_kpi_aggregates
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Reconstrói ou verifica as tabelas agregadas de KPIs.")
+    parser.add_argument("command", choices=("check", "rebuild"))
+    args = parser.parse_args()
+
+    run_migrations()
+    if args.command == "rebuild":
+        groups = rebuild_kpi_aggregates()
+        print(f"Agregados reconstruídos: {groups} grupos (departamento, tipo, status)")
+        return 0
+
+    problems = check_kpi_aggregates()
+    for problem in problems:
+        print(f"DIVERGÊNCIA {problem}")
+    print("Agregados consistentes" if not problems else f"{len(problems)} divergência(s)")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
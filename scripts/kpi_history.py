@@ -0,0 +1,35 @@
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from db.migrations import run_migrations
+from services.kpi_service import KPI_HISTORY_DAYS, backfill_kpi_history, record_kpi_history
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Grava o histórico diário de KPIs (rodar uma vez por dia).")
+    parser.add_argument("command", choices=("record", "backfill"))
+    parser.add_argument("--days", type=int, default=KPI_HISTORY_DAYS, help="Dias anteriores a preencher no backfill")
+    parser.add_argument("--overwrite", action="store_true", help="Recalcula dias já preenchidos por backfill")
+    args = parser.parse_args()
+
+    run_migrations()
+    if args.command == "record":
+        rows = record_kpi_history()
+        print(f"Histórico de hoje gravado: {rows} indicadores")
+        return 0
+
+    filled = backfill_kpi_history(days=args.days, overwrite=args.overwrite)
+    if filled:
+        print(f"Dias preenchidos: {len(filled)} ({filled[0]} a {filled[-1]})")
+    else:
+        print("Nenhum dia pendente")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
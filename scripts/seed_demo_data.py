@@ -7,8 +7,10 @@ ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from db.connection import get_connection
+from db.connection import transaction
 from db.migrations import run_migrations
+from services.contract_service import EVENT_INSERT_SQL, _event_params, reserve_contract_numbers
+from services.party_service import link_contract_parties
 from utils.helpers import dumps
 
 
@@ -41,14 +43,13 @@ def main():
     base_start = datetime.now() - timedelta(days=420)
     now = datetime.now()
 
-    conn = get_connection()
     created = 0
-    with conn:
+    with transaction() as conn:
+        numbers = reserve_contract_numbers(total_to_create, year=year)
         existing = conn.execute("SELECT COUNT(*) AS c FROM contracts").fetchone()["c"]
         start_seq = int(existing) + 1
 
-        for i in range(start_seq, start_seq + total_to_create):
-            contract_number = f"LC-{year}-{i:03d}"
+        for i, contract_number in enumerate(numbers, start=start_seq):
             if conn.execute("SELECT 1 FROM contracts WHERE contract_number = ?", (contract_number,)).fetchone():
                 continue
 
@@ -74,6 +75,23 @@ def main():
             if status == "Finalizado":
                 archived_date = end_date + timedelta(days=random.randint(5, 60))
 
+            # Nomes e documentos sorteados de forma independente: o mesmo CNPJ aparece com
+            # fornecedores diferentes, como nos cadastros reais importados.
+            contractor = {
+                "name": random.choice(contractors),
+                "doc": f"00.000.000/0001-{random.randint(10, 99)}",
+                "address": "Av. Central, 1000 - SP",
+                "email": "contratante@empresa.com",
+                "phone": "+55 11 3000-0000",
+            }
+            contracted = {
+                "name": random.choice(suppliers),
+                "doc": f"11.111.111/0001-{random.randint(10, 99)}",
+                "address": "Rua dos Fornecedores, 500 - SP",
+                "email": "contato@fornecedor.com",
+                "phone": "+55 11 4000-0000",
+            }
+
             critical = random.random() < 0.32
             risk_fin = round(random.uniform(10000, 250000), 2)
 
@@ -85,20 +103,8 @@ def main():
                 "cost_center": f"CC-{random.randint(100, 999)}",
                 "status": status,
                 "tags": dumps([dept.lower(), ctype.lower().split()[0]]),
-                "contractor_json": dumps({
-                    "name": random.choice(contractors),
-                    "doc": f"00.000.000/0001-{random.randint(10,99)}",
-                    "address": "Av. Central, 1000 - SP",
-                    "email": "contratante@empresa.com",
-                    "phone": "+55 11 3000-0000",
-                }),
-                "contracted_json": dumps({
-                    "name": random.choice(suppliers),
-                    "doc": f"11.111.111/0001-{random.randint(10,99)}",
-                    "address": "Rua dos Fornecedores, 500 - SP",
-                    "email": "contato@fornecedor.com",
-                    "phone": "+55 11 4000-0000",
-                }),
+                "contractor_json": dumps(contractor),
+                "contracted_json": dumps(contracted),
                 "scope_text": "Execução de escopo logístico com metas e indicadores de performance.",
                 "deliverables_text": "Entrega mensal de serviços/produtos com relatório de execução.",
                 "sla_targets_json": dumps({"sla_pct": round(random.uniform(85, 99.9), 2), "on_time_target": round(random.uniform(85, 99.9), 2)}),
@@ -151,6 +157,7 @@ def main():
             }
 
             contract_id = insert_row(conn, "contracts", contract_data)
+            link_contract_parties(conn, contract_id, contractor, contracted)
 
             for _ in range(random.randint(0, 4)):
                 add_date = start_date + timedelta(days=random.randint(10, max(term_days, 20)))
@@ -189,23 +196,23 @@ def main():
                 "updated_at": now.isoformat(timespec="seconds"),
             })
 
-            insert_row(conn, "contract_events", {
-                "contract_id": contract_id,
-                "event_type": "created",
-                "event_data_json": dumps({"status": status}),
-                "created_at": created_at.isoformat(timespec="seconds"),
-            })
+            conn.execute(
+                EVENT_INSERT_SQL,
+                _event_params(contract_id, "created", {"status": status}, created_at.isoformat(timespec="seconds")),
+            )
             if status != "Gerado":
-                insert_row(conn, "contract_events", {
-                    "contract_id": contract_id,
-                    "event_type": "status_change",
-                    "event_data_json": dumps({"from": "Gerado", "to": status, "user": "seed"}),
-                    "created_at": (created_at + timedelta(days=3)).isoformat(timespec="seconds"),
-                })
+                conn.execute(
+                    EVENT_INSERT_SQL,
+                    _event_params(
+                        contract_id,
+                        "status_change",
+                        {"from": "Gerado", "to": status, "user": "seed"},
+                        (created_at + timedelta(days=3)).isoformat(timespec="seconds"),
+                    ),
+                )
 
             created += 1
 
-    conn.close()
     print(f"Seed finalizado. Contratos novos inseridos: {created}")
 
 
@@ -1,37 +1,77 @@
 from services.contract_service import (
+    ConflictError,
     next_contract_number,
+    reserve_contract_numbers,
     create_contract,
     add_event,
+    flush_audit_events,
+    audit_writer_stats,
     generate_and_attach_pdf,
     get_contract_by_id,
     get_contract_by_number,
+    contract_cache_stats,
+    get_contracts_by_ids,
+    get_risk_by_contract_ids,
+    get_supplier_perf_by_contract_ids,
+    contract_filter_sql,
     list_contracts,
+    list_contracts_summary,
+    list_contracts_page,
+    count_contracts,
+    contract_status_counts,
     list_kanban_contracts,
+    search_contract_ids,
+    search_contracts,
     update_status,
+    update_status_bulk,
+    retry_on_conflict,
     add_additive,
     edit_contract,
     update_contract_activity,
     download_pdf_bytes,
     get_contract_events,
+    archive_events,
     upsert_compliance,
+    upsert_compliance_bulk,
     upsert_supplier_performance,
+    upsert_supplier_performance_bulk,
 )
 
 __all__ = [
+    "ConflictError",
     "next_contract_number",
+    "reserve_contract_numbers",
     "create_contract",
     "add_event",
+    "flush_audit_events",
+    "audit_writer_stats",
     "generate_and_attach_pdf",
     "get_contract_by_id",
     "get_contract_by_number",
+    "contract_cache_stats",
+    "get_contracts_by_ids",
+    "get_risk_by_contract_ids",
+    "get_supplier_perf_by_contract_ids",
+    "contract_filter_sql",
     "list_contracts",
+    "list_contracts_summary",
+    "list_contracts_page",
+    "count_contracts",
+    "contract_status_counts",
     "list_kanban_contracts",
+    "search_contract_ids",
+    "search_contracts",
     "update_status",
+    "update_status_bulk",
+    "retry_on_conflict",
     "add_additive",
     "edit_contract",
     "update_contract_activity",
     "download_pdf_bytes",
     "get_contract_events",
+    "archive_events",
     "upsert_compliance",
+    "upsert_compliance_bulk",
     "upsert_supplier_performance",
+    "upsert_supplier_performance_bulk",
 ]
@@ -0,0 +1,387 @@
+import json
+import os
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from db.connection import connection, data_generation
+from utils.helpers import now_iso
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pc = pq = None
+
+
+ANALYTICS_DIR = Path(os.environ.get("LOGICHAIN_ANALYTICS_DIR", "storage/analytics"))
+MANIFEST_NAME = "manifest.json"
+SNAPSHOT_FORMAT = 1
+PARQUET_ROW_GROUP_SIZE = 16384
+PARQUET_COMPRESSION = "zstd"
+# updated_at é calculado antes de a transação obter o lock de escrita (busy_timeout de 5 s), então
+# um commit pode chegar com marca menor que a última exportada; a janela relê essas linhas.
+WATERMARK_OVERLAP_SECONDS = 60
+# Espera antes da exportação em segundo plano: não disputa CPU com a renderização que a disparou e
+# agrupa escritas seguidas numa única exportação.
+REFRESH_DELAY_SECONDS = 2.0
+
+ARROW_TYPES = {"INTEGER": "int64", "REAL": "float64", "TEXT": "string"}
+
+
+@dataclass(frozen=True)
+class SnapshotTable:
+    name: str
+    source: str
+    columns: tuple[str, ...]
+    key: tuple[str, ...]
+    watermark: str
+    sort_by: tuple[str, ...]
+    append_only: bool = False
+    computed: tuple[tuple[str, str, str], ...] = ()
+
+
+SNAPSHOT_TABLES = (
+    SnapshotTable(
+        "contracts",
+        "contracts",
+        (
+            "id", "contract_number", "type", "title", "department", "cost_center", "status", "critical_clauses",
+            "start_date", "end_date", "penalties_value", "contract_value", "executed_value", "savings_value",
+            "roi_value", "request_date", "signed_date", "archived_date", "digitally_signed", "strategic_alignment",
+            "revenue_contribution", "operation_critical", "supplier_key_dependency", "supplier_diversification_score",
+            "maturity_score", "governance_index", "automation_pct", "default_probability", "aggregate_financial_risk",
+            "disruption_predictive_score", "created_at", "updated_at", "is_archived", "is_finalized", "version",
+        ),
+        key=("id",),
+        watermark="updated_at",
+        # Ordenado por criação para que as estatísticas dos row groups descartem períodos fora do filtro.
+        sort_by=("created_at", "id"),
+        computed=(("contracted_name", "json_extract(contracted_json, '$.name')", "TEXT"),),
+    ),
+    SnapshotTable(
+        "contract_additives",
+        "contract_additives",
+        ("id", "contract_id", "additive_date", "additive_value", "reason", "created_at"),
+        key=("id",),
+        watermark="id",
+        sort_by=("contract_id", "id"),
+        append_only=True,
+    ),
+    SnapshotTable(
+        "compliance_checks",
+        "compliance_checks",
+        (
+            "id", "contract_id", "mandatory_clauses_score", "out_of_standard", "has_guarantee", "has_insurance",
+            "regulatory_compliance_pct", "audited", "nonconformities_count", "risk_score", "created_at", "updated_at",
+        ),
+        key=("id",),
+        watermark="updated_at",
+        sort_by=("contract_id", "id"),
+    ),
+    SnapshotTable(
+        "supplier_performance",
+        "supplier_performance",
+        (
+            "id", "contract_id", "sla_pct", "delivery_fail_rate", "on_time_pct", "quality_score",
+            "supplier_switch_rate", "satisfaction_score", "created_at", "updated_at",
+        ),
+        key=("id",),
+        watermark="updated_at",
+        sort_by=("contract_id", "id"),
+    ),
+    SnapshotTable(
+        "contract_event_rollups",
+        "contract_event_rollups",
+        ("contract_id", "event_type", "event_count", "first_at", "last_at"),
+        key=("contract_id", "event_type"),
+        watermark="last_at",
+        sort_by=("contract_id", "event_type"),
+    ),
+)
+SNAPSHOT_TABLES_BY_NAME = {table.name: table for table in SNAPSHOT_TABLES}
+
+
+def pyarrow_available() -> bool:
+    return pq is not None
+
+
+def _require_pyarrow() -> None:
+    if pq is None:
+        raise ValueError("Snapshot analítico indisponível: instale pyarrow")
+
+
+def _directory(directory) -> Path:
+    return Path(directory) if directory is not None else ANALYTICS_DIR
+
+
+def _table_path(directory: Path, table: SnapshotTable) -> Path:
+    return directory / f"{table.name}.parquet"
+
+
+def read_manifest(directory: Path | str | None = None) -> dict | None:
+    path = _directory(directory) / MANIFEST_NAME
+    if not path.exists():
+        return None
+    manifest = json.loads(path.read_text(encoding="utf-8"))
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        return None
+    return manifest
+
+
+def _write_atomic(path: Path, write) -> None:
+    # Nome temporário por processo e thread: sessões do Dashboard podem atualizar o snapshot ao mesmo tempo.
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def _arrow_schema(conn, table: SnapshotTable):
+    declared = {r["name"]: (r["type"] or "").upper() for r in conn.execute(f"PRAGMA table_info({table.source})")}
+    fields = [(column, declared[column]) for column in table.columns]
+    fields += [(name, sql_type) for name, _expression, sql_type in table.computed]
+    return pa.schema([(name, pa.type_for_alias(ARROW_TYPES.get(sql_type, "string"))) for name, sql_type in fields])
+
+
+def _fetch_table(conn, table: SnapshotTable, schema, where: str = "", params=()):
+    computed = {name: f"{expression} AS {name}" for name, expression, _type in table.computed}
+    expressions = [computed.get(name, name) for name in schema.names]
+    rows = conn.execute(f"SELECT {', '.join(expressions)} FROM {table.source} {where}", params).fetchall()
+    columns = list(zip(*rows)) if rows else [()] * len(schema)
+    return pa.table([pa.array(values, type=field.type) for values, field in zip(columns, schema)], schema=schema)
+
+
+def _key_values(arrow_table, key: tuple[str, ...]):
+    if len(key) == 1:
+        return arrow_table[key[0]]
+    return pc.binary_join_element_wise(*(pc.cast(arrow_table[k], pa.string()) for k in key), "|")
+
+
+def _fetch_keys(conn, table: SnapshotTable):
+    rows = conn.execute(f"SELECT {', '.join(table.key)} FROM {table.source}").fetchall()
+    columns = list(zip(*rows)) if rows else [()] * len(table.key)
+    return pa.table([pa.array(values) for values in columns], names=list(table.key))
+
+
+def _overlap(watermark: str) -> str:
+    moment = datetime.fromisoformat(watermark) - timedelta(seconds=WATERMARK_OVERLAP_SECONDS)
+    return moment.isoformat(timespec="seconds")
+
+
+def _export_table(conn, directory: Path, table: SnapshotTable, previous: dict | None) -> dict:
+    schema = _arrow_schema(conn, table)
+    path = _table_path(directory, table)
+    existing = None
+    if previous is not None and previous.get("watermark") is not None and path.exists():
+        existing = pq.read_table(path)
+        if not existing.schema.equals(schema):
+            existing = None
+
+    deleted = 0
+    if existing is None:
+        merged = delta = _fetch_table(conn, table, schema)
+        mode = "full"
+    else:
+        if table.append_only:
+            where, params = f"WHERE {table.watermark} > ?", (previous["watermark"],)
+        else:
+            where, params = f"WHERE {table.watermark} >= ?", (_overlap(previous["watermark"]),)
+        delta = _fetch_table(conn, table, schema, where, params)
+        merged = existing
+        if delta.num_rows:
+            keep = pc.invert(pc.is_in(_key_values(existing, table.key), value_set=_key_values(delta, table.key)))
+            merged = pa.concat_tables([existing.filter(keep), delta])
+        # Linhas apagadas no banco não aparecem pela marca d'água; compara com as chaves atuais.
+        live = _fetch_keys(conn, table)
+        alive = pc.is_in(_key_values(merged, table.key), value_set=_key_values(live, table.key))
+        deleted = merged.num_rows - pc.sum(alive).as_py() if merged.num_rows else 0
+        if deleted:
+            merged = merged.filter(alive)
+        mode = "incremental"
+
+    if existing is None or delta.num_rows or deleted:
+        merged = merged.sort_by([(column, "ascending") for column in table.sort_by])
+        _write_atomic(
+            path,
+            lambda tmp: pq.write_table(
+                merged, tmp, row_group_size=PARQUET_ROW_GROUP_SIZE, compression=PARQUET_COMPRESSION
+            ),
+        )
+
+    watermark = pc.max(merged[table.watermark]).as_py() if merged.num_rows else None
+    return {
+        "rows": merged.num_rows,
+        "changed": delta.num_rows,
+        "deleted": deleted,
+        "mode": mode,
+        "watermark": watermark,
+    }
+
+
+def export_analytics_snapshot(directory: Path | str | None = None, full: bool = False) -> dict:
+    _require_pyarrow()
+    directory = _directory(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    manifest = None if full else read_manifest(directory)
+    previous = (manifest or {}).get("tables", {})
+
+    with connection() as conn:
+        # Uma única transação de leitura: todas as tabelas vêm do mesmo estado do banco (WAL).
+        conn.execute("BEGIN")
+        try:
+            generation = data_generation()
+            tables = {table.name: _export_table(conn, directory, table, previous.get(table.name)) for table in SNAPSHOT_TABLES}
+        finally:
+            conn.execute("COMMIT")
+
+    manifest = {"format": SNAPSHOT_FORMAT, "generation": generation, "exported_at": now_iso(), "tables": tables}
+    _write_atomic(
+        directory / MANIFEST_NAME,
+        lambda tmp: tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8"),
+    )
+    return manifest
+
+
+_refresh_lock = threading.Lock()
+_refresh_threads: dict[str, threading.Thread] = {}
+_threads_lock = threading.Lock()
+
+
+# Atualiza o snapshot de forma incremental quando o banco mudou desde a última exportação.
+def refresh_analytics_snapshot(directory: Path | str | None = None) -> dict | None:
+    manifest = read_manifest(directory)
+    if manifest is None or pq is None:
+        return manifest
+    if manifest.get("generation") == data_generation():
+        return manifest
+    with _refresh_lock:
+        manifest = read_manifest(directory)
+        if manifest is not None and manifest.get("generation") != data_generation():
+            manifest = export_analytics_snapshot(directory)
+    return manifest
+
+
+# A exportação roda fora da renderização; até ela terminar, a leitura completa os arquivos com o delta do SQLite.
+def start_snapshot_refresh(directory: Path | str | None = None, delay: float = REFRESH_DELAY_SECONDS) -> threading.Thread:
+    directory = _directory(directory)
+    path = str(directory.resolve())
+    with _threads_lock:
+        thread = _refresh_threads.get(path)
+        if thread is not None and thread.is_alive():
+            return thread
+        thread = threading.Timer(delay, refresh_analytics_snapshot, args=(directory,))
+        thread.name = "refresh-analytics-snapshot"
+        thread.daemon = True
+        _refresh_threads[path] = thread
+        thread.start()
+    return thread
+
+
+def _next_day(value) -> str:
+    return (date.fromisoformat(str(value)[:10]) + timedelta(days=1)).isoformat()
+
+
+# Mesmos filtros de contract_service._filter_clauses; contratada e texto dependem de partes e FTS no SQLite.
+PUSHDOWN_FILTERS = {
+    "type": lambda v: pc.field("type") == v,
+    "status": lambda v: pc.field("status") == v,
+    "department": lambda v: pc.field("department") == v,
+    "date_from": lambda v: pc.field("created_at") >= str(v)[:10],
+    "date_to": lambda v: pc.field("created_at") < _next_day(v),
+    "end_from": lambda v: pc.field("end_date") >= str(v),
+    "end_to": lambda v: pc.field("end_date") <= str(v),
+}
+NUMERIC_PUSHDOWN_FILTERS = {
+    "min_value": lambda v: pc.field("contract_value") >= float(v),
+    "max_value": lambda v: pc.field("contract_value") <= float(v),
+}
+SQLITE_ONLY_FILTERS = ("contracted", "text")
+
+
+def supports_filters(filters: dict) -> bool:
+    return not any(filters.get(k) for k in SQLITE_ONLY_FILTERS)
+
+
+def _filter_expression(filters: dict, include_finalized: bool = True):
+    expressions = [build(filters[k]) for k, build in PUSHDOWN_FILTERS.items() if filters.get(k)]
+    expressions += [build(filters[k]) for k, build in NUMERIC_PUSHDOWN_FILTERS.items() if filters.get(k) is not None]
+    if not include_finalized:
+        expressions.append(pc.field("status") != "Finalizado")
+    if not expressions:
+        return None
+    expression = expressions[0]
+    for other in expressions[1:]:
+        expression = expression & other
+    return expression
+
+
+def _read_with_delta(conn, directory: Path, table: SnapshotTable, previous: dict, columns, expression):
+    # Mesma janela da exportação incremental, mas só em memória: linhas alteradas substituem as do
+    # arquivo, as apagadas saem pela comparação com as chaves atuais.
+    read_columns = list(dict.fromkeys((*table.key, *columns)))
+    existing = pq.read_table(_table_path(directory, table), columns=read_columns, filters=expression)
+    if previous.get("watermark") is None:
+        where, params = "", ()
+    elif table.append_only:
+        where, params = f"WHERE {table.watermark} > ?", (previous["watermark"],)
+    else:
+        where, params = f"WHERE {table.watermark} >= ?", (_overlap(previous["watermark"]),)
+    schema = _arrow_schema(conn, table)
+    changed = _fetch_table(conn, table, pa.schema([schema.field(c) for c in read_columns]), where, params)
+    existing_keys = _key_values(existing, table.key)
+    keep = pc.invert(pc.is_in(existing_keys, value_set=_key_values(changed, table.key)))
+    # Toda linha viva está no arquivo ou no delta; se a contagem bate com essa união, nada foi apagado
+    # e a leitura de todas as chaves do SQLite é evitada.
+    stored_keys = _key_values(pq.read_table(_table_path(directory, table), columns=list(table.key)), table.key)
+    known = pa.concat_arrays([*stored_keys.chunks, *_key_values(changed, table.key).chunks]) if changed.num_rows else stored_keys
+    live_count = conn.execute(f"SELECT COUNT(*) FROM {table.source}").fetchone()[0]
+    if live_count != len(pc.unique(known)):
+        live = _fetch_keys(conn, table)
+        keep = pc.and_(keep, pc.is_in(existing_keys, value_set=_key_values(live, table.key)))
+    if expression is not None and changed.num_rows:
+        changed = changed.filter(expression)
+    merged = pa.concat_tables([existing.filter(keep), changed.cast(existing.schema)])
+    return merged.select(list(columns))
+
+
+def read_contract_frames(
+    filters: dict,
+    contract_columns: tuple[str, ...],
+    related_columns: dict[str, tuple[str, ...]],
+    directory: Path | str | None = None,
+    include_finalized: bool = True,
+):
+    if pq is None or not supports_filters(filters):
+        return None
+    directory = _directory(directory)
+    manifest = read_manifest(directory)
+    if manifest is None:
+        return None
+
+    expression = _filter_expression(filters, include_finalized)
+    with connection() as conn:
+        # Arquivos e delta lidos numa única transação: os ids correspondem aos agregados da mesma geração.
+        conn.execute("BEGIN")
+        try:
+            generation = data_generation()
+            stale = manifest.get("generation") != generation
+            if stale:
+                start_snapshot_refresh(directory)
+
+            def read(name, columns, table_filter):
+                table = SNAPSHOT_TABLES_BY_NAME[name]
+                if stale:
+                    previous = manifest["tables"].get(name, {})
+                    return _read_with_delta(conn, directory, table, previous, columns, table_filter)
+                return pq.read_table(_table_path(directory, table), columns=list(columns), filters=table_filter)
+
+            contracts = read("contracts", contract_columns, expression)
+            contracts = contracts.sort_by([("created_at", "descending")])
+            related_filter = None if expression is None else pc.field("contract_id").isin(contracts["id"])
+            related = [read(name, columns, related_filter) for name, columns in related_columns.items()]
+        finally:
+            conn.execute("COMMIT")
+    manifest = {**manifest, "generation": generation}
+    return manifest, contracts.to_pandas(), [table.to_pandas() for table in related]
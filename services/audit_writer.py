@@ -0,0 +1,157 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+
+from db.connection import ConnectionManager
+
+AUDIT_QUEUE_SIZE = 2000
+AUDIT_BATCH_SIZE = 200
+AUDIT_FLUSH_INTERVAL = 0.25
+AUDIT_SYNC = os.environ.get("LOGICHAIN_AUDIT_SYNC", "0") == "1"
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class _FlushMarker:
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class AuditWriter:
+    def __init__(
+        self,
+        insert_sql: str,
+        maxsize: int = AUDIT_QUEUE_SIZE,
+        batch_size: int = AUDIT_BATCH_SIZE,
+        flush_interval: float = AUDIT_FLUSH_INTERVAL,
+    ):
+        self.insert_sql = insert_sql
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.batches = 0
+        self.failed = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self._managers: dict[Path, ConnectionManager] = {}
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def submit(self, path: Path, params: tuple) -> None:
+        self._ensure_started()
+        self._queue.put((Path(path), params))
+
+    # Espera só pelos eventos enfileirados antes da chamada: o marcador acorda o gravador, que grava o
+    # lote pendente na hora em vez de aguardar o intervalo, e novos envios de outras sessões não a prolongam.
+    def flush(self) -> None:
+        if self._thread is None or not self._thread.is_alive() or not self._queue.unfinished_tasks:
+            return
+        marker = _FlushMarker()
+        self._queue.put(marker)
+        marker.done.wait()
+
+    def close(self) -> None:
+        with self._lock:
+            thread = self._thread
+            if thread is None or not thread.is_alive():
+                return
+            self._queue.put(_STOP)
+            thread.join()
+            self._thread = None
+            for manager in self._managers.values():
+                manager.close_all()
+            self._managers.clear()
+
+    def stats(self) -> dict:
+        return {
+            "pending": self._queue.qsize(),
+            "written": self.written,
+            "batches": self.batches,
+            "failed": self.failed,
+        }
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            taken = 1
+            batch, markers = [], []
+            stop = item is _STOP
+            self._collect(item, batch, markers)
+            deadline = time.monotonic() + self.flush_interval
+            while not stop and not markers and len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                taken += 1
+                stop = item is _STOP
+                self._collect(item, batch, markers)
+            try:
+                self._write(batch)
+            finally:
+                for marker in markers:
+                    marker.done.set()
+                for _ in range(taken):
+                    self._queue.task_done()
+            if stop:
+                return
+
+    @staticmethod
+    def _collect(item, batch: list, markers: list) -> None:
+        if isinstance(item, _FlushMarker):
+            markers.append(item)
+        elif item is not _STOP:
+            batch.append(item)
+
+    def _write(self, batch: list) -> None:
+        by_path: dict[Path, list] = {}
+        for path, params in batch:
+            by_path.setdefault(path, []).append(params)
+        for path, rows in by_path.items():
+            manager = self._managers.get(path)
+            if manager is None:
+                manager = self._managers[path] = ConnectionManager(path)
+            try:
+                # Os eventos enfileirados não alteram KPIs nem o snapshot (ver add_event), então não
+                # avançam a geração de dados nem invalidam os caches de leitura.
+                with manager.transaction(bump_generation=False) as conn:
+                    conn.executemany(self.insert_sql, rows)
+            except Exception:
+                pass
+            else:
+                self.written += len(rows)
+                self.batches += 1
+                continue
+            self._write_one_by_one(manager, rows)
+
+    def _write_one_by_one(self, manager: ConnectionManager, rows: list) -> None:
+        for params in rows:
+            try:
+                with manager.transaction(bump_generation=False) as conn:
+                    conn.execute(self.insert_sql, params)
+                self.written += 1
+            except Exception:
+                self.failed += 1
+                logger.exception("Falha ao gravar evento de auditoria: %s", params[:2])
+
+
+def register_shutdown(writer: AuditWriter) -> AuditWriter:
+    atexit.register(writer.close)
+    return writer
@@ -0,0 +1,97 @@
+import threading
+from collections import OrderedDict
+
+CONTRACT_CACHE_SIZE = 512
+
+
+class ContractCache:
+    def __init__(self, maxsize: int = CONTRACT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.path: str | None = None
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.skipped = 0
+        self._epoch = 0
+        self._entries: OrderedDict[int, object] = OrderedDict()
+        self._numbers: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def bind(self, path: str) -> None:
+        if path != self.path:
+            with self._lock:
+                self._entries.clear()
+                self._numbers.clear()
+                self._epoch += 1
+                self.path = path
+
+    def get(self, contract_id: int, revision: int):
+        with self._lock:
+            contract = self._entries.get(contract_id)
+            if contract is None:
+                self.misses += 1
+                return None
+            if contract["revision"] != revision:
+                self._drop(contract_id)
+                self.stale += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(contract_id)
+            self.hits += 1
+            return contract
+
+    def get_by_number(self, contract_number: str, revision: int):
+        contract_id = self._numbers.get(contract_number)
+        if contract_id is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        return self.get(contract_id, revision)
+
+    def token(self) -> int:
+        with self._lock:
+            return self._epoch
+
+    def put(self, contract, token: int) -> None:
+        with self._lock:
+            if token != self._epoch:
+                # Houve invalidação durante a carga.
+                self.skipped += 1
+                return
+            self._drop(contract["id"])
+            self._entries[contract["id"]] = contract
+            self._numbers[contract["contract_number"]] = contract["id"]
+            while len(self._entries) > self.maxsize:
+                oldest_id, oldest = self._entries.popitem(last=False)
+                self._drop_number(oldest_id, oldest)
+
+    def invalidate(self, contract_id: int) -> None:
+        with self._lock:
+            self._epoch += 1
+            self._drop(contract_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+            self._numbers.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+                "skipped": self.skipped,
+            }
+
+    def _drop(self, contract_id: int) -> None:
+        contract = self._entries.pop(contract_id, None)
+        if contract is not None:
+            self._drop_number(contract_id, contract)
+
+    def _drop_number(self, contract_id: int, contract) -> None:
+        if self._numbers.get(contract["contract_number"]) == contract_id:
+            del self._numbers[contract["contract_number"]]
@@ -1,35 +1,156 @@
-from datetime import datetime
+import base64
+import json
+import re
+from datetime import datetime, timedelta
 from pathlib import Path
 
-from db.connection import get_connection
+from db.connection import connection, get_manager, in_transaction, on_commit, transaction
+from services.audit_writer import AUDIT_SYNC, AuditWriter, register_shutdown
+from models.contract import Contract, ContractSummary, contract_index
+from services.contract_cache import ContractCache
+from services.party_service import link_contract_parties, supplier_filter_clause
 from services.pdf_service import generate_contract_pdf
-from utils import dumps, loads, now_iso, can_transition
+from utils import dumps, now_iso, can_transition
+from utils.codec import decode_payload, encode_payload
 
 
-def next_contract_number() -> str:
-    year = datetime.now().year
-    conn = get_connection()
+CONTRACT_PREFIX = "LC"
+CONTRACT_NUMBER_RE = re.compile(r"^([A-Z]+)-(\d{4})-(\d+)$")
+
+
+def format_contract_number(year: int, seq: int, prefix: str = CONTRACT_PREFIX) -> str:
+    return f"{prefix}-{year}-{seq:03d}"
+
+
+def _allocate_sequence(conn, year: int, count: int = 1, prefix: str = CONTRACT_PREFIX) -> int:
+    conn.execute(
+        """
+        INSERT INTO contract_sequences (prefix, year, last_value) VALUES (?, ?, ?)
+        ON CONFLICT(prefix, year) DO UPDATE SET last_value = last_value + excluded.last_value
+        """,
+        (prefix, year, count),
+    )
     row = conn.execute(
-        "SELECT COUNT(*) AS total FROM contracts WHERE contract_number LIKE ?",
-        (f"LC-{year}-%",),
+        "SELECT last_value FROM contract_sequences WHERE prefix = ? AND year = ?", (prefix, year)
     ).fetchone()
-    conn.close()
-    seq = (row["total"] or 0) + 1
-    return f"LC-{year}-{seq:03d}"
+    return row["last_value"]
+
+
+# Números informados explicitamente (importação, cadastro com número fixo) também avançam o contador,
+# senão a próxima numeração automática do ano colide com eles.
+def _advance_sequences(conn, numbers, prefix: str = CONTRACT_PREFIX) -> None:
+    highest: dict[int, int] = {}
+    for number in numbers:
+        match = CONTRACT_NUMBER_RE.match(number or "")
+        if match and match.group(1) == prefix:
+            year, seq = int(match.group(2)), int(match.group(3))
+            highest[year] = max(highest.get(year, 0), seq)
+    if not highest:
+        return
+    conn.executemany(
+        """
+        INSERT INTO contract_sequences (prefix, year, last_value) VALUES (?, ?, ?)
+        ON CONFLICT(prefix, year) DO UPDATE SET last_value = MAX(last_value, excluded.last_value)
+        """,
+        [(prefix, year, seq) for year, seq in highest.items()],
+    )
 
 
-def _row_to_contract(row):
-    if row is None:
+def next_contract_number() -> str:
+    year = datetime.now().year
+    with connection() as conn:
+        row = conn.execute(
+            "SELECT last_value FROM contract_sequences WHERE prefix = ? AND year = ?",
+            (CONTRACT_PREFIX, year),
+        ).fetchone()
+    return format_contract_number(year, (row["last_value"] if row else 0) + 1)
+
+
+def reserve_contract_numbers(count: int, year: int | None = None) -> list[str]:
+    if count <= 0:
+        return []
+    year = year or datetime.now().year
+    with transaction() as conn:
+        last = _allocate_sequence(conn, year, count)
+    return [format_contract_number(year, seq) for seq in range(last - count + 1, last + 1)]
+
+
+SEARCH_COLUMNS = ("title", "scope_text", "clauses_text", "legal_notes")
+
+
+def _fts_query(text: str, columns: tuple[str, ...] | None = None) -> str | None:
+    tokens = re.findall(r"\w+", text or "")
+    if not tokens:
         return None
-    data = dict(row)
-    data["contractor"] = loads(data.pop("contractor_json"), {})
-    data["contracted"] = loads(data.pop("contracted_json"), {})
-    data["sla_targets"] = loads(data.pop("sla_targets_json"), {})
-    data["mandatory_clauses"] = loads(data.pop("mandatory_clauses_json"), [])
-    data["milestones"] = loads(data.pop("milestones_json"), [])
-    data["signatures"] = loads(data.pop("signatures_json"), {})
-    data["tags"] = loads(data.get("tags"), [])
-    return data
+    terms = " AND ".join(f'"{token}"*' for token in tokens)
+    cols = [c for c in (columns or ()) if c in SEARCH_COLUMNS]
+    if cols:
+        return f"{{{' '.join(cols)}}} : ({terms})"
+    return terms
+
+
+def _fetch_contracts(query: str, params=()) -> list[Contract]:
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.row_factory = None
+        cur.execute(query, params)
+        index = contract_index(tuple(d[0] for d in cur.description))
+        return [Contract(row, index) for row in cur.fetchall()]
+
+
+CONTRACT_INSERT_SQL = """
+    INSERT INTO contracts (
+        contract_number, type, title, department, cost_center, status, tags,
+        contractor_json, contracted_json, scope_text, deliverables_text,
+        sla_targets_json, acceptance_rules_text, clauses_text,
+        critical_clauses, critical_clauses_text, mandatory_clauses_json,
+        legal_notes, start_date, end_date, milestones_json, payment_terms,
+        reajust_index, penalties_text, penalties_value, signatures_json,
+        contract_value, executed_value, savings_value, roi_value,
+        request_date, signed_date, archived_date, digitally_signed,
+        strategic_alignment, revenue_contribution, operation_critical,
+        supplier_key_dependency, supplier_diversification_score,
+        maturity_score, governance_index, automation_pct,
+        default_probability, aggregate_financial_risk,
+        disruption_predictive_score, created_at, updated_at,
+        is_archived, is_finalized, version
+    ) VALUES (
+        ?, ?, ?, ?, ?, ?, ?,
+        ?, ?, ?, ?,
+        ?, ?, ?,
+        ?, ?, ?,
+        ?, ?, ?, ?, ?,
+        ?, ?, ?, ?,
+        ?, ?, ?, ?,
+        ?, ?, ?, ?,
+        ?, ?, ?,
+        ?, ?,
+        ?, ?, ?,
+        ?, ?,
+        ?, ?,
+        ?, ?, ?, ?
+    )
+"""
+
+
+def _contract_params(payload: dict, now: str) -> tuple:
+    return (
+        payload["contract_number"], payload["type"], payload["title"], payload["department"],
+        payload.get("cost_center"), payload["status"], dumps(payload.get("tags", [])),
+        dumps(payload.get("contractor")), dumps(payload.get("contracted")), payload.get("scope_text", ""), payload.get("deliverables_text", ""),
+        dumps(payload.get("sla_targets", {})), payload.get("acceptance_rules_text", ""), payload.get("clauses_text", ""),
+        int(bool(payload.get("critical_clauses", False))), payload.get("critical_clauses_text", ""), dumps(payload.get("mandatory_clauses", [])),
+        payload.get("legal_notes", ""), str(payload["start_date"]), str(payload["end_date"]), dumps(payload.get("milestones", [])), payload.get("payment_terms", ""),
+        payload.get("reajust_index", ""), payload.get("penalties_text", ""), float(payload.get("penalties_value", 0) or 0), dumps(payload.get("signatures", {})),
+        float(payload.get("contract_value", 0) or 0), float(payload.get("executed_value", 0) or 0), float(payload.get("savings_value", 0) or 0), float(payload.get("roi_value", 0) or 0),
+        payload.get("request_date"), payload.get("signed_date"), payload.get("archived_date"), int(bool(payload.get("digitally_signed", False))),
+        int(bool(payload.get("strategic_alignment", False))), float(payload.get("revenue_contribution", 0) or 0), int(bool(payload.get("operation_critical", False))),
+        int(bool(payload.get("supplier_key_dependency", False))), float(payload.get("supplier_diversification_score", 0) or 0),
+        float(payload.get("maturity_score", 0) or 0), float(payload.get("governance_index", 0) or 0), float(payload.get("automation_pct", 0) or 0),
+        float(payload.get("default_probability", 0) or 0), float(payload.get("aggregate_financial_risk", 0) or 0),
+        float(payload.get("disruption_predictive_score", 0) or 0), now, now,
+        0, int(payload["status"] == "Finalizado"), payload.get("version", 1)
+    )
 
 
 def create_contract(payload: dict) -> int:
@@ -37,74 +158,57 @@ def create_contract(payload: dict) -> int:
     payload.setdefault("status", "Gerado")
     payload.setdefault("version", 1)
 
-    conn = get_connection()
-    with conn:
-        cur = conn.execute(
-            """
-            INSERT INTO contracts (
-                contract_number, type, title, department, cost_center, status, tags,
-                contractor_json, contracted_json, scope_text, deliverables_text,
-                sla_targets_json, acceptance_rules_text, clauses_text,
-                critical_clauses, critical_clauses_text, mandatory_clauses_json,
-                legal_notes, start_date, end_date, milestones_json, payment_terms,
-                reajust_index, penalties_text, penalties_value, signatures_json,
-                contract_value, executed_value, savings_value, roi_value,
-                request_date, signed_date, archived_date, digitally_signed,
-                strategic_alignment, revenue_contribution, operation_critical,
-                supplier_key_dependency, supplier_diversification_score,
-                maturity_score, governance_index, automation_pct,
-                default_probability, aggregate_financial_risk,
-                disruption_predictive_score, created_at, updated_at,
-                is_archived, is_finalized, version
-            ) VALUES (
-                ?, ?, ?, ?, ?, ?, ?,
-                ?, ?, ?, ?,
-                ?, ?, ?,
-                ?, ?, ?,
-                ?, ?, ?, ?, ?,
-                ?, ?, ?, ?,
-                ?, ?, ?, ?,
-                ?, ?, ?, ?,
-                ?, ?, ?,
-                ?, ?,
-                ?, ?, ?,
-                ?, ?,
-                ?, ?,
-                ?, ?, ?, ?
-            )
-            """,
-            (
-                payload["contract_number"], payload["type"], payload["title"], payload["department"],
-                payload.get("cost_center"), payload["status"], dumps(payload.get("tags", [])),
-                dumps(payload.get("contractor")), dumps(payload.get("contracted")), payload.get("scope_text", ""), payload.get("deliverables_text", ""),
-                dumps(payload.get("sla_targets", {})), payload.get("acceptance_rules_text", ""), payload.get("clauses_text", ""),
-                int(bool(payload.get("critical_clauses", False))), payload.get("critical_clauses_text", ""), dumps(payload.get("mandatory_clauses", [])),
-                payload.get("legal_notes", ""), str(payload["start_date"]), str(payload["end_date"]), dumps(payload.get("milestones", [])), payload.get("payment_terms", ""),
-                payload.get("reajust_index", ""), payload.get("penalties_text", ""), float(payload.get("penalties_value", 0) or 0), dumps(payload.get("signatures", {})),
-                float(payload.get("contract_value", 0) or 0), float(payload.get("executed_value", 0) or 0), float(payload.get("savings_value", 0) or 0), float(payload.get("roi_value", 0) or 0),
-                payload.get("request_date"), payload.get("signed_date"), payload.get("archived_date"), int(bool(payload.get("digitally_signed", False))),
-                int(bool(payload.get("strategic_alignment", False))), float(payload.get("revenue_contribution", 0) or 0), int(bool(payload.get("operation_critical", False))),
-                int(bool(payload.get("supplier_key_dependency", False))), float(payload.get("supplier_diversification_score", 0) or 0),
-                float(payload.get("maturity_score", 0) or 0), float(payload.get("governance_index", 0) or 0), float(payload.get("automation_pct", 0) or 0),
-                float(payload.get("default_probability", 0) or 0), float(payload.get("aggregate_financial_risk", 0) or 0),
-                float(payload.get("disruption_predictive_score", 0) or 0), now, now,
-                0, int(payload["status"] == "Finalizado"), payload.get("version", 1)
-            ),
-        )
+    with transaction() as conn:
+        if not payload.get("contract_number"):
+            year = datetime.now().year
+            payload["contract_number"] = format_contract_number(year, _allocate_sequence(conn, year))
+        else:
+            _advance_sequences(conn, [payload["contract_number"]])
+        cur = conn.execute(CONTRACT_INSERT_SQL, _contract_params(payload, now))
         contract_id = cur.lastrowid
-    conn.close()
-    add_event(contract_id, "created", {"status": "Gerado"})
+        link_contract_parties(conn, contract_id, payload.get("contractor"), payload.get("contracted"))
+        _insert_event(conn, contract_id, "created", {"status": "Gerado"})
     return contract_id
 
 
-def add_event(contract_id: int, event_type: str, event_data: dict | None = None) -> None:
-    conn = get_connection()
-    with conn:
-        conn.execute(
-            "INSERT INTO contract_events (contract_id, event_type, event_data_json, created_at) VALUES (?, ?, ?, ?)",
-            (contract_id, event_type, dumps(event_data or {}), now_iso()),
-        )
-    conn.close()
+EVENT_INSERT_SQL = (
+    "INSERT INTO contract_events (contract_id, event_type, event_data_json, event_data_bin, created_at) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+
+
+def _event_params(contract_id: int, event_type: str, event_data: dict | None, now: str) -> tuple:
+    text, blob = encode_payload(event_data or {})
+    return contract_id, event_type, text, blob, now
+
+
+def _insert_event(conn, contract_id: int, event_type: str, event_data: dict | None = None) -> None:
+    conn.execute(EVENT_INSERT_SQL, _event_params(contract_id, event_type, event_data, now_iso()))
+
+
+_audit = register_shutdown(AuditWriter(EVENT_INSERT_SQL))
+
+
+# Eventos contados nos KPIs (frequência de alterações, via contract_event_rollups): gravados na hora e
+# avançando a geração de dados; os demais não invalidam os caches de KPIs nem o snapshot analítico.
+KPI_EVENT_TYPES = frozenset({"edit"})
+
+
+def add_event(contract_id: int, event_type: str, event_data: dict | None = None, sync: bool = False) -> None:
+    counted = event_type in KPI_EVENT_TYPES
+    if sync or counted or AUDIT_SYNC or in_transaction():
+        with transaction(bump_generation=counted) as conn:
+            _insert_event(conn, contract_id, event_type, event_data)
+        return
+    _audit.submit(get_manager().path, _event_params(contract_id, event_type, event_data, now_iso()))
+
+
+def flush_audit_events() -> None:
+    _audit.flush()
+
+
+def audit_writer_stats() -> dict:
+    return _audit.stats()
 
 
 def generate_and_attach_pdf(contract_id: int) -> str:
@@ -112,33 +216,123 @@ def generate_and_attach_pdf(contract_id: int) -> str:
     if not contract:
         raise ValueError("Contrato não encontrado")
     file_path = generate_contract_pdf(contract)
-    conn = get_connection()
-    with conn:
+    with transaction() as conn:
         conn.execute(
-            "UPDATE contracts SET pdf_path = ?, updated_at = ? WHERE id = ?",
+            "UPDATE contracts SET pdf_path = ?, updated_at = ?, revision = revision + 1 WHERE id = ?",
             (file_path, now_iso(), contract_id),
         )
-    conn.close()
-    add_event(contract_id, "pdf_generated", {"pdf_path": file_path, "version": contract.get("version", 1)})
+        _invalidate_contract(contract_id)
+        _insert_event(conn, contract_id, "pdf_generated", {"pdf_path": file_path, "version": contract.get("version", 1)})
     return file_path
 
 
+_cache = ContractCache()
+
+
+def _invalidate_contract(contract_id: int) -> None:
+    _cache.invalidate(contract_id)
+    on_commit(lambda: _cache.invalidate(contract_id))
+
+
+def contract_cache_stats() -> dict:
+    return _cache.stats()
+
+
+def _load_contract(query: str, key):
+    # Marca lida antes da carga: se uma escrita invalidar o cache enquanto a linha é lida, a
+    # linha (possivelmente anterior à escrita) não é guardada.
+    token = _cache.token()
+    rows = _fetch_contracts(query, (key,))
+    if not rows:
+        return None
+    _cache.put(rows[0], token)
+    return rows[0]
+
+
 def get_contract_by_id(contract_id: int):
-    conn = get_connection()
-    row = conn.execute("SELECT * FROM contracts WHERE id = ?", (contract_id,)).fetchone()
-    conn.close()
-    return _row_to_contract(row)
+    _cache.bind(str(get_manager().path))
+    with connection() as conn:
+        row = conn.execute("SELECT revision FROM contracts WHERE id = ?", (contract_id,)).fetchone()
+    if row is None:
+        _cache.invalidate(contract_id)
+        return None
+    cached = _cache.get(contract_id, row["revision"])
+    if cached is not None:
+        return cached
+    return _load_contract("SELECT * FROM contracts WHERE id = ?", contract_id)
 
 
 def get_contract_by_number(contract_number: str):
-    conn = get_connection()
-    row = conn.execute("SELECT * FROM contracts WHERE contract_number = ?", (contract_number,)).fetchone()
-    conn.close()
-    return _row_to_contract(row)
+    _cache.bind(str(get_manager().path))
+    with connection() as conn:
+        row = conn.execute(
+            "SELECT revision FROM contracts WHERE contract_number = ?", (contract_number,)
+        ).fetchone()
+    if row is None:
+        return None
+    cached = _cache.get_by_number(contract_number, row["revision"])
+    if cached is not None:
+        return cached
+    return _load_contract("SELECT * FROM contracts WHERE contract_number = ?", contract_number)
 
 
-def list_contracts(filters: dict | None = None, include_finalized: bool = True):
-    filters = filters or {}
+LOOKUP_CHUNK_SIZE = 5000
+
+
+def _id_chunks(ids) -> list[str]:
+    ids = sorted({int(i) for i in ids})
+    return [
+        json.dumps(ids[start:start + LOOKUP_CHUNK_SIZE]) for start in range(0, len(ids), LOOKUP_CHUNK_SIZE)
+    ]
+
+
+def get_contracts_by_ids(contract_ids) -> dict[int, Contract]:
+    out = {}
+    for chunk in _id_chunks(contract_ids):
+        for contract in _fetch_contracts(
+            "SELECT * FROM contracts WHERE id IN (SELECT value FROM json_each(?))", (chunk,)
+        ):
+            out[contract["id"]] = contract
+    return out
+
+
+def _rows_by_contract_id(select: str, table: str, contract_ids) -> dict[int, dict]:
+    out = {}
+    with connection() as conn:
+        for chunk in _id_chunks(contract_ids):
+            rows = conn.execute(
+                f"SELECT contract_id, {select} FROM {table} WHERE contract_id IN (SELECT value FROM json_each(?))",
+                (chunk,),
+            ).fetchall()
+            for row in rows:
+                out[row["contract_id"]] = dict(row)
+    return out
+
+
+def get_risk_by_contract_ids(contract_ids) -> dict[int, dict]:
+    return _rows_by_contract_id(
+        "risk_score, out_of_standard, nonconformities_count", "compliance_checks", contract_ids
+    )
+
+
+def get_supplier_perf_by_contract_ids(contract_ids) -> dict[int, dict]:
+    return _rows_by_contract_id(
+        "sla_pct, delivery_fail_rate, on_time_pct, quality_score, supplier_switch_rate, satisfaction_score",
+        "supplier_performance",
+        contract_ids,
+    )
+
+
+ALLOWED_ORDER = {
+    "created_at DESC": "created_at DESC",
+    "created_at ASC": "created_at ASC",
+    "end_date ASC": "end_date ASC",
+    "contract_value DESC": "contract_value DESC",
+    "status ASC": "status ASC",
+}
+
+
+def _filter_clauses(filters: dict, include_finalized: bool) -> tuple[list[str], list]:
     where = ["1=1"]
     params = []
 
@@ -153,8 +347,15 @@ def list_contracts(filters: dict | None = None, include_finalized: bool = True):
             params.append(filters[k])
 
     if filters.get("contracted"):
-        where.append("contracted_json LIKE ?")
-        params.append(f"%{filters['contracted']}%")
+        clause, clause_params = supplier_filter_clause(filters["contracted"])
+        where.append(clause)
+        params.extend(clause_params)
+
+    if filters.get("text"):
+        match = _fts_query(filters["text"])
+        if match:
+            where.append("id IN (SELECT rowid FROM contracts_fts WHERE contracts_fts MATCH ?)")
+            params.append(match)
 
     if filters.get("min_value") is not None:
         where.append("contract_value >= ?")
@@ -165,64 +366,306 @@ def list_contracts(filters: dict | None = None, include_finalized: bool = True):
         params.append(float(filters["max_value"]))
 
     if filters.get("date_from"):
-        where.append("date(created_at) >= date(?)")
+        where.append("created_at >= date(?)")
         params.append(str(filters["date_from"]))
 
     if filters.get("date_to"):
-        where.append("date(created_at) <= date(?)")
+        where.append("created_at < date(?, '+1 day')")
         params.append(str(filters["date_to"]))
 
+    if filters.get("end_from"):
+        where.append("end_date >= ?")
+        params.append(str(filters["end_from"]))
+
+    if filters.get("end_to"):
+        where.append("end_date <= ?")
+        params.append(str(filters["end_to"]))
+
     if not include_finalized:
         where.append("status <> 'Finalizado'")
 
-    order_by = filters.get("order_by", "created_at DESC")
-    allowed_order = {
-        "created_at DESC": "created_at DESC",
-        "created_at ASC": "created_at ASC",
-        "end_date ASC": "end_date ASC",
-        "contract_value DESC": "contract_value DESC",
-        "status ASC": "status ASC",
-    }
-    order_clause = allowed_order.get(order_by, "created_at DESC")
+    return where, params
+
+
+def contract_filter_sql(filters: dict | None = None, include_finalized: bool = True) -> tuple[str, list]:
+    where, params = _filter_clauses(filters or {}, include_finalized)
+    return " AND ".join(where), params
+
+
+def list_contracts(filters: dict | None = None, include_finalized: bool = True):
+    filters = filters or {}
+    where, params = _filter_clauses(filters, include_finalized)
+    order_clause = ALLOWED_ORDER.get(filters.get("order_by", "created_at DESC"), "created_at DESC")
 
     query = f"SELECT * FROM contracts WHERE {' AND '.join(where)} ORDER BY {order_clause}"
+    return _fetch_contracts(query, params)
+
+
+SUMMARY_COLUMNS = {
+    "id": "id",
+    "contract_number": "contract_number",
+    "type": "type",
+    "title": "title",
+    "department": "department",
+    "status": "status",
+    "contract_value": "contract_value",
+    "start_date": "start_date",
+    "end_date": "end_date",
+    "contracted_name": "COALESCE(json_extract(contracted_json, '$.name'), 'N/A') AS contracted_name",
+    "version": "version",
+    "created_at": "created_at",
+}
+
+
+def _summary_columns(columns: tuple[str, ...] | None) -> tuple[str, ...]:
+    if columns is None:
+        return tuple(SUMMARY_COLUMNS)
+    columns = ("id", *(c for c in columns if c != "id"))
+    unknown = [c for c in columns if c not in SUMMARY_COLUMNS]
+    if unknown:
+        raise ValueError(f"Colunas não suportadas: {', '.join(unknown)}")
+    return columns
+
+
+def list_contracts_summary(
+    filters: dict | None = None,
+    include_finalized: bool = True,
+    columns: tuple[str, ...] | None = None,
+) -> list[ContractSummary]:
+    filters = filters or {}
+    columns = _summary_columns(columns)
+
+    where, params = _filter_clauses(filters, include_finalized)
+    order_clause = ALLOWED_ORDER.get(filters.get("order_by", "created_at DESC"), "created_at DESC")
+    select = ", ".join(SUMMARY_COLUMNS[c] for c in columns)
+    query = f"SELECT {select} FROM contracts WHERE {' AND '.join(where)} ORDER BY {order_clause}"
+
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.row_factory = None
+        rows = cur.execute(query, params).fetchall()
+    return [ContractSummary(**dict(zip(columns, row))) for row in rows]
 
-    conn = get_connection()
-    rows = conn.execute(query, params).fetchall()
-    conn.close()
-    return [_row_to_contract(r) for r in rows]
+
+KEYSET_ORDER = {
+    "created_at DESC": (("created_at", "id"), "DESC"),
+    "created_at ASC": (("created_at", "id"), "ASC"),
+    "end_date ASC": (("end_date", "id"), "ASC"),
+    "contract_value DESC": (("contract_value", "id"), "DESC"),
+    "status ASC": (("status", "created_at", "id"), "ASC"),
+}
+
+DEFAULT_PAGE_SIZE = 50
+
+
+def encode_cursor(values: tuple) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(values)).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Cursor de paginação inválido") from None
+
+
+def list_contracts_page(
+    filters: dict | None = None,
+    include_finalized: bool = True,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+    columns: tuple[str, ...] | None = None,
+) -> tuple[list[ContractSummary], str | None]:
+    filters = filters or {}
+    order_by = filters.get("order_by", "created_at DESC")
+    keys, direction = KEYSET_ORDER.get(order_by, KEYSET_ORDER["created_at DESC"])
+
+    columns = _summary_columns(columns)
+    selected = columns + tuple(k for k in keys if k not in columns)
+
+    where, params = _filter_clauses(filters, include_finalized)
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != len(keys):
+            raise ValueError("Cursor de paginação inválido")
+        op = "<" if direction == "DESC" else ">"
+        where.append(f"({', '.join(keys)}) {op} ({', '.join('?' * len(keys))})")
+        params.extend(values)
+
+    select = ", ".join(SUMMARY_COLUMNS[c] for c in selected)
+    order_clause = ", ".join(f"{k} {direction}" for k in keys)
+    query = f"SELECT {select} FROM contracts WHERE {' AND '.join(where)} ORDER BY {order_clause} LIMIT ?"
+    params.append(int(page_size) + 1)
+
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.row_factory = None
+        rows = cur.execute(query, params).fetchall()
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = dict(zip(selected, rows[-1]))
+        next_cursor = encode_cursor(tuple(last[k] for k in keys))
+    width = len(columns)
+    return [ContractSummary(**dict(zip(columns, row[:width]))) for row in rows], next_cursor
+
+
+def count_contracts(filters: dict | None = None, include_finalized: bool = True) -> int:
+    where, params = _filter_clauses(filters or {}, include_finalized)
+    with connection() as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM contracts WHERE {' AND '.join(where)}", params).fetchone()[0]
+
+
+def contract_status_counts(include_finalized: bool = True) -> dict[str, int]:
+    where, params = _filter_clauses({}, include_finalized)
+    with connection() as conn:
+        rows = conn.execute(
+            f"SELECT status, COUNT(*) AS total FROM contracts WHERE {' AND '.join(where)} GROUP BY status", params
+        ).fetchall()
+    return {r["status"]: r["total"] for r in rows}
+
+
+def search_contract_ids(text: str, columns: tuple[str, ...] | None = None) -> list[int]:
+    match = _fts_query(text, columns)
+    if not match:
+        return []
+    with connection() as conn:
+        rows = conn.execute("SELECT rowid FROM contracts_fts WHERE contracts_fts MATCH ?", (match,)).fetchall()
+    return [r["rowid"] for r in rows]
+
+
+def search_contracts(text: str, limit: int = 50):
+    match = _fts_query(text)
+    if not match:
+        return []
+    return _fetch_contracts(
+        """
+        SELECT c.* FROM contracts_fts f
+        JOIN contracts c ON c.id = f.rowid
+        WHERE contracts_fts MATCH ?
+        ORDER BY f.rank
+        LIMIT ?
+        """,
+        (match, int(limit)),
+    )
 
 
 def list_kanban_contracts():
-    return list_contracts(filters={"order_by": "created_at DESC"}, include_finalized=False)
+    return list_contracts_summary(filters={"order_by": "created_at DESC"}, include_finalized=False)
 
 
-def update_status(contract_id: int, new_status: str, user: str = "system", admin_override: bool = False) -> None:
-    contract = get_contract_by_id(contract_id)
-    if not contract:
-        raise ValueError("Contrato não encontrado")
+class ConflictError(ValueError):
+    pass
 
-    if not can_transition(contract["status"], new_status, admin_override=admin_override):
-        raise ValueError("Transição de status inválida.")
 
-    is_finalized = int(new_status == "Finalizado")
-    conn = get_connection()
-    with conn:
-        conn.execute(
-            "UPDATE contracts SET status = ?, is_finalized = ?, updated_at = ? WHERE id = ?",
-            (new_status, is_finalized, now_iso(), contract_id),
+def _write_failed(conn, contract_id: int, message: str):
+    if conn.execute("SELECT 1 FROM contracts WHERE id = ?", (contract_id,)).fetchone():
+        return ConflictError(message)
+    return ValueError("Contrato não encontrado")
+
+
+def update_status(
+    contract_id: int,
+    new_status: str,
+    user: str = "system",
+    admin_override: bool = False,
+    expected_status: str | None = None,
+) -> None:
+    with transaction() as conn:
+        current = expected_status
+        if current is None:
+            row = conn.execute("SELECT status FROM contracts WHERE id = ?", (contract_id,)).fetchone()
+            if not row:
+                raise ValueError("Contrato não encontrado")
+            current = row["status"]
+
+        if not can_transition(current, new_status, admin_override=admin_override):
+            raise ValueError("Transição de status inválida.")
+
+        is_finalized = int(new_status == "Finalizado")
+        updated = conn.execute(
+            """
+            UPDATE contracts SET status = ?, is_finalized = ?, updated_at = ?, revision = revision + 1
+            WHERE id = ? AND status = ?
+            """,
+            (new_status, is_finalized, now_iso(), contract_id, current),
+        ).rowcount
+        if not updated:
+            raise _write_failed(conn, contract_id, "O status do contrato foi alterado por outra sessão.")
+        _invalidate_contract(contract_id)
+        _insert_event(
+            conn,
+            contract_id,
+            "status_change",
+            {"from": current, "to": new_status, "user": user, "admin_override": admin_override},
         )
-    conn.close()
-    add_event(
-        contract_id,
-        "status_change",
-        {"from": contract["status"], "to": new_status, "user": user, "admin_override": admin_override},
-    )
+
+
+def retry_on_conflict(contract_id: int, operation, attempts: int = 3):
+    for attempt in range(attempts):
+        contract = get_contract_by_id(contract_id)
+        if contract is None:
+            raise ValueError("Contrato não encontrado")
+        try:
+            return operation(contract)
+        except ConflictError:
+            if attempt == attempts - 1:
+                raise
+
+
+def update_status_bulk(
+    contract_ids, new_status: str, user: str = "system", admin_override: bool = False
+) -> list[dict]:
+    contract_ids = list(dict.fromkeys(int(i) for i in contract_ids))
+    rejected = []
+    accepted = []
+    with transaction() as conn:
+        current = {}
+        for chunk in _id_chunks(contract_ids):
+            for row in conn.execute(
+                "SELECT id, status FROM contracts WHERE id IN (SELECT value FROM json_each(?))", (chunk,)
+            ):
+                current[row["id"]] = row["status"]
+
+        for contract_id in contract_ids:
+            status = current.get(contract_id)
+            if status is None:
+                rejected.append({"id": contract_id, "status": None, "reason": "Contrato não encontrado"})
+            elif not can_transition(status, new_status, admin_override=admin_override):
+                rejected.append({"id": contract_id, "status": status, "reason": "Transição de status inválida."})
+            else:
+                accepted.append((contract_id, status))
+
+        if not accepted:
+            return rejected
+
+        now = now_iso()
+        is_finalized = int(new_status == "Finalizado")
+        conn.executemany(
+            "UPDATE contracts SET status = ?, is_finalized = ?, updated_at = ?, revision = revision + 1 "
+            "WHERE id = ? AND status = ?",
+            [(new_status, is_finalized, now, contract_id, status) for contract_id, status in accepted],
+        )
+        conn.executemany(
+            EVENT_INSERT_SQL,
+            [
+                _event_params(
+                    contract_id,
+                    "status_change",
+                    {"from": status, "to": new_status, "user": user, "admin_override": admin_override, "bulk": True},
+                    now,
+                )
+                for contract_id, status in accepted
+            ],
+        )
+        for contract_id, _status in accepted:
+            _invalidate_contract(contract_id)
+    return rejected
 
 
 def add_additive(contract_id: int, additive_date: str, additive_value: float, reason: str) -> None:
-    conn = get_connection()
-    with conn:
+    with transaction() as conn:
         conn.execute(
             """
             INSERT INTO contract_additives (contract_id, additive_date, additive_value, reason, created_at)
@@ -231,18 +674,14 @@ def add_additive(contract_id: int, additive_date: str, additive_value: float, re
             (contract_id, additive_date, float(additive_value), reason, now_iso()),
         )
         conn.execute(
-            "UPDATE contracts SET updated_at = ? WHERE id = ?",
+            "UPDATE contracts SET updated_at = ?, revision = revision + 1 WHERE id = ?",
             (now_iso(), contract_id),
         )
-    conn.close()
-    add_event(contract_id, "aditivo", {"date": additive_date, "value": additive_value, "reason": reason})
+        _invalidate_contract(contract_id)
+        _insert_event(conn, contract_id, "aditivo", {"date": additive_date, "value": additive_value, "reason": reason})
 
 
-def edit_contract(contract_id: int, updates: dict) -> None:
-    contract = get_contract_by_id(contract_id)
-    if not contract:
-        raise ValueError("Contrato não encontrado")
-
+def edit_contract(contract_id: int, updates: dict, expected_version: int | None = None) -> None:
     allowed = {
         "title": "title",
         "department": "department",
@@ -262,26 +701,26 @@ def edit_contract(contract_id: int, updates: dict) -> None:
             sets.append(f"{col} = ?")
             params.append(updates[k])
 
-    if not sets:
-        return
-
-    new_version = int(contract.get("version", 1)) + 1
-    sets += ["version = ?", "updated_at = ?"]
-    params += [new_version, now_iso(), contract_id]
-
-    conn = get_connection()
-    with conn:
-        conn.execute(f"UPDATE contracts SET {', '.join(sets)} WHERE id = ?", params)
-    conn.close()
-
-    add_event(contract_id, "edit", {"changes": updates, "new_version": new_version})
+    with transaction() as conn:
+        if not sets:
+            if not conn.execute("SELECT 1 FROM contracts WHERE id = ?", (contract_id,)).fetchone():
+                raise ValueError("Contrato não encontrado")
+            return
+
+        sets += ["version = COALESCE(version, 1) + 1", "updated_at = ?", "revision = revision + 1"]
+        params += [now_iso(), contract_id]
+        where = "id = ?"
+        if expected_version is not None:
+            where += " AND COALESCE(version, 1) = ?"
+            params.append(int(expected_version))
+        if not conn.execute(f"UPDATE contracts SET {', '.join(sets)} WHERE {where}", params).rowcount:
+            raise _write_failed(conn, contract_id, "O contrato foi editado por outra sessão; recarregue antes de salvar.")
+        row = conn.execute("SELECT version FROM contracts WHERE id = ?", (contract_id,)).fetchone()
+        _invalidate_contract(contract_id)
+        _insert_event(conn, contract_id, "edit", {"changes": updates, "new_version": row["version"]})
 
 
 def update_contract_activity(contract_id: int, updates: dict, event_type: str = "activity_update") -> None:
-    contract = get_contract_by_id(contract_id)
-    if not contract:
-        raise ValueError("Contrato não encontrado")
-
     allowed = {
         "executed_value": "executed_value",
         "savings_value": "savings_value",
@@ -313,18 +752,19 @@ def update_contract_activity(contract_id: int, updates: dict, event_type: str =
             params.append(updates[k])
             applied_changes[k] = updates[k]
 
-    if not sets:
-        return
-
-    sets.append("updated_at = ?")
-    params.append(now_iso())
-    params.append(contract_id)
+    with transaction() as conn:
+        if not sets:
+            if not conn.execute("SELECT 1 FROM contracts WHERE id = ?", (contract_id,)).fetchone():
+                raise ValueError("Contrato não encontrado")
+            return
 
-    conn = get_connection()
-    with conn:
-        conn.execute(f"UPDATE contracts SET {', '.join(sets)} WHERE id = ?", params)
-    conn.close()
-    add_event(contract_id, event_type, {"changes": applied_changes})
+        sets += ["updated_at = ?", "revision = revision + 1"]
+        params.append(now_iso())
+        params.append(contract_id)
+        if not conn.execute(f"UPDATE contracts SET {', '.join(sets)} WHERE id = ?", params).rowcount:
+            raise ValueError("Contrato não encontrado")
+        _invalidate_contract(contract_id)
+        _insert_event(conn, contract_id, event_type, {"changes": applied_changes})
 
 
 def download_pdf_bytes(contract_id: int) -> bytes | None:
@@ -337,119 +777,151 @@ def download_pdf_bytes(contract_id: int) -> bytes | None:
     return path.read_bytes()
 
 
+EVENT_COLUMNS = "id, contract_id, event_type, event_data_json, event_data_bin, created_at"
+EVENT_RETENTION_DAYS = 365
+ARCHIVE_BATCH_SIZE = 2000
+
+
+def archive_events(retention_days: int = EVENT_RETENTION_DAYS, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    flush_audit_events()
+    cutoff = (datetime.now() - timedelta(days=retention_days)).isoformat(timespec="seconds")
+    moved = 0
+    while True:
+        with transaction() as conn:
+            ids = [
+                r["id"]
+                for r in conn.execute(
+                    "SELECT id FROM contract_events WHERE created_at < ? ORDER BY created_at LIMIT ?",
+                    (cutoff, batch_size),
+                )
+            ]
+            if not ids:
+                return moved
+            chunk = json.dumps(ids)
+            conn.execute(
+                f"""
+                INSERT OR REPLACE INTO contract_events_archive ({EVENT_COLUMNS})
+                SELECT {EVENT_COLUMNS} FROM contract_events WHERE id IN (SELECT value FROM json_each(?))
+                """,
+                (chunk,),
+            )
+            conn.execute("DELETE FROM contract_events WHERE id IN (SELECT value FROM json_each(?))", (chunk,))
+        moved += len(ids)
+
+
 def get_contract_events(contract_id: int):
-    conn = get_connection()
-    rows = conn.execute(
-        "SELECT * FROM contract_events WHERE contract_id = ? ORDER BY created_at DESC", (contract_id,)
-    ).fetchall()
-    conn.close()
+    flush_audit_events()
+    with connection() as conn:
+        rows = conn.execute(
+            f"""
+            SELECT {EVENT_COLUMNS} FROM contract_events WHERE contract_id = ?
+            UNION ALL
+            SELECT {EVENT_COLUMNS} FROM contract_events_archive WHERE contract_id = ?
+            ORDER BY created_at DESC
+            """,
+            (contract_id, contract_id),
+        ).fetchall()
     out = []
     for row in rows:
         item = dict(row)
-        item["event_data"] = loads(item.pop("event_data_json"), {})
+        item["event_data"] = decode_payload(item.pop("event_data_json"), item.pop("event_data_bin"), {})
         out.append(item)
     return out
 
 
-def upsert_compliance(contract_id: int, payload: dict):
-    conn = get_connection()
+COMPLIANCE_UPSERT_SQL = """
+    INSERT INTO compliance_checks (
+        contract_id, mandatory_clauses_score, out_of_standard, has_guarantee,
+        has_insurance, regulatory_compliance_pct, audited, nonconformities_count,
+        risk_score, created_at, updated_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(contract_id) DO UPDATE SET
+        mandatory_clauses_score = excluded.mandatory_clauses_score,
+        out_of_standard = excluded.out_of_standard,
+        has_guarantee = excluded.has_guarantee,
+        has_insurance = excluded.has_insurance,
+        regulatory_compliance_pct = excluded.regulatory_compliance_pct,
+        audited = excluded.audited,
+        nonconformities_count = excluded.nonconformities_count,
+        risk_score = excluded.risk_score,
+        updated_at = excluded.updated_at
+"""
+
+SUPPLIER_PERFORMANCE_UPSERT_SQL = """
+    INSERT INTO supplier_performance (
+        contract_id, sla_pct, delivery_fail_rate, on_time_pct, quality_score,
+        supplier_switch_rate, satisfaction_score, created_at, updated_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(contract_id) DO UPDATE SET
+        sla_pct = excluded.sla_pct,
+        delivery_fail_rate = excluded.delivery_fail_rate,
+        on_time_pct = excluded.on_time_pct,
+        quality_score = excluded.quality_score,
+        supplier_switch_rate = excluded.supplier_switch_rate,
+        satisfaction_score = excluded.satisfaction_score,
+        updated_at = excluded.updated_at
+"""
+
+
+def _compliance_params(contract_id: int, payload: dict, now: str) -> tuple:
+    return (
+        contract_id,
+        payload.get("mandatory_clauses_score", 0),
+        int(bool(payload.get("out_of_standard", False))),
+        int(bool(payload.get("has_guarantee", False))),
+        int(bool(payload.get("has_insurance", False))),
+        payload.get("regulatory_compliance_pct", 0),
+        int(bool(payload.get("audited", False))),
+        payload.get("nonconformities_count", 0),
+        payload.get("risk_score", 0),
+        now,
+        now,
+    )
+
+
+def _supplier_performance_params(contract_id: int, payload: dict, now: str) -> tuple:
+    return (
+        contract_id,
+        payload.get("sla_pct", 0),
+        payload.get("delivery_fail_rate", 0),
+        payload.get("on_time_pct", 0),
+        payload.get("quality_score", 0),
+        payload.get("supplier_switch_rate", 0),
+        payload.get("satisfaction_score", 0),
+        now,
+        now,
+    )
+
+
+def upsert_compliance(contract_id: int, payload: dict, event_type: str | None = None, event_data: dict | None = None):
+    with transaction() as conn:
+        conn.execute(COMPLIANCE_UPSERT_SQL, _compliance_params(contract_id, payload, now_iso()))
+        if event_type:
+            _insert_event(conn, contract_id, event_type, event_data)
+
+
+def upsert_compliance_bulk(rows) -> int:
     now = now_iso()
-    existing = conn.execute(
-        "SELECT id FROM compliance_checks WHERE contract_id = ?", (contract_id,)
-    ).fetchone()
-    with conn:
-        if existing:
-            conn.execute(
-                """
-                UPDATE compliance_checks
-                SET mandatory_clauses_score = ?, out_of_standard = ?, has_guarantee = ?,
-                    has_insurance = ?, regulatory_compliance_pct = ?, audited = ?,
-                    nonconformities_count = ?, risk_score = ?, updated_at = ?
-                WHERE contract_id = ?
-                """,
-                (
-                    payload.get("mandatory_clauses_score", 0),
-                    int(bool(payload.get("out_of_standard", False))),
-                    int(bool(payload.get("has_guarantee", False))),
-                    int(bool(payload.get("has_insurance", False))),
-                    payload.get("regulatory_compliance_pct", 0),
-                    int(bool(payload.get("audited", False))),
-                    payload.get("nonconformities_count", 0),
-                    payload.get("risk_score", 0),
-                    now,
-                    contract_id,
-                ),
-            )
-        else:
-            conn.execute(
-                """
-                INSERT INTO compliance_checks (
-                    contract_id, mandatory_clauses_score, out_of_standard, has_guarantee,
-                    has_insurance, regulatory_compliance_pct, audited, nonconformities_count,
-                    risk_score, created_at, updated_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    contract_id,
-                    payload.get("mandatory_clauses_score", 0),
-                    int(bool(payload.get("out_of_standard", False))),
-                    int(bool(payload.get("has_guarantee", False))),
-                    int(bool(payload.get("has_insurance", False))),
-                    payload.get("regulatory_compliance_pct", 0),
-                    int(bool(payload.get("audited", False))),
-                    payload.get("nonconformities_count", 0),
-                    payload.get("risk_score", 0),
-                    now,
-                    now,
-                ),
-            )
-    conn.close()
+    params = [_compliance_params(contract_id, payload, now) for contract_id, payload in rows]
+    with transaction() as conn:
+        conn.executemany(COMPLIANCE_UPSERT_SQL, params)
+    return len(params)
 
 
-def upsert_supplier_performance(contract_id: int, payload: dict):
-    conn = get_connection()
+def upsert_supplier_performance(
+    contract_id: int, payload: dict, event_type: str | None = None, event_data: dict | None = None
+):
+    with transaction() as conn:
+        conn.execute(
+            SUPPLIER_PERFORMANCE_UPSERT_SQL, _supplier_performance_params(contract_id, payload, now_iso())
+        )
+        if event_type:
+            _insert_event(conn, contract_id, event_type, event_data)
+
+
+def upsert_supplier_performance_bulk(rows) -> int:
     now = now_iso()
-    existing = conn.execute(
-        "SELECT id FROM supplier_performance WHERE contract_id = ?", (contract_id,)
-    ).fetchone()
-    with conn:
-        if existing:
-            conn.execute(
-                """
-                UPDATE supplier_performance
-                SET sla_pct = ?, delivery_fail_rate = ?, on_time_pct = ?, quality_score = ?,
-                    supplier_switch_rate = ?, satisfaction_score = ?, updated_at = ?
-                WHERE contract_id = ?
-                """,
-                (
-                    payload.get("sla_pct", 0),
-                    payload.get("delivery_fail_rate", 0),
-                    payload.get("on_time_pct", 0),
-                    payload.get("quality_score", 0),
-                    payload.get("supplier_switch_rate", 0),
-                    payload.get("satisfaction_score", 0),
-                    now,
-                    contract_id,
-                ),
-            )
-        else:
-            conn.execute(
-                """
-                INSERT INTO supplier_performance (
-                    contract_id, sla_pct, delivery_fail_rate, on_time_pct, quality_score,
-                    supplier_switch_rate, satisfaction_score, created_at, updated_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    contract_id,
-                    payload.get("sla_pct", 0),
-                    payload.get("delivery_fail_rate", 0),
-                    payload.get("on_time_pct", 0),
-                    payload.get("quality_score", 0),
-                    payload.get("supplier_switch_rate", 0),
-                    payload.get("satisfaction_score", 0),
-                    now,
-                    now,
-                ),
-            )
-    conn.close()
+    params = [_supplier_performance_params(contract_id, payload, now) for contract_id, payload in rows]
+    with transaction() as conn:
+        conn.executemany(SUPPLIER_PERFORMANCE_UPSERT_SQL, params)
+    return len(params)
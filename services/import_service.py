@@ -0,0 +1,281 @@
+import csv
+import json
+from datetime import date, datetime
+from pathlib import Path
+
+from db.connection import connection, transaction
+from services.contract_service import (
+    CONTRACT_INSERT_SQL,
+    EVENT_INSERT_SQL,
+    _advance_sequences,
+    _allocate_sequence,
+    _contract_params,
+    _event_params,
+    format_contract_number,
+)
+from services.party_service import PARTY_ROLES, link_contract_parties
+from utils import now_iso, validate_required_fields
+from utils.validators import ALLOWED_STATUS_FLOW
+
+
+IMPORT_CHUNK_SIZE = 500
+
+PARTY_FIELDS = ("name", "doc", "email", "address", "phone")
+DATE_FIELDS = ("start_date", "end_date")
+LIST_FIELDS = ("tags", "mandatory_clauses")
+JSON_FIELDS = ("sla_targets", "milestones", "signatures")
+NUMERIC_FIELDS = (
+    "contract_value", "executed_value", "savings_value", "roi_value", "penalties_value",
+    "revenue_contribution", "supplier_diversification_score", "maturity_score", "governance_index",
+    "automation_pct", "default_probability", "aggregate_financial_risk", "disruption_predictive_score",
+)
+BOOLEAN_FIELDS = (
+    "critical_clauses", "digitally_signed", "strategic_alignment", "operation_critical", "supplier_key_dependency",
+)
+TRUE_VALUES = {"1", "true", "sim", "s", "yes", "y", "x"}
+
+REPORT_COLUMNS = ["registro", "contract_number", "title", "erros"]
+
+
+def iter_records(path: Path):
+    path = Path(path)
+    if path.suffix.lower() == ".csv":
+        with path.open(newline="", encoding="utf-8-sig") as fh:
+            for position, record in enumerate(csv.DictReader(fh), start=1):
+                yield position, record, None
+        return
+
+    with path.open(encoding="utf-8") as fh:
+        for position, line in enumerate(fh, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as exc:
+                yield position, None, f"JSON inválido: {exc.msg}"
+                continue
+            if not isinstance(record, dict):
+                yield position, None, "JSON inválido: registro deve ser um objeto"
+                continue
+            yield position, record, None
+
+
+def _blank(value) -> bool:
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def record_to_payload(record: dict) -> tuple[dict, list[str]]:
+    payload = {k: v for k, v in record.items() if k and not _blank(v)}
+    errors = []
+
+    for role in PARTY_ROLES:
+        party = payload.get(role) if isinstance(payload.get(role), dict) else {}
+        for field in PARTY_FIELDS:
+            value = payload.pop(f"{role}_{field}", None)
+            if value is not None:
+                party[field] = value.strip() if isinstance(value, str) else value
+        payload[role] = party
+
+    for field in DATE_FIELDS:
+        value = payload.get(field)
+        if isinstance(value, str):
+            try:
+                payload[field] = date.fromisoformat(value.strip()[:10])
+            except ValueError:
+                errors.append(f"Data inválida em {field}: {value}")
+
+    for field in NUMERIC_FIELDS:
+        value = payload.get(field)
+        if isinstance(value, str):
+            try:
+                payload[field] = float(value.strip().replace(",", "."))
+            except ValueError:
+                errors.append(f"Valor numérico inválido em {field}: {value}")
+
+    for field in BOOLEAN_FIELDS:
+        value = payload.get(field)
+        if isinstance(value, str):
+            payload[field] = value.strip().lower() in TRUE_VALUES
+
+    for field in LIST_FIELDS:
+        value = payload.get(field)
+        if isinstance(value, str):
+            payload[field] = [item.strip() for item in value.replace(";", ",").split(",") if item.strip()]
+
+    for field in JSON_FIELDS:
+        value = payload.get(field)
+        if isinstance(value, str):
+            try:
+                payload[field] = json.loads(value)
+            except json.JSONDecodeError:
+                errors.append(f"JSON inválido em {field}")
+
+    payload.setdefault("status", "Gerado")
+    payload.setdefault("version", 1)
+    if payload["status"] not in ALLOWED_STATUS_FLOW:
+        errors.append(f"Status inválido: {payload['status']}")
+
+    errors.extend(validate_required_fields(payload))
+    return payload, errors
+
+
+def load_checkpoint(source: str) -> dict:
+    with connection() as conn:
+        row = conn.execute(
+            "SELECT position, imported, failed FROM import_checkpoints WHERE source = ?", (source,)
+        ).fetchone()
+    return dict(row) if row else {"position": 0, "imported": 0, "failed": 0}
+
+
+def reset_checkpoint(source: str) -> None:
+    with transaction() as conn:
+        conn.execute("DELETE FROM import_checkpoints WHERE source = ?", (source,))
+
+
+def _existing_numbers(conn, numbers: list[str]) -> set[str]:
+    if not numbers:
+        return set()
+    rows = conn.execute(
+        "SELECT contract_number FROM contracts WHERE contract_number IN (SELECT value FROM json_each(?))",
+        (json.dumps(numbers),),
+    ).fetchall()
+    return {r["contract_number"] for r in rows}
+
+
+def _write_chunk(conn, rows: list[tuple[int, dict]]) -> tuple[int, list]:
+    failures = []
+    given = [payload["contract_number"] for _position, payload in rows if payload.get("contract_number")]
+    taken = _existing_numbers(conn, given)
+
+    accepted = []
+    for position, payload in rows:
+        number = payload.get("contract_number")
+        if number and number in taken:
+            failures.append((position, payload, [f"Número de contrato já existe: {number}"]))
+            continue
+        if number:
+            taken.add(number)
+        accepted.append(payload)
+
+    _advance_sequences(conn, [payload["contract_number"] for payload in accepted if payload.get("contract_number")])
+    missing = [payload for payload in accepted if not payload.get("contract_number")]
+    if missing:
+        year = datetime.now().year
+        last = _allocate_sequence(conn, year, len(missing))
+        for seq, payload in enumerate(missing, start=last - len(missing) + 1):
+            payload["contract_number"] = format_contract_number(year, seq)
+
+    if not accepted:
+        return 0, failures
+
+    now = now_iso()
+    conn.executemany(CONTRACT_INSERT_SQL, [_contract_params(payload, now) for payload in accepted])
+
+    numbers = [payload["contract_number"] for payload in accepted]
+    ids = {
+        r["contract_number"]: r["id"]
+        for r in conn.execute(
+            "SELECT id, contract_number FROM contracts WHERE contract_number IN (SELECT value FROM json_each(?))",
+            (json.dumps(numbers),),
+        ).fetchall()
+    }
+    conn.executemany(
+        EVENT_INSERT_SQL,
+        [
+            _event_params(ids[payload["contract_number"]], "created", {"status": payload["status"], "source": "import"}, now)
+            for payload in accepted
+        ],
+    )
+    for payload in accepted:
+        link_contract_parties(conn, ids[payload["contract_number"]], payload.get("contractor"), payload.get("contracted"))
+    return len(accepted), failures
+
+
+def _save_checkpoint(conn, source: str, state: dict) -> None:
+    conn.execute(
+        """
+        INSERT INTO import_checkpoints (source, position, imported, failed, updated_at)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(source) DO UPDATE SET
+            position = excluded.position,
+            imported = excluded.imported,
+            failed = excluded.failed,
+            updated_at = excluded.updated_at
+        """,
+        (source, state["position"], state["imported"], state["failed"], now_iso()),
+    )
+
+
+def _write_report(writer, failures: list) -> None:
+    for position, payload, errors in sorted(failures, key=lambda item: item[0]):
+        payload = payload or {}
+        writer.writerow([position, payload.get("contract_number", ""), payload.get("title", ""), "; ".join(errors)])
+
+
+def import_contracts(
+    path: Path | str,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    report_path: Path | str | None = None,
+    restart: bool = False,
+) -> dict:
+    path = Path(path)
+    if path.suffix.lower() not in (".csv", ".jsonl"):
+        raise ValueError("Formato não suportado: use arquivos .csv ou .jsonl")
+
+    source = str(path.resolve())
+    if restart:
+        reset_checkpoint(source)
+    state = load_checkpoint(source)
+    resume_from = state["position"]
+
+    report_path = Path(report_path) if report_path else path.with_name(f"{path.name}.erros.csv")
+    resuming = resume_from > 0 and report_path.exists()
+    with report_path.open("a" if resuming else "w", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh)
+        if not resuming:
+            writer.writerow(REPORT_COLUMNS)
+
+        pending: list[tuple[int, dict]] = []
+        failures: list = []
+        batch_count = 0
+        last_position = resume_from
+
+        def flush():
+            nonlocal pending, failures, batch_count
+            with transaction() as conn:
+                imported, chunk_failures = _write_chunk(conn, pending)
+                failures.extend(chunk_failures)
+                state["position"] = last_position
+                state["imported"] += imported
+                state["failed"] += len(failures)
+                _save_checkpoint(conn, source, state)
+            _write_report(writer, failures)
+            fh.flush()
+            pending, failures, batch_count = [], [], 0
+
+        for position, record, error in iter_records(path):
+            if position <= resume_from:
+                continue
+            last_position = position
+            batch_count += 1
+            if error:
+                failures.append((position, None, [error]))
+            else:
+                payload, errors = record_to_payload(record)
+                if errors:
+                    failures.append((position, payload, errors))
+                else:
+                    pending.append((position, payload))
+            if batch_count >= chunk_size:
+                flush()
+
+        if batch_count:
+            flush()
+
+    return {
+        "imported": state["imported"],
+        "failed": state["failed"],
+        "position": state["position"],
+        "resumed_from": resume_from,
+        "report_path": str(report_path),
+    }
@@ -0,0 +1,85 @@
+import threading
+import time
+from collections import OrderedDict
+
+KPI_CACHE_SIZE = 64
+KPI_CACHE_TTL = 300.0
+
+
+class KpiCache:
+    def __init__(self, maxsize: int = KPI_CACHE_SIZE, ttl: float = KPI_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path: str | None = None
+        self.generation: int | None = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+        self.invalidations = 0
+        self._entries: OrderedDict[tuple, tuple[float, object]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def bind(self, path: str) -> None:
+        if path != self.path:
+            with self._lock:
+                self._entries.clear()
+                self.path = path
+                self.generation = None
+
+    def get(self, key: tuple, generation: int):
+        with self._lock:
+            if generation != self.generation:
+                self._invalidate(generation)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, value = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: tuple, generation: int, value) -> None:
+        with self._lock:
+            if self.generation is not None and generation < self.generation:
+                # Calculado antes de uma escrita já observada por outra leitura.
+                return
+            if generation != self.generation:
+                self._invalidate(generation)
+            self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic(), value)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expired": self.expired,
+                "invalidations": self.invalidations,
+                "generation": self.generation,
+                "hit_ratio": self.hits / lookups if lookups else None,
+            }
+
+    def _invalidate(self, generation: int) -> None:
+        if self._entries:
+            self.invalidations += 1
+            self._entries.clear()
+        self.generation = generation
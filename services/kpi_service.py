@@ -1,24 +1,151 @@
-from datetime import date
+import copy
+import json
+import os
+from dataclasses import dataclass
+from datetime import date, timedelta
 
 import pandas as pd
 
-from db.connection import get_connection
+from db.connection import connection, data_generation, get_manager, transaction
+from db.migrations import (
+    KPI_DIMENSIONS,
+    KPI_GROUPS_BUILD_SQL,
+    KPI_MEASURES,
+    KPI_MEASURES_BUILD_SQL,
+    days_between_sql,
+    epoch_sql,
+)
+from services.analytics_snapshot import read_contract_frames
+from services.contract_service import contract_filter_sql, flush_audit_events, search_contract_ids
+from services.kpi_cache import KpiCache
+from services.party_service import contracts_by_supplier
+from utils import now_iso
 
 
-def _fetch_df(query: str) -> pd.DataFrame:
-    conn = get_connection()
-    df = pd.read_sql_query(query, conn)
-    conn.close()
+def _fetch_df(query: str, params=()) -> pd.DataFrame:
+    with connection() as conn:
+        df = pd.read_sql_query(query, conn, params=params)
     return df
 
 
-def load_base_data():
-    contracts = _fetch_df("SELECT * FROM contracts")
-    additives = _fetch_df("SELECT * FROM contract_additives")
-    compliance = _fetch_df("SELECT * FROM compliance_checks")
-    supplier = _fetch_df("SELECT * FROM supplier_performance")
-    events = _fetch_df("SELECT * FROM contract_events")
-    return contracts, additives, compliance, supplier, events
+LITIGATION_TERMS = "litígio"
+
+
+def count_litigation(contract_ids=None) -> int:
+    found = set(search_contract_ids(LITIGATION_TERMS, columns=("legal_notes",)))
+    if contract_ids is None:
+        return len(found)
+    return len(found & set(contract_ids))
+
+
+def _scope(column: str, contract_ids) -> tuple[str, dict]:
+    if contract_ids is None:
+        return "1 = 1", {}
+    return f"{column} IN (SELECT value FROM json_each(:ids))", {"ids": json.dumps(sorted({int(i) for i in contract_ids}))}
+
+
+CHART_COLUMNS = {
+    "contract_additives": ("contract_id", "additive_value"),
+    "compliance_checks": ("contract_id", "risk_score", "audited", "out_of_standard"),
+    "supplier_performance": (
+        "contract_id", "sla_pct", "on_time_pct", "quality_score", "delivery_fail_rate", "satisfaction_score",
+    ),
+}
+
+
+def load_chart_data(contract_ids=None):
+    frames = []
+    for table, columns in CHART_COLUMNS.items():
+        where, params = _scope("contract_id", contract_ids)
+        frames.append(_fetch_df(f"SELECT {', '.join(columns)} FROM {table} WHERE {where}", params))
+    return tuple(frames)
+
+
+# Colunas de contratos usadas pelos gráficos do Dashboard; o restante (JSON, textos) não é lido.
+SNAPSHOT_COLUMNS = (
+    "id", "type", "department", "status", "created_at", "start_date", "end_date", "signed_date", "archived_date",
+    "contract_value", "executed_value", "savings_value", "penalties_value", "roi_value", "critical_clauses",
+    "digitally_signed", "strategic_alignment", "revenue_contribution", "supplier_diversification_score",
+    "maturity_score", "governance_index", "automation_pct", "default_probability", "disruption_predictive_score",
+    "aggregate_financial_risk",
+)
+SNAPSHOT_DATE_COLUMNS = ("created_at", "start_date", "end_date", "signed_date", "archived_date")
+
+# "columnar" lê contratos e tabelas dos gráficos do snapshot Parquet (services/analytics_snapshot.py),
+# atualizado de forma incremental antes da leitura se o banco mudou desde a exportação; sem snapshot
+# exportado, sem pyarrow ou com filtros que dependem do SQLite, volta para o banco.
+SNAPSHOT_SOURCES = ("sqlite", "columnar")
+SNAPSHOT_SOURCE = os.environ.get("LOGICHAIN_SNAPSHOT_SOURCE", "sqlite")
+if SNAPSHOT_SOURCE not in SNAPSHOT_SOURCES:
+    SNAPSHOT_SOURCE = "sqlite"
+
+
+@dataclass
+class PortfolioSnapshot:
+    filters: dict
+    contracts: pd.DataFrame
+    additives: pd.DataFrame
+    compliance: pd.DataFrame
+    supplier: pd.DataFrame
+    source: str = "sqlite"
+    exported_at: str | None = None
+    generation: int | None = None
+
+    @property
+    def empty(self) -> bool:
+        return self.contracts.empty
+
+    @property
+    def contract_ids(self) -> list[int]:
+        return self.contracts["id"].tolist()
+
+    def kpi_scope(self) -> dict:
+        # Filtros só por dimensão são atendidos por kpi_contract_groups; os demais exigem a lista de ids.
+        others = {k: v for k, v in self.filters.items() if k not in KPI_DIMENSIONS}
+        if contract_filter_sql(others)[0] != "1=1":
+            return {"contract_ids": self.contract_ids}
+        return {"group": {k: self.filters[k] for k in KPI_DIMENSIONS if self.filters.get(k)}}
+
+
+def _derive_snapshot_columns(contracts: pd.DataFrame) -> None:
+    for column in SNAPSHOT_DATE_COLUMNS:
+        contracts[column] = pd.to_datetime(contracts[column], errors="coerce")
+    contracts["vigencia_dias"] = (contracts["end_date"] - contracts["start_date"]).dt.days
+    contracts["lead_time_dias"] = (contracts["signed_date"] - contracts["created_at"]).dt.days
+    contracts["archive_time_dias"] = (contracts["archived_date"] - contracts["created_at"]).dt.days
+    contracts["dias_para_vencer"] = (contracts["end_date"] - pd.Timestamp.today().normalize()).dt.days
+
+
+def _load_columnar_snapshot(filters: dict) -> PortfolioSnapshot | None:
+    frames = read_contract_frames(filters, SNAPSHOT_COLUMNS, CHART_COLUMNS)
+    if frames is None:
+        return None
+    manifest, contracts, (additives, compliance, supplier) = frames
+    _derive_snapshot_columns(contracts)
+    return PortfolioSnapshot(
+        filters, contracts, additives, compliance, supplier, "columnar", manifest["exported_at"], manifest["generation"]
+    )
+
+
+def load_portfolio_snapshot(filters: dict | None = None, source: str | None = None) -> PortfolioSnapshot:
+    filters = dict(filters or {})
+    source = source or SNAPSHOT_SOURCE
+    if source not in SNAPSHOT_SOURCES:
+        raise ValueError(f"Origem de snapshot inválida: {source}")
+    if source == "columnar":
+        snapshot = _load_columnar_snapshot(filters)
+        if snapshot is not None:
+            return snapshot
+
+    where, params = contract_filter_sql(filters)
+    contracts = _fetch_df(
+        f"SELECT {', '.join(SNAPSHOT_COLUMNS)} FROM contracts WHERE {where} ORDER BY created_at DESC", params
+    )
+    _derive_snapshot_columns(contracts)
+
+    chart_ids = None if where == "1=1" else contracts["id"].tolist()
+    additives, compliance, supplier = load_chart_data(chart_ids)
+    return PortfolioSnapshot(filters, contracts, additives, compliance, supplier)
 
 
 def _pct(numerator, denominator):
@@ -27,95 +154,377 @@ def _pct(numerator, denominator):
     return (numerator / denominator) * 100
 
 
-def calculate_kpis(expiring_days: int = 30, contract_ids: list[int] | None = None):
-    contracts, additives, compliance, supplier, events = load_base_data()
-    if contract_ids is not None:
-        ids_set = set(contract_ids)
-        contracts = contracts[contracts["id"].isin(ids_set)] if not contracts.empty else contracts
-        additives = additives[additives["contract_id"].isin(ids_set)] if not additives.empty else additives
-        compliance = compliance[compliance["contract_id"].isin(ids_set)] if not compliance.empty else compliance
-        supplier = supplier[supplier["contract_id"].isin(ids_set)] if not supplier.empty else supplier
-        events = events[events["contract_id"].isin(ids_set)] if not events.empty else events
+CONTRACT_TOTALS_SQL = f"""
+    SELECT
+      COUNT(*) AS total,
+      TOTAL(contract_value) AS total_value,
+      TOTAL(executed_value) AS executed_total,
+      TOTAL(savings_value) AS savings_total,
+      TOTAL(penalties_value) AS multas_total,
+      AVG(COALESCE(contract_value, 0)) AS avg_contract_value,
+      AVG(COALESCE(roi_value, 0)) AS roi_mean,
+      TOTAL(status IN ('Assinado', 'Protocolado', 'Em vigor')) AS active,
+      AVG({days_between_sql("end_date", "start_date")}) AS avg_term,
+      TOTAL({epoch_sql("end_date")} BETWEEN {epoch_sql(":today")} AND {epoch_sql(":until")}) AS expiring,
+      TOTAL({epoch_sql("end_date")} < {epoch_sql(":today")} AND status IS NOT 'Finalizado') AS expired_no_renew,
+      AVG({days_between_sql("signed_date", "created_at")}) AS lead_time,
+      TOTAL(status = 'Finalizado') AS finalized,
+      TOTAL(critical_clauses) AS critical_clauses,
+      AVG({days_between_sql("archived_date", "created_at")}) AS avg_archive,
+      TOTAL(digitally_signed) AS digitally_signed,
+      TOTAL(strategic_alignment) AS strategic,
+      TOTAL(revenue_contribution) AS rev_contrib,
+      TOTAL(operation_critical) AS operation_critical,
+      AVG(COALESCE(supplier_key_dependency, 0)) AS key_dependency,
+      AVG(COALESCE(supplier_diversification_score, 0)) AS diversification,
+      AVG(COALESCE(maturity_score, 0)) AS maturity,
+      AVG(COALESCE(governance_index, 0)) AS governance,
+      AVG(COALESCE(automation_pct, 0)) AS automation,
+      AVG(COALESCE(default_probability, 0)) AS default_prob,
+      TOTAL(aggregate_financial_risk) AS agg_risk,
+      AVG(COALESCE(disruption_predictive_score, 0)) AS disruption
+    FROM contracts
+    WHERE {{where}}
+"""
+
+ADDITIVE_TOTALS_SQL = """
+    SELECT COUNT(*) AS total, COUNT(DISTINCT contract_id) AS contracts, TOTAL(additive_value) AS additive_total
+    FROM contract_additives
+    WHERE {where}
+"""
+
+COMPLIANCE_TOTALS_SQL = """
+    SELECT
+      COUNT(*) AS total,
+      AVG(COALESCE(mandatory_clauses_score, 0)) AS mandatory_score,
+      TOTAL(out_of_standard) AS out_standard,
+      TOTAL(COALESCE(has_guarantee, 0) = 0) AS guarantee_missing,
+      AVG(COALESCE(risk_score, 0)) AS risk_idx,
+      AVG(COALESCE(regulatory_compliance_pct, 0)) AS reg_compliance,
+      TOTAL(audited) AS audited,
+      TOTAL(nonconformities_count) AS nonconf
+    FROM compliance_checks
+    WHERE {where}
+"""
+
+SUPPLIER_TOTALS_SQL = """
+    SELECT
+      COUNT(*) AS total,
+      AVG(COALESCE(sla_pct, 0)) AS sla,
+      AVG(COALESCE(delivery_fail_rate, 0)) AS delivery_fail,
+      AVG(COALESCE(on_time_pct, 0)) AS on_time,
+      AVG(COALESCE(quality_score, 0)) AS quality,
+      AVG(COALESCE(supplier_switch_rate, 0)) AS switch_rate,
+      AVG(COALESCE(satisfaction_score, 0)) AS satisfaction
+    FROM supplier_performance
+    WHERE {where}
+"""
+
+
+def _totals(conn, sql: str, contract_ids, column: str = "contract_id", **extra):
+    where, params = _scope(column, contract_ids)
+    return conn.execute(sql.format(where=where), {**params, **extra}).fetchone()
+
+
+def _value_counts(conn, column: str, contract_ids) -> dict:
+    where, params = _scope("id", contract_ids)
+    rows = conn.execute(
+        f"""
+        SELECT {column} AS key, COUNT(*) AS total FROM contracts
+        WHERE {where} AND {column} IS NOT NULL
+        GROUP BY {column} ORDER BY total DESC, MIN(id)
+        """,
+        params,
+    ).fetchall()
+    return {r["key"]: r["total"] for r in rows}
+
+
+def _value_by_department(conn, contract_ids) -> dict:
+    where, params = _scope("id", contract_ids)
+    rows = conn.execute(
+        f"""
+        SELECT department, TOTAL(contract_value) AS total FROM contracts
+        WHERE {where} AND department IS NOT NULL
+        GROUP BY department ORDER BY department
+        """,
+        params,
+    ).fetchall()
+    return {r["department"]: r["total"] for r in rows}
+
+
+def _edit_count(conn, contract_ids) -> int:
+    where, params = _scope("contract_id", contract_ids)
+    row = conn.execute(
+        f"SELECT TOTAL(event_count) AS total FROM contract_event_rollups WHERE event_type = 'edit' AND {where}",
+        params,
+    ).fetchone()
+    return int(row["total"])
+
+
+def _raw_totals(conn, contract_ids, today: date, until: date) -> dict | None:
+    c = _totals(conn, CONTRACT_TOTALS_SQL, contract_ids, column="id", today=today.isoformat(), until=until.isoformat())
+    if not c["total"]:
+        return None
+    return {
+        "c": c,
+        "additives": _totals(conn, ADDITIVE_TOTALS_SQL, contract_ids),
+        "compliance": _totals(conn, COMPLIANCE_TOTALS_SQL, contract_ids),
+        "supplier": _totals(conn, SUPPLIER_TOTALS_SQL, contract_ids),
+        "supplier_counts": contracts_by_supplier(contract_ids),
+        "litigation": count_litigation(contract_ids),
+        "edits": _edit_count(conn, contract_ids),
+        "type_counts": _value_counts(conn, "type", contract_ids),
+        "department_counts": _value_counts(conn, "department", contract_ids),
+        "status_counts": _value_counts(conn, "status", contract_ids),
+        "value_by_department": _value_by_department(conn, contract_ids),
+    }
+
+
+def _group_scope(group: dict) -> tuple[str, dict]:
+    unknown = [d for d in group if d not in KPI_DIMENSIONS]
+    if unknown:
+        raise ValueError(f"Dimensões de KPI não suportadas: {', '.join(unknown)}")
+    return " AND ".join(["1 = 1", *(f"{d} = :{d}" for d in group)]), dict(group)
+
+
+def _group_counts(conn, column: str, measure: str, group: dict, order: str) -> dict:
+    where, params = _group_scope(group)
+    rows = conn.execute(
+        f"""
+        SELECT {column} AS key, TOTAL({measure}) AS total FROM kpi_contract_groups
+        WHERE {where} GROUP BY {column} HAVING TOTAL(contracts) > 0 ORDER BY {order}
+        """,
+        params,
+    ).fetchall()
+    return {r["key"]: r["total"] for r in rows}
+
+
+def _ratio(numerator, denominator):
+    return numerator / denominator if denominator else None
+
 
-    if contracts.empty:
+def _aggregate_totals(conn, group: dict, today: date, until: date) -> dict | None:
+    where, params = _group_scope(group)
+    g = conn.execute(
+        f"SELECT {', '.join(f'TOTAL({name}) AS {name}' for name in KPI_MEASURES)} FROM kpi_contract_groups WHERE {where}",
+        params,
+    ).fetchone()
+    total = int(g["contracts"])
+    if not total:
+        return None
+
+    expiry = conn.execute(
+        f"""
+        SELECT
+          (SELECT COUNT(*) FROM contracts
+           WHERE {where} AND end_date BETWEEN :today AND :until_bound
+             AND {epoch_sql("end_date")} BETWEEN {epoch_sql(":today")} AND {epoch_sql(":until")}) AS expiring,
+          (SELECT COUNT(*) FROM contracts
+           WHERE {where} AND end_date < :today AND status <> 'Finalizado'
+             AND {epoch_sql("end_date")} < {epoch_sql(":today")}) AS expired_no_renew
+        """,
+        {**params, "today": today.isoformat(), "until": until.isoformat(), "until_bound": f"{until.isoformat()}T23:59:59"},
+    ).fetchone()
+
+    contract_ids = None
+    if group:
+        contract_ids = [r["id"] for r in conn.execute(f"SELECT id FROM contracts WHERE {where}", params)]
+
+    type_counts = {k: int(v) for k, v in _group_counts(conn, "type", "contracts", group, "total DESC, key").items()}
+    return {
+        "c": {
+            "total": total,
+            "total_value": g["contract_value"],
+            "executed_total": g["executed_value"],
+            "savings_total": g["savings_value"],
+            "multas_total": g["penalties_value"],
+            "avg_contract_value": g["contract_value"] / total,
+            "roi_mean": g["roi_value"] / total,
+            "active": g["active_contracts"],
+            "avg_term": _ratio(g["term_days"], g["term_count"]),
+            "expiring": expiry["expiring"],
+            "expired_no_renew": expiry["expired_no_renew"],
+            "lead_time": _ratio(g["lead_days"], g["lead_count"]),
+            "finalized": g["finalized_contracts"],
+            "critical_clauses": g["critical_clauses"],
+            "avg_archive": _ratio(g["archive_days"], g["archive_count"]),
+            "digitally_signed": g["digitally_signed"],
+            "strategic": g["strategic_alignment"],
+            "rev_contrib": g["revenue_contribution"],
+            "operation_critical": g["operation_critical"],
+            "key_dependency": g["supplier_key_dependency"] / total,
+            "diversification": g["supplier_diversification_score"] / total,
+            "maturity": g["maturity_score"] / total,
+            "governance": g["governance_index"] / total,
+            "automation": g["automation_pct"] / total,
+            "default_prob": g["default_probability"] / total,
+            "agg_risk": g["aggregate_financial_risk"],
+            "disruption": g["disruption_predictive_score"] / total,
+        },
+        "additives": {
+            "total": int(g["additives"]),
+            "contracts": int(g["additive_contracts"]),
+            "additive_total": g["additive_value"],
+        },
+        "compliance": {
+            "total": int(g["compliance_checks"]),
+            "mandatory_score": _ratio(g["mandatory_clauses_score"], g["compliance_checks"]),
+            "out_standard": g["out_of_standard"],
+            "guarantee_missing": g["guarantee_missing"],
+            "risk_idx": _ratio(g["risk_score"], g["compliance_checks"]),
+            "reg_compliance": _ratio(g["regulatory_compliance_pct"], g["compliance_checks"]),
+            "audited": g["audited"],
+            "nonconf": g["nonconformities_count"],
+        },
+        "supplier": {
+            "total": int(g["supplier_rows"]),
+            "sla": _ratio(g["sla_pct"], g["supplier_rows"]),
+            "delivery_fail": _ratio(g["delivery_fail_rate"], g["supplier_rows"]),
+            "on_time": _ratio(g["on_time_pct"], g["supplier_rows"]),
+            "quality": _ratio(g["quality_score"], g["supplier_rows"]),
+            "switch_rate": _ratio(g["supplier_switch_rate"], g["supplier_rows"]),
+            "satisfaction": _ratio(g["satisfaction_score"], g["supplier_rows"]),
+        },
+        "supplier_counts": contracts_by_supplier(contract_ids),
+        "litigation": count_litigation(contract_ids),
+        "edits": int(g["edits"]),
+        "type_counts": type_counts,
+        "department_counts": {
+            k: int(v) for k, v in _group_counts(conn, "department", "contracts", group, "total DESC, key").items()
+        },
+        "status_counts": {k: int(v) for k, v in _group_counts(conn, "status", "contracts", group, "total DESC, key").items()},
+        "value_by_department": _group_counts(conn, "department", "contract_value", group, "key"),
+    }
+
+
+_kpi_cache = KpiCache()
+
+
+def kpi_cache_stats() -> dict:
+    return _kpi_cache.stats()
+
+
+def clear_kpi_cache() -> None:
+    _kpi_cache.clear()
+
+
+def _cache_key(expiring_days: int, contract_ids, group: dict | None, today: date) -> tuple:
+    ids = None if contract_ids is None else tuple(sorted({int(i) for i in contract_ids}))
+    return (int(expiring_days), today.isoformat(), ids, tuple(sorted((group or {}).items())))
+
+
+def calculate_kpis(
+    expiring_days: int = 30,
+    contract_ids: list[int] | None = None,
+    group: dict | None = None,
+    snapshot: PortfolioSnapshot | None = None,
+):
+    if snapshot is not None:
+        return calculate_kpis(expiring_days, **snapshot.kpi_scope())
+    flush_audit_events()
+    today = date.today()
+    # A geração só muda quando alguma transação altera linhas, então sessões diferentes com os
+    # mesmos filtros reaproveitam o resultado até a próxima escrita real.
+    _kpi_cache.bind(str(get_manager().path))
+    generation = data_generation()
+    key = _cache_key(expiring_days, contract_ids, group, today)
+    cached = _kpi_cache.get(key, generation)
+    if cached is not None:
+        return copy.deepcopy(cached)
+
+    result = _compute_kpis(today, expiring_days, contract_ids, group)
+    _kpi_cache.put(key, generation, copy.deepcopy(result))
+    return result
+
+
+def _compute_kpis(today: date, expiring_days: int, contract_ids, group: dict | None):
+    until = today + timedelta(days=expiring_days)
+    with connection() as conn:
+        if contract_ids is None:
+            totals = _aggregate_totals(conn, group or {}, today, until)
+        else:
+            totals = _raw_totals(conn, contract_ids, today, until)
+    if totals is None:
         return {"has_data": False, "sections": {}, "charts": {}}
+    return _build_kpis(**totals)
 
-    contracts["start_date"] = pd.to_datetime(contracts["start_date"], errors="coerce")
-    contracts["end_date"] = pd.to_datetime(contracts["end_date"], errors="coerce")
-    contracts["created_at"] = pd.to_datetime(contracts["created_at"], errors="coerce")
-    today = pd.Timestamp(date.today())
 
-    total_value = float(contracts["contract_value"].fillna(0).sum())
-    executed_total = float(contracts["executed_value"].fillna(0).sum())
-    savings_total = float(contracts["savings_value"].fillna(0).sum())
-    multas_total = float(contracts["penalties_value"].fillna(0).sum())
-    aditivos_total = float(additives["additive_value"].fillna(0).sum()) if not additives.empty else 0.0
+def _build_kpis(
+    c,
+    additives,
+    compliance,
+    supplier,
+    supplier_counts,
+    litigation,
+    edits,
+    type_counts,
+    department_counts,
+    status_counts,
+    value_by_department,
+):
+    total = c["total"]
+    total_value = c["total_value"]
+    aditivos_total = additives["additive_total"] if additives["total"] else 0.0
 
-    avg_contract_value = float(contracts["contract_value"].fillna(0).mean()) if len(contracts) else None
+    avg_contract_value = c["avg_contract_value"]
     price_variation = _pct(aditivos_total, total_value)
-    roi_mean = float(contracts["roi_value"].fillna(0).mean()) if len(contracts) else None
-
-    active_contracts = contracts[contracts["status"].isin(["Assinado", "Protocolado", "Em vigor"])]
-    duration_days = (contracts["end_date"] - contracts["start_date"]).dt.days
-    avg_term = float(duration_days.dropna().mean()) if duration_days.notna().any() else None
-    expiring = contracts[(contracts["end_date"] >= today) & (contracts["end_date"] <= today + pd.Timedelta(days=expiring_days))]
-    expiring_pct = _pct(len(expiring), len(contracts))
-    expired_no_renew = contracts[(contracts["end_date"] < today) & (contracts["status"] != "Finalizado")]
-
-    signed = contracts[contracts["signed_date"].notna()].copy()
-    signed["signed_date"] = pd.to_datetime(signed["signed_date"], errors="coerce")
-    lead_days = (signed["signed_date"] - signed["created_at"]).dt.days
-    lead_time = float(lead_days.dropna().mean()) if lead_days.notna().any() else None
-
-    renewal_rate = _pct(len(contracts[contracts["status"] == "Finalizado"]), len(contracts))
-
-    if not compliance.empty:
-        mandatory_score = float(compliance["mandatory_clauses_score"].fillna(0).mean())
-        out_standard = int(compliance["out_of_standard"].fillna(0).sum())
-        guarantee_missing = int((compliance["has_guarantee"].fillna(0) == 0).sum())
-        risk_idx = float(compliance["risk_score"].fillna(0).mean())
-        reg_compliance = float(compliance["regulatory_compliance_pct"].fillna(0).mean())
-        audited_pct = _pct(int(compliance["audited"].fillna(0).sum()), len(compliance))
-        nonconf = int(compliance["nonconformities_count"].fillna(0).sum())
+    roi_mean = c["roi_mean"]
+
+    avg_term = c["avg_term"]
+    expiring_pct = _pct(int(c["expiring"]), total)
+    lead_time = c["lead_time"]
+
+    unlinked = total - sum(supplier_counts.values())
+    if unlinked > 0:
+        supplier_counts["N/A"] = unlinked
+
+    renewal_rate = _pct(int(c["finalized"]), total)
+
+    if compliance["total"]:
+        mandatory_score = compliance["mandatory_score"]
+        out_standard = int(compliance["out_standard"])
+        guarantee_missing = int(compliance["guarantee_missing"])
+        risk_idx = compliance["risk_idx"]
+        reg_compliance = compliance["reg_compliance"]
+        audited_pct = _pct(int(compliance["audited"]), compliance["total"])
+        nonconf = int(compliance["nonconf"])
     else:
         mandatory_score = out_standard = guarantee_missing = risk_idx = reg_compliance = audited_pct = nonconf = None
 
-    add_freq = float(additives.groupby("contract_id").size().mean()) if not additives.empty else None
+    add_freq = additives["total"] / additives["contracts"] if additives["total"] else None
 
-    if not supplier.empty:
-        sla = float(supplier["sla_pct"].fillna(0).mean())
-        delivery_fail = float(supplier["delivery_fail_rate"].fillna(0).mean())
-        on_time = float(supplier["on_time_pct"].fillna(0).mean())
-        quality = float(supplier["quality_score"].fillna(0).mean())
-        switch_rate = float(supplier["supplier_switch_rate"].fillna(0).mean())
-        satisfaction = float(supplier["satisfaction_score"].fillna(0).mean())
+    if supplier["total"]:
+        sla = supplier["sla"]
+        delivery_fail = supplier["delivery_fail"]
+        on_time = supplier["on_time"]
+        quality = supplier["quality"]
+        switch_rate = supplier["switch_rate"]
+        satisfaction = supplier["satisfaction"]
     else:
         sla = delivery_fail = on_time = quality = switch_rate = satisfaction = None
 
-    litigation = int((contracts.get("legal_notes", pd.Series([], dtype="string")).fillna("").str.contains("litígio|litigio", case=False, regex=True)).sum())
-    critical_clauses = int(contracts["critical_clauses"].fillna(0).sum())
-
-    archived = contracts[contracts["archived_date"].notna()].copy()
-    archived["archived_date"] = pd.to_datetime(archived["archived_date"], errors="coerce")
-    archive_time = (archived["archived_date"] - archived["created_at"]).dt.days
-    avg_archive = float(archive_time.dropna().mean()) if archive_time.notna().any() else None
+    critical_clauses = int(c["critical_clauses"])
+    avg_archive = c["avg_archive"]
 
     created_to_signed = lead_time
     signed_time = lead_time
-    digital_signed_pct = _pct(int(contracts["digitally_signed"].fillna(0).sum()), len(contracts))
+    digital_signed_pct = _pct(int(c["digitally_signed"]), total)
 
-    strategic = _pct(int(contracts["strategic_alignment"].fillna(0).sum()), len(contracts))
-    rev_contrib = float(contracts["revenue_contribution"].fillna(0).sum())
-    operation_critical = _pct(int(contracts["operation_critical"].fillna(0).sum()), len(contracts))
-    key_dependency = float(contracts["supplier_key_dependency"].fillna(0).mean() * 100)
-    diversification = float(contracts["supplier_diversification_score"].fillna(0).mean())
+    strategic = _pct(int(c["strategic"]), total)
+    rev_contrib = c["rev_contrib"]
+    operation_critical = _pct(int(c["operation_critical"]), total)
+    key_dependency = c["key_dependency"] * 100
+    diversification = c["diversification"]
 
-    maturity = float(contracts["maturity_score"].fillna(0).mean())
-    governance = float(contracts["governance_index"].fillna(0).mean())
-    automation = float(contracts["automation_pct"].fillna(0).mean())
-    default_prob = float(contracts["default_probability"].fillna(0).mean())
-    agg_risk = float(contracts["aggregate_financial_risk"].fillna(0).sum())
-    disruption = float(contracts["disruption_predictive_score"].fillna(0).mean())
+    maturity = c["maturity"]
+    governance = c["governance"]
+    automation = c["automation"]
+    default_prob = c["default_prob"]
+    agg_risk = c["agg_risk"]
+    disruption = c["disruption"]
+    multas_total = c["multas_total"]
+    savings_total = c["savings_total"]
+    executed_total = c["executed_total"]
 
     sections = {
         "financeiro": {
@@ -134,7 +543,7 @@ def calculate_kpis(expiring_days: int = 30, contract_ids: list[int] | None = Non
             "atraso_medio_execucao_dias": None,
             "lead_time_contratacao_dias": lead_time,
             "taxa_renovacao": renewal_rate,
-            "vencidos_sem_renovacao": len(expired_no_renew),
+            "vencidos_sem_renovacao": int(c["expired_no_renew"]),
             "cumprimento_cronograma_pct": None,
         },
         "compliance_risco": {
@@ -147,12 +556,12 @@ def calculate_kpis(expiring_days: int = 30, contract_ids: list[int] | None = Non
             "nao_conformidades": nonconf,
         },
         "operacionais": {
-            "total_ativos": len(active_contracts),
-            "contratos_por_tipo": contracts["type"].value_counts().to_dict(),
-            "contratos_por_fornecedor": contracts["contracted_json"].fillna("").str.extract(r'"name"\s*:\s*"([^"]+)"')[0].fillna("N/A").value_counts().to_dict(),
-            "contratos_por_departamento": contracts["department"].value_counts().to_dict(),
+            "total_ativos": int(c["active"]),
+            "contratos_por_tipo": type_counts,
+            "contratos_por_fornecedor": supplier_counts,
+            "contratos_por_departamento": department_counts,
             "volume_aditivos_medio": add_freq,
-            "frequencia_alteracoes": int((events["event_type"] == "edit").sum()) if not events.empty else 0,
+            "frequencia_alteracoes": edits,
             "digitalizados_vs_fisicos_pct": digital_signed_pct,
         },
         "fornecedor": {
@@ -197,8 +606,168 @@ def calculate_kpis(expiring_days: int = 30, contract_ids: list[int] | None = Non
     }
 
     charts = {
-        "status_dist": contracts["status"].value_counts().to_dict(),
-        "tipo_dist": contracts["type"].value_counts().to_dict(),
-        "valor_por_departamento": contracts.groupby("department")["contract_value"].sum().to_dict(),
+        "status_dist": status_counts,
+        "tipo_dist": type_counts,
+        "valor_por_departamento": value_by_department,
     }
     return {"has_data": True, "sections": sections, "charts": charts}
+
+
+KPI_AGGREGATE_TOLERANCE = 1e-6
+
+
+def rebuild_kpi_aggregates() -> int:
+    with transaction() as conn:
+        conn.execute("DELETE FROM kpi_contract_groups")
+        conn.execute("DELETE FROM kpi_contract_measures")
+        conn.execute(KPI_MEASURES_BUILD_SQL)
+        conn.execute(KPI_GROUPS_BUILD_SQL)
+        return conn.execute("SELECT COUNT(*) AS total FROM kpi_contract_groups").fetchone()["total"]
+
+
+def check_kpi_aggregates(tolerance: float = KPI_AGGREGATE_TOLERANCE) -> list[str]:
+    flush_audit_events()
+    with connection() as conn:
+        dims = ", ".join(KPI_DIMENSIONS)
+        measures = ", ".join(KPI_MEASURES)
+        fresh = {
+            tuple(r[: len(KPI_DIMENSIONS)]): r[len(KPI_DIMENSIONS):]
+            for r in conn.execute(
+                f"""
+                SELECT {dims}, {', '.join(f'TOTAL({name})' for name in KPI_MEASURES)}
+                FROM kpi_contract_measures_source GROUP BY {dims}
+                """
+            )
+        }
+        stored = {
+            tuple(r[: len(KPI_DIMENSIONS)]): r[len(KPI_DIMENSIONS):]
+            for r in conn.execute(f"SELECT {dims}, {measures} FROM kpi_contract_groups WHERE contracts <> 0")
+        }
+        problems = []
+        for key in sorted(fresh.keys() | stored.keys()):
+            label = " / ".join(key)
+            if key not in stored:
+                problems.append(f"{label}: grupo ausente em kpi_contract_groups")
+                continue
+            if key not in fresh:
+                problems.append(f"{label}: grupo sem contratos nas tabelas de origem")
+                continue
+            for name, expected, actual in zip(KPI_MEASURES, fresh[key], stored[key]):
+                if abs(expected - actual) > tolerance * max(1.0, abs(expected)):
+                    problems.append(f"{label}: {name} = {actual} (recalculado: {expected})")
+
+        stale = conn.execute(
+            """
+            SELECT
+              (SELECT COUNT(*) FROM (
+                 SELECT * FROM kpi_contract_measures_source EXCEPT SELECT * FROM kpi_contract_measures))
+              + (SELECT COUNT(*) FROM (
+                 SELECT * FROM kpi_contract_measures EXCEPT SELECT * FROM kpi_contract_measures_source)) AS total
+            """
+        ).fetchone()["total"]
+        if stale:
+            problems.append(f"kpi_contract_measures: {stale} linha(s) divergentes das tabelas de origem")
+        return problems
+
+
+KPI_HISTORY_DAYS = 365
+KPI_HISTORY_PORTFOLIO = ""
+
+
+def _history_rows(day: str, department: str, result: dict) -> list[tuple]:
+    return [
+        (department, section, metric, day, float(value))
+        for section, values in result["sections"].items()
+        for metric, value in values.items()
+        if isinstance(value, (int, float))
+    ]
+
+
+def _store_history(day: date, mode: str, results: dict[str, dict]) -> int:
+    rows = [row for department, result in results.items() for row in _history_rows(day.isoformat(), department, result)]
+    with transaction() as conn:
+        conn.execute("DELETE FROM kpi_history WHERE snapshot_date = ?", (day.isoformat(),))
+        conn.executemany(
+            "INSERT INTO kpi_history (department, section, metric, snapshot_date, value) VALUES (?, ?, ?, ?, ?)", rows
+        )
+        conn.execute(
+            """
+            INSERT INTO kpi_history_days (snapshot_date, mode, recorded_at) VALUES (?, ?, ?)
+            ON CONFLICT(snapshot_date) DO UPDATE SET mode = excluded.mode, recorded_at = excluded.recorded_at
+            """,
+            (day.isoformat(), mode, now_iso()),
+        )
+    return len(rows)
+
+
+def record_kpi_history(expiring_days: int = 30) -> int:
+    # O dia corrente vem dos agregados; regravar no mesmo dia substitui a fotografia anterior.
+    with connection() as conn:
+        departments = [
+            r["department"]
+            for r in conn.execute(
+                "SELECT department FROM kpi_contract_groups GROUP BY department HAVING TOTAL(contracts) > 0"
+            )
+        ]
+    results = {KPI_HISTORY_PORTFOLIO: calculate_kpis(expiring_days)}
+    for department in departments:
+        results[department] = calculate_kpis(expiring_days, group={"department": department})
+    return _store_history(date.today(), "live", results)
+
+
+def backfill_kpi_history(
+    days: int = KPI_HISTORY_DAYS,
+    end: date | None = None,
+    overwrite: bool = False,
+    expiring_days: int = 30,
+) -> list[str]:
+    # Reconstrução aproximada: contratos já criados em cada dia, com os valores atuais e vencimentos
+    # calculados a partir daquela data. Dias gravados ao vivo nunca são substituídos.
+    end = end or date.today() - timedelta(days=1)
+    with connection() as conn:
+        recorded = {
+            r["snapshot_date"]: r["mode"]
+            for r in conn.execute(
+                "SELECT snapshot_date, mode FROM kpi_history_days WHERE snapshot_date BETWEEN ? AND ?",
+                ((end - timedelta(days=days - 1)).isoformat(), end.isoformat()),
+            )
+        }
+        filled = []
+        for offset in range(days - 1, -1, -1):
+            day = end - timedelta(days=offset)
+            mode = recorded.get(day.isoformat())
+            if mode == "live" or (mode is not None and not overwrite):
+                continue
+            contracts = conn.execute(
+                "SELECT id, department FROM contracts WHERE created_at < ?", ((day + timedelta(days=1)).isoformat(),)
+            ).fetchall()
+            scopes = {KPI_HISTORY_PORTFOLIO: [r["id"] for r in contracts]}
+            for r in contracts:
+                scopes.setdefault(r["department"], []).append(r["id"])
+            results = {}
+            for department, ids in scopes.items():
+                result = _compute_kpis(day, expiring_days, ids, None)
+                if result["has_data"]:
+                    results[department] = result
+            _store_history(day, "backfill", results)
+            filled.append(day.isoformat())
+        return filled
+
+
+def load_kpi_history(
+    metrics: tuple[tuple[str, str], ...],
+    department: str = KPI_HISTORY_PORTFOLIO,
+    days: int = KPI_HISTORY_DAYS,
+) -> dict[tuple[str, str], pd.DataFrame]:
+    since = (date.today() - timedelta(days=days)).isoformat()
+    history = {}
+    for section, metric in metrics:
+        history[(section, metric)] = _fetch_df(
+            """
+            SELECT snapshot_date, value FROM kpi_history
+            WHERE department = ? AND section = ? AND metric = ? AND snapshot_date >= ?
+            ORDER BY snapshot_date
+            """,
+            (department, section, metric, since),
+        )
+    return history
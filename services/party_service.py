@@ -0,0 +1,113 @@
+import re
+import sqlite3
+
+from db.connection import connection
+from utils import loads, now_iso
+
+
+PARTY_ROLES = ("contractor", "contracted")
+
+
+def normalize_doc(doc: str | None) -> str:
+    return re.sub(r"\D", "", doc or "")
+
+
+def party_key(party: dict | None) -> str | None:
+    party = party or {}
+    digits = normalize_doc(party.get("doc"))
+    if digits:
+        return digits
+    name = (party.get("name") or "").strip().lower()
+    return f"nome:{name}" if name else None
+
+
+# A parte é identificada por (documento, nome): o mesmo CNPJ aparece com nomes diferentes nos
+# contratos, e cada contrato deve ser agrupado e filtrado pelo nome informado nele.
+def upsert_party(conn: sqlite3.Connection, party: dict | None) -> int | None:
+    key = party_key(party)
+    if key is None:
+        return None
+    name = (party.get("name") or "").strip()
+    now = now_iso()
+    conn.execute(
+        """
+        INSERT INTO parties (doc, name, email, created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(doc, name) DO UPDATE SET
+            email = COALESCE(excluded.email, parties.email),
+            updated_at = excluded.updated_at
+        """,
+        (key, name, party.get("email") or None, now, now),
+    )
+    return conn.execute("SELECT id FROM parties WHERE doc = ? AND name = ?", (key, name)).fetchone()["id"]
+
+
+def link_contract_parties(conn: sqlite3.Connection, contract_id: int, contractor: dict | None, contracted: dict | None) -> None:
+    for role, party in zip(PARTY_ROLES, (contractor, contracted)):
+        party_id = upsert_party(conn, party)
+        if party_id is None:
+            continue
+        conn.execute(
+            """
+            INSERT INTO contract_parties (contract_id, role, party_id) VALUES (?, ?, ?)
+            ON CONFLICT(contract_id, role) DO UPDATE SET party_id = excluded.party_id
+            """,
+            (contract_id, role, party_id),
+        )
+
+
+def backfill_contract_parties(conn: sqlite3.Connection, rows: list) -> None:
+    for row in rows:
+        link_contract_parties(conn, row["id"], loads(row["contractor_json"], {}), loads(row["contracted_json"], {}))
+
+
+def supplier_filter_clause(term: str) -> tuple[str, list]:
+    digits = normalize_doc(term)
+    # Resolve primeiro as partes e depois busca os vínculos por (role, party_id); com o JOIN o
+    # planejador percorria todos os vínculos 'contracted' da carteira a cada filtro.
+    clause = (
+        "id IN (SELECT contract_id FROM contract_parties WHERE role = 'contracted' AND party_id IN "
+        "(SELECT id FROM parties WHERE name LIKE ? OR doc = ?))"
+    )
+    return clause, [f"%{term.strip()}%", digits or term.strip()]
+
+
+def contracts_by_supplier(contract_ids: list[int] | None = None) -> dict[str, int]:
+    params: list = []
+    if contract_ids is not None:
+        query = """
+            SELECT p.name AS supplier, COUNT(*) AS total
+            FROM contract_parties cp
+            JOIN parties p ON p.id = cp.party_id
+            WHERE cp.role = 'contracted' AND cp.contract_id IN (SELECT value FROM json_each(?))
+              AND p.name <> ''
+        """
+        params.append(f"[{','.join(str(int(i)) for i in contract_ids)}]")
+    else:
+        # Carteira inteira: percorre as partes e busca os vínculos por (role, party_id).
+        query = """
+            SELECT p.name AS supplier, COUNT(*) AS total
+            FROM parties p
+            CROSS JOIN contract_parties cp ON cp.role = 'contracted' AND cp.party_id = p.id
+            WHERE p.name <> ''
+        """
+    query += " GROUP BY p.name ORDER BY total DESC, p.name"
+    with connection() as conn:
+        rows = conn.execute(query, params).fetchall()
+    return {r["supplier"]: r["total"] for r in rows}
+
+
+def supplier_totals() -> list[tuple[str, float]]:
+    with connection() as conn:
+        rows = conn.execute(
+            """
+            SELECT COALESCE(NULLIF(p.name, ''), 'Não informado') AS supplier,
+                   SUM(COALESCE(c.contract_value, 0)) AS total
+            FROM contracts c
+            LEFT JOIN contract_parties cp ON cp.contract_id = c.id AND cp.role = 'contracted'
+            LEFT JOIN parties p ON p.id = cp.party_id
+            GROUP BY supplier
+            ORDER BY total DESC
+            """
+        ).fetchall()
+    return [(r["supplier"], float(r["total"] or 0)) for r in rows]
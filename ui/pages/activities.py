@@ -3,7 +3,7 @@ from datetime import date
 import streamlit as st
 
 from services import (
-    list_contracts,
+    list_contracts_summary,
     get_contract_by_id,
     add_additive,
     add_event,
@@ -14,8 +14,8 @@ from services import (
 from ui.theme import render_empty_state, render_page_header, render_panel_header
 
 
-def _contract_label(c: dict) -> str:
-    return f"{c['contract_number']} | {c['title']} | {c['status']}"
+def _contract_label(c) -> str:
+    return f"{c.contract_number} | {c.title} | {c.status}"
 
 
 def render_activities_page():
@@ -25,7 +25,11 @@ def render_activities_page():
         badge="Data Feeder",
     )
 
-    contracts = list_contracts(filters={"order_by": "created_at DESC"}, include_finalized=True)
+    contracts = list_contracts_summary(
+        filters={"order_by": "created_at DESC"},
+        include_finalized=True,
+        columns=("contract_number", "title", "status"),
+    )
     if not contracts:
         render_empty_state(
             "Nenhum contrato cadastrado.",
@@ -34,7 +38,7 @@ def render_activities_page():
         )
         return
 
-    options = {c["id"]: c for c in contracts}
+    options = {c.id: c for c in contracts}
     selected_id = st.selectbox("Contrato", options=list(options.keys()), format_func=lambda cid: _contract_label(options[cid]))
     contract = get_contract_by_id(selected_id)
     if not contract:
@@ -105,8 +109,9 @@ def render_activities_page():
                     "nonconformities_count": nonconf,
                     "risk_score": risk_score,
                 },
+                event_type="compliance_update",
+                event_data={"risk_score": risk_score, "out_of_standard": out_of_standard},
             )
-            add_event(selected_id, "compliance_update", {"risk_score": risk_score, "out_of_standard": out_of_standard})
             st.success("Compliance atualizado.")
             st.rerun()
 
@@ -132,8 +137,9 @@ def render_activities_page():
                     "supplier_switch_rate": switch_rate,
                     "satisfaction_score": satisfaction,
                 },
+                event_type="supplier_performance_update",
+                event_data={"sla_pct": sla_pct, "on_time_pct": on_time_pct},
             )
-            add_event(selected_id, "supplier_performance_update", {"sla_pct": sla_pct, "on_time_pct": on_time_pct})
             st.success("Desempenho do fornecedor atualizado.")
             st.rerun()
 
@@ -1,14 +1,21 @@
+import json
 from datetime import date
 from html import escape
 
 import pandas as pd
 import streamlit as st
 
-from db.connection import get_connection
 from services import (
-    list_kanban_contracts,
-    list_contracts,
+    contract_status_counts,
+    count_contracts,
+    list_contracts_page,
+    get_contract_by_id,
+    get_risk_by_contract_ids,
     update_status,
+    update_status_bulk,
+    list_contracts_summary,
+    retry_on_conflict,
+    ConflictError,
     download_pdf_bytes,
     generate_and_attach_pdf,
     edit_contract,
@@ -20,13 +27,73 @@ from utils import brl
 
 
 STATUS_FLOW = ["Gerado", "Assinado", "Protocolado", "Em vigor", "Finalizado"]
+KANBAN_PAGE_SIZE = 10
+TABLE_PAGE_SIZE = 50
+
+
+def _kanban_board():
+    status_counts = contract_status_counts(include_finalized=False)
+    pages = {}
+    for status in STATUS_FLOW[:-1]:
+        pager_key = f"kanban_cursor_{status}"
+        pages[status] = list_contracts_page(
+            {"status": status, "order_by": "created_at DESC"},
+            include_finalized=False,
+            page_size=KANBAN_PAGE_SIZE,
+            cursor=_page_cursor(pager_key),
+        )
+    risks = get_risk_by_contract_ids(c.id for items, _next in pages.values() for c in items)
+    risk_map = {contract_id: risk["risk_score"] for contract_id, risk in risks.items()}
+    return status_counts, pages, risk_map
+
+
+def _page_cursor(key: str) -> str | None:
+    return st.session_state.setdefault(key, [None])[-1]
+
+
+def _render_pager(key: str, next_cursor: str | None) -> None:
+    stack = st.session_state.setdefault(key, [None])
+    p1, p2 = st.columns(2)
+    if p1.button("Anterior", key=f"{key}_prev", use_container_width=True, disabled=len(stack) == 1):
+        stack.pop()
+        st.rerun()
+    if p2.button("Próxima", key=f"{key}_next", use_container_width=True, disabled=next_cursor is None):
+        stack.append(next_cursor)
+        st.rerun()
+
+
+def _selected_ids(status: str, items) -> list[int]:
+    if st.session_state.get(f"kanban_all_{status}"):
+        return [c.id for c in list_contracts_summary({"status": status}, include_finalized=False, columns=("id",))]
+    return [c.id for c in items if st.session_state.get(f"kanban_sel_{c.id}")]
+
+
+def _render_bulk_actions(status: str, items, total: int) -> None:
+    st.checkbox(f"Selecionar toda a etapa ({total})", key=f"kanban_all_{status}")
+    selected = _selected_ids(status, items)
+    if not selected:
+        return
+    targets = [(f"Voltar {len(selected)}", _prev_status(status)), (f"Avançar {len(selected)}", _next_status(status))]
+    b1, b2 = st.columns(2)
+    for column, (label, target) in zip((b1, b2), targets):
+        if column.button(label, key=f"kanban_bulk_{status}_{target}", use_container_width=True, disabled=target == status):
+            rejected = update_status_bulk(selected, target, user="ui")
+            st.session_state["kanban_bulk_result"] = (len(selected) - len(rejected), target, rejected)
+            st.session_state.pop(f"kanban_all_{status}", None)
+            for contract_id in selected:
+                st.session_state.pop(f"kanban_sel_{contract_id}", None)
+            st.rerun()
 
 
-def _risk_map():
-    conn = get_connection()
-    rows = conn.execute("SELECT contract_id, risk_score FROM compliance_checks").fetchall()
-    conn.close()
-    return {r["contract_id"]: r["risk_score"] for r in rows}
+def _render_bulk_result() -> None:
+    result = st.session_state.pop("kanban_bulk_result", None)
+    if not result:
+        return
+    moved, target, rejected = result
+    st.success(f"{moved} contrato(s) movido(s) para {target}.")
+    if rejected:
+        st.warning(f"{len(rejected)} contrato(s) não foram movidos.")
+        st.dataframe(pd.DataFrame(rejected), use_container_width=True, hide_index=True)
 
 
 def _next_status(status: str):
@@ -94,9 +161,9 @@ def render_contracts_page():
             "Gerado → Assinado → Protocolado → Em vigor → Finalizado",
             icon="account_tree",
         )
-        contracts = list_kanban_contracts()
-        risk_map = _risk_map()
-        if not contracts:
+        _render_bulk_result()
+        status_counts, pages, risk_map = _kanban_board()
+        if not status_counts:
             render_empty_state(
                 "Nenhum contrato ativo no Kanban.",
                 "Crie novos contratos para iniciar o fluxo operacional.",
@@ -107,12 +174,13 @@ def render_contracts_page():
             visible_status = STATUS_FLOW[:-1]
             for i, status in enumerate(visible_status):
                 with columns[i]:
-                    items = [c for c in contracts if c["status"] == status]
+                    pager_key = f"kanban_cursor_{status}"
+                    items, next_cursor = pages[status]
                     st.markdown(
                         f"""
                         <div class="lc-kanban-column-title">
                           <span>{escape(status)}</span>
-                          <span class="lc-kanban-count">{len(items)}</span>
+                          <span class="lc-kanban-count">{status_counts.get(status, 0)}</span>
                         </div>
                         """,
                         unsafe_allow_html=True,
@@ -121,57 +189,60 @@ def render_contracts_page():
                         render_empty_state("Sem contratos", "Nenhum item nesta etapa do fluxo.", icon="inventory_2")
                     for c in items:
                         with st.container():
-                            risk_score = risk_map.get(c["id"], "N/A")
+                            risk_score = risk_map.get(c.id, "N/A")
                             risk_label = _risk_label(risk_score)
-                            contracted_name = c.get("contracted", {}).get("name", "N/A")
-                            status_token = _status_token(c["status"])
+                            status_token = _status_token(c.status)
                             risk_tier = _risk_tier(risk_score)
                             with st.container(border=True):
                                 st.markdown(
                                     f"""
                                     <div class="lc-kanban-meta">
-                                      <span class="lc-kanban-chip lc-status-{status_token}">{escape(c["status"])}</span>
+                                      <span class="lc-kanban-chip lc-status-{status_token}">{escape(c.status)}</span>
                                       <span class="lc-kanban-chip lc-risk-{risk_tier}">Risco: {escape(risk_label)}</span>
                                     </div>
                                     """,
                                     unsafe_allow_html=True,
                                 )
-                                st.caption(c["contract_number"])
-                                st.write(f"**{c['title']}**")
-                                st.write(f"Tipo: {c['type']}")
-                                st.write(f"Vigência: {c['start_date']} -> {c['end_date']}")
-                                st.write(f"Contratado: {contracted_name}")
-                                st.write(f"Valor: {brl(c['contract_value'])}")
-
-                                step = _status_step(c["status"])
+                                st.checkbox(c.contract_number, key=f"kanban_sel_{c.id}")
+                                st.write(f"**{c.title}**")
+                                st.write(f"Tipo: {c.type}")
+                                st.write(f"Vigência: {c.start_date} -> {c.end_date}")
+                                st.write(f"Contratado: {c.contracted_name}")
+                                st.write(f"Valor: {brl(c.contract_value)}")
+
+                                step = _status_step(c.status)
                                 can_go_back = step > 0
                                 can_go_next = 0 <= step < len(STATUS_FLOW) - 1
-                                next_status = _next_status(c["status"])
+                                next_status = _next_status(c.status)
                                 next_label = "Finalizar" if next_status == "Finalizado" else "Próximo"
 
                                 c1, c2 = st.columns(2)
                                 if c1.button(
                                     "Voltar",
-                                    key=f"prev_{c['id']}",
+                                    key=f"prev_{c.id}",
                                     use_container_width=True,
                                     disabled=not can_go_back,
                                 ):
                                     try:
-                                        update_status(c["id"], _prev_status(c["status"]), user="ui")
+                                        update_status(c.id, _prev_status(c.status), user="ui", expected_status=c.status)
                                         st.rerun()
                                     except ValueError as e:
                                         st.error(str(e))
                                 if c2.button(
                                     next_label,
-                                    key=f"next_{c['id']}",
+                                    key=f"next_{c.id}",
                                     use_container_width=True,
                                     disabled=not can_go_next,
                                 ):
                                     try:
-                                        update_status(c["id"], next_status, user="ui")
+                                        update_status(c.id, next_status, user="ui", expected_status=c.status)
                                         st.rerun()
                                     except ValueError as e:
                                         st.error(str(e))
+                    if items:
+                        _render_bulk_actions(status, items, status_counts.get(status, 0))
+                    if status_counts.get(status, 0) > KANBAN_PAGE_SIZE:
+                        _render_pager(pager_key, next_cursor)
 
     with tab_table:
         render_panel_header("Filtros da Tabela", "Refine a busca e abra ações por contrato sem sair da página.", icon="filter_alt")
@@ -189,6 +260,7 @@ def render_contracts_page():
         d1, d2 = st.columns(2)
         date_from = d1.date_input("Criado de", value=date.today().replace(day=1), disabled=not use_date_filter)
         date_to = d2.date_input("Criado até", value=date.today(), disabled=not use_date_filter)
+        text_filter = st.text_input("Busca textual (título, escopo, cláusulas, observações jurídicas)")
 
         if use_date_filter and date_from > date_to:
             st.warning("Período inválido: a data inicial deve ser menor ou igual à final.")
@@ -210,6 +282,7 @@ def render_contracts_page():
             "status": status_filter or None,
             "department": dept_filter or None,
             "contracted": contracted_filter or None,
+            "text": text_filter or None,
             "min_value": min_value if min_value > 0 else None,
             "max_value": max_value if max_value > 0 else None,
             "date_from": str(date_from) if use_date_filter else None,
@@ -217,7 +290,14 @@ def render_contracts_page():
             "order_by": order,
         }
 
-        contracts = list_contracts(filters=filters, include_finalized=True)
+        total = count_contracts(filters=filters, include_finalized=True)
+        pager_key = "table_cursor_" + json.dumps(filters, sort_keys=True, default=str)
+        contracts, next_cursor = list_contracts_page(
+            filters=filters,
+            include_finalized=True,
+            page_size=TABLE_PAGE_SIZE,
+            cursor=_page_cursor(pager_key),
+        )
 
         if not contracts:
             render_empty_state(
@@ -230,31 +310,37 @@ def render_contracts_page():
         df = pd.DataFrame(
             [
                 {
-                    "id": c["id"],
-                    "Número": c["contract_number"],
-                    "Título": c["title"],
-                    "Tipo": c["type"],
-                    "Status": c["status"],
-                    "Departamento": c["department"],
-                    "Contratado": c.get("contracted", {}).get("name", "N/A"),
-                    "Valor": brl(c["contract_value"]),
-                    "Início": c["start_date"],
-                    "Fim": c["end_date"],
-                    "Versão": c.get("version", 1),
+                    "id": c.id,
+                    "Número": c.contract_number,
+                    "Título": c.title,
+                    "Tipo": c.type,
+                    "Status": c.status,
+                    "Departamento": c.department,
+                    "Contratado": c.contracted_name,
+                    "Valor": brl(c.contract_value),
+                    "Início": c.start_date,
+                    "Fim": c.end_date,
+                    "Versão": c.version,
                 }
                 for c in contracts
             ]
         )
         st.dataframe(df.drop(columns=["id"]), use_container_width=True, hide_index=True)
+        st.caption(f"{len(contracts)} de {total} contratos")
+        if total > TABLE_PAGE_SIZE:
+            _render_pager(pager_key, next_cursor)
 
         render_panel_header("Ações por Contrato", "Execute download, edição, aditivos e finalização no mesmo fluxo.", icon="edit_square")
-        contract_map = {c["id"]: c for c in contracts}
+        contract_map = {c.id: c for c in contracts}
         selected_contract_id = st.selectbox(
             "Selecione um contrato",
             options=list(contract_map.keys()),
-            format_func=lambda cid: f"{contract_map[cid]['contract_number']} | {contract_map[cid]['title']} | {contract_map[cid]['status']}",
+            format_func=lambda cid: f"{contract_map[cid].contract_number} | {contract_map[cid].title} | {contract_map[cid].status}",
         )
-        c = contract_map[selected_contract_id]
+        c = get_contract_by_id(selected_contract_id)
+        if not c:
+            st.error("Contrato não encontrado.")
+            return
 
         st.write(f"**Status:** {c['status']}  |  **Versão:** {c.get('version', 1)}")
         st.write(f"**Escopo:** {c.get('scope_text') or 'Não informado'}")
@@ -287,19 +373,39 @@ def render_contracts_page():
         new_scope = st.text_area("Escopo", value=c.get("scope_text", ""), key=f"scope_{c['id']}")
         new_clauses = st.text_area("Cláusulas", value=c.get("clauses_text", ""), key=f"clauses_{c['id']}")
 
+        base_version_key = f"base_version_{c['id']}"
+        conflict_key = f"edit_conflict_{c['id']}"
+        base_version = st.session_state.setdefault(base_version_key, c.get("version", 1))
+        conflict_message = st.session_state.pop(conflict_key, None)
+        if conflict_message:
+            st.error(conflict_message)
         if st.button("Salvar edição", key=f"edit_{c['id']}"):
-            edit_contract(
-                c["id"],
-                {
-                    "title": new_title,
-                    "department": new_dept,
-                    "contract_value": new_value,
-                    "scope_text": new_scope,
-                    "clauses_text": new_clauses,
-                },
-            )
-            st.success("Contrato atualizado com versionamento e evento de auditoria.")
-            st.rerun()
+            try:
+                edit_contract(
+                    c["id"],
+                    {
+                        "title": new_title,
+                        "department": new_dept,
+                        "contract_value": new_value,
+                        "scope_text": new_scope,
+                        "clauses_text": new_clauses,
+                    },
+                    expected_version=base_version,
+                )
+                st.session_state.pop(base_version_key, None)
+                st.success("Contrato atualizado com versionamento e evento de auditoria.")
+                st.rerun()
+            except ConflictError as e:
+                # Relê o contrato e recomeça a edição a partir da versão gravada, para que o próximo
+                # salvamento não volte a falhar com a versão antiga.
+                current = get_contract_by_id(c["id"]) or c
+                st.session_state.pop(base_version_key, None)
+                for field in ("title", "dept", "value", "scope", "clauses"):
+                    st.session_state.pop(f"{field}_{c['id']}", None)
+                st.session_state[conflict_key] = (
+                    f"{e} Os campos foram recarregados com a versão {current.get('version', 1)}."
+                )
+                st.rerun()
 
         st.markdown("**Registrar aditivo/ocorrência**")
         a1, a2, a3 = st.columns(3)
@@ -318,7 +424,16 @@ def render_contracts_page():
         if c["status"] != "Finalizado":
             if st.button("Finalizar", key=f"finalize_{c['id']}"):
                 try:
-                    update_status(c["id"], "Finalizado", user="ui", admin_override=admin_override)
+                    retry_on_conflict(
+                        c["id"],
+                        lambda current: update_status(
+                            current["id"],
+                            "Finalizado",
+                            user="ui",
+                            admin_override=admin_override,
+                            expected_status=current["status"],
+                        ),
+                    )
                     st.success("Contrato finalizado.")
                     st.rerun()
                 except ValueError as e:
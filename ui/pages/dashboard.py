@@ -5,8 +5,7 @@ import pandas as pd
 import plotly.express as px
 import streamlit as st
 
-from services import list_contracts
-from services.kpi_service import calculate_kpis, load_base_data
+from services.kpi_service import calculate_kpis, load_kpi_history, load_portfolio_snapshot
 from ui.theme import render_empty_state, render_page_header, render_panel_header
 from utils import brl
 
@@ -14,6 +13,13 @@ CEO_BLUE_SCALE = ["#1f7edc", "#3998f4", "#63b3fb", "#8fcbff", "#b8defe"]
 px.defaults.template = "plotly_white"
 px.defaults.color_discrete_sequence = CEO_BLUE_SCALE
 
+TREND_METRICS = (
+    ("financeiro", "valor_total_contratado", "Valor total contratado"),
+    ("compliance_risco", "indice_risco", "Índice de risco"),
+    ("fornecedor", "sla_cumprido_pct", "SLA cumprido"),
+    ("operacionais", "total_ativos", "Contratos ativos"),
+)
+
 
 def _fmt_metric(key: str, value):
     if value is None:
@@ -142,6 +148,40 @@ def _plot_figure(fig, target=None, pie: bool = False):
         )
 
 
+def _render_sparkline(frame: pd.DataFrame, metric: str, label: str, target):
+    with target.container(border=True):
+        st.caption(label)
+        if frame.empty:
+            st.markdown("**sem dados**")
+            return
+        last = float(frame["value"].iloc[-1])
+        st.markdown(f"**{escape(str(_fmt_metric(metric, int(last) if last.is_integer() else last)))}**")
+        fig = px.line(frame, x="snapshot_date", y="value")
+        fig.update_layout(
+            template="simple_white",
+            height=80,
+            margin=dict(l=0, r=0, t=0, b=0),
+            showlegend=False,
+            xaxis=dict(visible=False),
+            yaxis=dict(visible=False),
+        )
+        fig.update_traces(line=dict(width=2, color=CEO_BLUE_SCALE[0]))
+        st.plotly_chart(fig, use_container_width=True, config={"displayModeBar": False, "staticPlot": True})
+
+
+def _render_trends(department: str | None):
+    # Lê só kpi_history (uma faixa da chave primária por indicador), sem recalcular a carteira.
+    history = load_kpi_history(tuple((section, metric) for section, metric, _label in TREND_METRICS), department or "")
+    scope = f"do departamento {department}" if department else "da carteira inteira"
+    render_panel_header("Tendência em 12 meses", f"Histórico diário dos KPIs {scope}.", icon="trending_up")
+    if all(frame.empty for frame in history.values()):
+        st.caption("Sem histórico gravado. Rode `python scripts/kpi_history.py record` diariamente ou `backfill` para preencher.")
+        return
+    cols = st.columns(len(TREND_METRICS))
+    for col, (section, metric, label) in zip(cols, TREND_METRICS):
+        _render_sparkline(history[(section, metric)], metric, label, col)
+
+
 def render_dashboard_page():
     render_page_header(
         "Dashboard Executivo",
@@ -176,8 +216,8 @@ def render_dashboard_page():
         "date_to": str(date_to) if use_period_filter else None,
     }
 
-    filtered = list_contracts(filters=filters, include_finalized=True)
-    if not filtered:
+    snapshot = load_portfolio_snapshot(filters)
+    if snapshot.empty:
         render_empty_state(
             "Sem dados para os filtros selecionados.",
             "Ajuste período, departamento ou tipo para visualizar indicadores.",
@@ -185,26 +225,16 @@ def render_dashboard_page():
         )
         return
 
-    df = pd.DataFrame(filtered)
-    df["created_at"] = pd.to_datetime(df["created_at"], errors="coerce")
-    df["start_date"] = pd.to_datetime(df["start_date"], errors="coerce")
-    df["end_date"] = pd.to_datetime(df["end_date"], errors="coerce")
-    df["signed_date"] = pd.to_datetime(df.get("signed_date"), errors="coerce")
-    df["archived_date"] = pd.to_datetime(df.get("archived_date"), errors="coerce")
-    df["vigencia_dias"] = (df["end_date"] - df["start_date"]).dt.days
-    df["lead_time_dias"] = (df["signed_date"] - df["created_at"]).dt.days
-    df["archive_time_dias"] = (df["archived_date"] - df["created_at"]).dt.days
-
-    today = pd.Timestamp.today().normalize()
-    df["dias_para_vencer"] = (df["end_date"] - today).dt.days
-
-    _contracts_raw, additives_raw, compliance_raw, supplier_raw, _events_raw = load_base_data()
-    contract_ids = set(df["id"].tolist())
-    additives = additives_raw[additives_raw["contract_id"].isin(contract_ids)] if not additives_raw.empty else additives_raw
-    compliance = compliance_raw[compliance_raw["contract_id"].isin(contract_ids)] if not compliance_raw.empty else compliance_raw
-    supplier = supplier_raw[supplier_raw["contract_id"].isin(contract_ids)] if not supplier_raw.empty else supplier_raw
-
-    kpi_result = calculate_kpis(expiring_days=expiring_days, contract_ids=df["id"].tolist())
+    if snapshot.source == "columnar":
+        st.caption(
+            f"Contratos e gráficos lidos do snapshot analítico (geração {snapshot.generation}, "
+            f"atualizado em {snapshot.exported_at}); os KPIs vêm do banco na mesma geração."
+        )
+
+    df = snapshot.contracts
+    additives, compliance, supplier = snapshot.additives, snapshot.compliance, snapshot.supplier
+
+    kpi_result = calculate_kpis(expiring_days=expiring_days, snapshot=snapshot)
     if not kpi_result["has_data"]:
         render_empty_state(
             "Sem dados de KPIs.",
@@ -239,6 +269,7 @@ def render_dashboard_page():
                 "contratos_finalizados": int((df["status"] == "Finalizado").sum()),
             }
         )
+        _render_trends(filters["department"])
 
         col_a, col_b = st.columns(2)
         fig_status = px.pie(df, names="status", title="Distribuição por Status")
@@ -314,8 +345,7 @@ def render_dashboard_page():
 
         tipo_df = _dict_df(df["type"].value_counts().to_dict(), "tipo", "qtd")
         dep_df = _dict_df(df["department"].value_counts().to_dict(), "departamento", "qtd")
-        supplier_names = df["contracted"].apply(lambda x: x.get("name", "N/A") if isinstance(x, dict) else "N/A")
-        supplier_df = _dict_df(supplier_names.value_counts().to_dict(), "fornecedor", "qtd")
+        supplier_df = _dict_df(sections["operacionais"]["contratos_por_fornecedor"], "fornecedor", "qtd")
 
         c1, c2 = st.columns(2)
         _plot_figure(px.bar(tipo_df, x="tipo", y="qtd", title="Contratos por Tipo"), target=c1)
@@ -353,7 +383,7 @@ def render_dashboard_page():
                 "Qtd": [
                     int(df["critical_clauses"].fillna(0).sum()),
                     int((df["critical_clauses"].fillna(0) == 0).sum()),
-                    int(df["legal_notes"].fillna("").str.contains("litígio|litigio", case=False, regex=True).sum()),
+                    sections["juridicos"]["litigios_relacionados"],
                 ],
             }
         )
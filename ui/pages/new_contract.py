@@ -57,7 +57,12 @@ def render_new_contract_page():
         )
 
         with tab_a:
-            st.text_input("Número do contrato", value=contract_number, disabled=True)
+            st.text_input(
+                "Número do contrato (prévia)",
+                value=contract_number,
+                disabled=True,
+                help="O número definitivo é reservado no momento da gravação.",
+            )
             c1, c2 = st.columns(2)
             contract_type = c1.selectbox("Tipo de contrato", CONTRACT_TYPES)
             title = c2.text_input("Título/objeto curto")
@@ -140,7 +145,6 @@ def render_new_contract_page():
 
     if submit:
         payload = {
-            "contract_number": contract_number,
             "type": contract_type,
             "title": title,
             "department": department,
@@ -207,6 +211,7 @@ def render_new_contract_page():
             st.stop()
 
         contract_id = create_contract(payload)
+        contract_number = payload["contract_number"]
         pdf_path = generate_and_attach_pdf(contract_id)
         pdf_bytes = download_pdf_bytes(contract_id)
 
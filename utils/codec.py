@@ -0,0 +1,101 @@
+import json
+import os
+import zlib
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+JSON_BACKENDS = ("orjson", "json")
+PAYLOAD_CODECS = ("json", "binary")
+
+JSON_BACKEND = os.environ.get("LOGICHAIN_JSON_BACKEND") or ("orjson" if orjson else "json")
+if JSON_BACKEND not in JSON_BACKENDS or (JSON_BACKEND == "orjson" and orjson is None):
+    JSON_BACKEND = "json"
+
+EVENT_PAYLOAD_CODEC = os.environ.get("LOGICHAIN_EVENT_CODEC", "json")
+if EVENT_PAYLOAD_CODEC not in PAYLOAD_CODECS:
+    EVENT_PAYLOAD_CODEC = "json"
+
+# Formato binário: 1 byte de versão + deflate bruto (janela de 4 KiB) com dicionário pré-carregado
+# com as chaves e valores mais comuns dos eventos, para que payloads pequenos também encolham.
+BINARY_ZJSON_V1 = 1
+ZLIB_WBITS = -12
+ZLIB_MEMLEVEL = 5
+PAYLOAD_ZDICT = (
+    b'{"changes": {"executed_value": "savings_value": "roi_value": "legal_notes": "signed_date": '
+    b'"archived_date": "title": "department": "contract_value": "scope_text": "clauses_text": "end_date": '
+    b'"new_version": "pdf_path": "storage/pdfs/LC-", "version": "risk_score": "out_of_standard": '
+    b'"sla_pct": "on_time_pct": "text": "date": "value": "reason": "source": "import", '
+    b'"from": "to": "user": "system", "ui", "admin_override": false, true, '
+    b'"Gerado", "Assinado", "Protocolado", "Em vigor", "Finalizado"}, {"status": '
+)
+
+
+def set_json_backend(name: str) -> None:
+    global JSON_BACKEND
+    if name not in JSON_BACKENDS or (name == "orjson" and orjson is None):
+        raise ValueError(f"Backend JSON indisponível: {name}")
+    JSON_BACKEND = name
+
+
+def set_event_codec(name: str) -> None:
+    global EVENT_PAYLOAD_CODEC
+    if name not in PAYLOAD_CODECS:
+        raise ValueError(f"Codec de payload inválido: {name}")
+    EVENT_PAYLOAD_CODEC = name
+
+
+def dumps_bytes(data) -> bytes:
+    if JSON_BACKEND == "orjson":
+        try:
+            return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass
+    return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+
+def dumps_json(data) -> str:
+    if JSON_BACKEND == "orjson":
+        try:
+            return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+        except TypeError:
+            pass
+    return json.dumps(data, ensure_ascii=False)
+
+
+def loads_json(raw: str | bytes):
+    if JSON_BACKEND == "orjson":
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def encode_binary(data) -> bytes:
+    compressor = zlib.compressobj(9, zlib.DEFLATED, ZLIB_WBITS, ZLIB_MEMLEVEL, zdict=PAYLOAD_ZDICT)
+    return bytes([BINARY_ZJSON_V1]) + compressor.compress(dumps_bytes(data)) + compressor.flush()
+
+
+def decode_binary(blob: bytes):
+    if not blob or blob[0] != BINARY_ZJSON_V1:
+        raise ValueError("Formato binário de payload desconhecido")
+    decompressor = zlib.decompressobj(ZLIB_WBITS, zdict=PAYLOAD_ZDICT)
+    return loads_json(decompressor.decompress(blob[1:]) + decompressor.flush())
+
+
+def encode_payload(data) -> tuple[str | None, bytes | None]:
+    if EVENT_PAYLOAD_CODEC == "binary":
+        return None, encode_binary(data)
+    return dumps_json(data), None
+
+
+def decode_payload(text: str | None, blob: bytes | None, default=None):
+    if blob is not None:
+        return decode_binary(blob)
+    if text is None or text == "":
+        return default
+    try:
+        return loads_json(text)
+    except ValueError:
+        return default
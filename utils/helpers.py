@@ -1,21 +1,22 @@
-import json
 from datetime import datetime
 
+from utils.codec import dumps_json, loads_json
+
 
 def now_iso() -> str:
     return datetime.now().isoformat(timespec="seconds")
 
 
 def dumps(data) -> str:
-    return json.dumps(data or {}, ensure_ascii=False)
+    return dumps_json(data or {})
 
 
 def loads(raw: str, default=None):
     if raw is None or raw == "":
         return default
     try:
-        return json.loads(raw)
-    except json.JSONDecodeError:
+        return loads_json(raw)
+    except ValueError:
         return default
 
 